@@ -0,0 +1,89 @@
+"""
+Compare looking up the clip at a position with a linear scan and with `ClipStore.rowAt`.
+
+Three access patterns are measured on tracks of 10, 1k and 100k clips:
+sequential playback (the position moves forward a frame at a time, using the current clip as hint),
+random seeks, and a batch of sorted positions resolved with `ClipStore.rowsAt`.
+
+Usage (from the root of the repository):
+    python -m benchmarks.atPosition --lookups 10000
+"""
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+
+from models.clipStore import ClipStore
+from models.sourceInfo import SourceInfo
+
+def buildStore(count: int, random: Random):
+    store = ClipStore()
+    sourceInfos = [SourceInfo(f'video{i}.mp4', duration=float(random.randint(2000, 60000))) for i in range(16)]
+
+    for row in range(count):
+        sourceInfo = random.choice(sourceInfos)
+        inPoint = random.randint(0, int(sourceInfo.duration) // 2)
+        store.insert(row, sourceInfo, inPoint=inPoint)
+
+    return store
+
+def linearScan(store: ClipStore, position: float):
+    # The lookup TimelineModel.atPosition used before
+    offset = 0
+    for row in range(len(store)):
+        length = store.length(row)
+        if offset <= position < offset + length:
+            return row
+        offset += length
+
+    return -1
+
+def measure(function, positions: list):
+    start = perf_counter()
+    function(positions)
+    return (perf_counter() - start) / len(positions) * 1e6
+
+def main():
+    parser = ArgumentParser(description='Benchmark the lookup of the clip at a position.')
+    parser.add_argument('--lookups', type=int, default=10000, help='Number of positions resolved by each pattern.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000], help='Number of clips on the track.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random = Random(args.seed)
+
+    print(f'{"clips":>8} {"pattern":>12} {"linear (us)":>12} {"rowAt (us)":>12} {"rowsAt (us)":>12}')
+    for size in args.sizes:
+        store = buildStore(size, random)
+        total = store.totalLength()
+
+        # Playback at 25 fps starting from a random position
+        start = random.uniform(0, total)
+        sequential = [(start + frame * 40) % total for frame in range(args.lookups)]
+        seeks = [random.uniform(0, total) for _ in range(args.lookups)]
+        batch = sorted(seeks)
+
+        # The linear scan is too slow to run every lookup on large tracks
+        sample = max(1, min(args.lookups, 2_000_000 // size))
+
+        def playback(positions):
+            row = -1
+            for position in positions:
+                row = store.rowAt(position, row)
+
+        def lookups(positions):
+            for position in positions:
+                store.rowAt(position)
+
+        def scans(positions):
+            for position in positions:
+                linearScan(store, position)
+
+        assert [store.rowAt(position) for position in seeks[:sample]] == [linearScan(store, position) for position in seeks[:sample]]
+        assert store.rowsAt(batch) == [store.rowAt(position) for position in batch]
+
+        print(f'{size:>8} {"sequential":>12} {measure(scans, sequential[:sample]):>12.2f} {measure(playback, sequential):>12.2f} {"":>12}')
+        print(f'{size:>8} {"seek":>12} {measure(scans, seeks[:sample]):>12.2f} {measure(lookups, seeks):>12.2f} {"":>12}')
+        print(f'{size:>8} {"batch":>12} {measure(scans, batch[:sample]):>12.2f} {measure(lookups, batch):>12.2f} {measure(store.rowsAt, batch):>12.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare the CPU time and the wall time of re-encoding a timeline with a single ffmpeg filter graph
+and with moviepy (`concatenate_videoclips` and `write_videofile`), which passes every frame through Python.
+
+Clips of random length are cut from the given video files and resized to `--resolution`, e.g. 1080p recordings to 720p.
+The CPU time includes the ffmpeg processes started by either path.
+
+Usage (from the root of the repository):
+    python -m benchmarks.filterGraph videos/NVR4_ch28_main.mp4 videos/NVR4_ch29_main.mp4 --clips 6 --resolution 1280x720
+"""
+from argparse import ArgumentParser
+from os import path
+from random import Random
+from resource import getrusage, RUSAGE_SELF, RUSAGE_CHILDREN
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from moviepy.editor import VideoFileClip, concatenate_videoclips
+
+from models.sourceInfo import SourceInfo
+from export import ExportClip, ExportSettings, FilterGraphExporter
+
+def cpuTime():
+    ### User and system time of this process and of its finished child processes
+    return sum(usage.ru_utime + usage.ru_stime for usage in (getrusage(RUSAGE_SELF), getrusage(RUSAGE_CHILDREN)))
+
+def exportMoviepy(clips: list[ExportClip], output: str, exportSettings: ExportSettings):
+    width, height = exportSettings.resolution
+    videoclips = [VideoFileClip(clip.source, target_resolution=(height, width)).subclip(clip.start, clip.end) for clip in clips]
+    try:
+        concatenate_videoclips(videoclips).write_videofile(output, codec=exportSettings.codec, bitrate=exportSettings.bitrate, audio=exportSettings.audio, threads=exportSettings.threads, logger=None)
+    finally:
+        for videoclip in videoclips:
+            videoclip.close()
+
+def main():
+    parser = ArgumentParser(description='Benchmark the filter graph renderer against moviepy.')
+    parser.add_argument('files', nargs='+', help='Video files to cut the clips from.')
+    parser.add_argument('--clips', type=int, default=6, help='Number of clips on the timeline.')
+    parser.add_argument('--resolution', default='1280x720', help='Resolution of the exported video as WIDTHxHEIGHT.')
+    parser.add_argument('--codec', default='libx264')
+    parser.add_argument('--bitrate', default='2000k')
+    parser.add_argument('--threads', type=int, default=2)
+    parser.add_argument('--audio', action='store_true', help='Export the audio too.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random = Random(args.seed)
+    sourceInfos = [SourceInfo.probe(file) for file in args.files]
+    clips = []
+    for _ in range(args.clips):
+        sourceInfo = random.choice(sourceInfos)
+        length = random.uniform(0.1, 0.4) * sourceInfo.duration
+        inPoint = round(random.uniform(0, sourceInfo.duration - length))
+        clips.append(ExportClip(sourceInfo, inPoint, round(inPoint + length)))
+
+    resolution = tuple(int(res) for res in args.resolution.lower().split('x'))
+    exportSettings = ExportSettings(args.codec, args.bitrate, resolution, args.audio, args.threads)
+    length = sum(clip.length for clip in clips)
+
+    paths = {
+        'graph': lambda output: FilterGraphExporter(clips, output, exportSettings).run(),
+        'moviepy': lambda output: exportMoviepy(clips, output, exportSettings)
+    }
+
+    print(f'{len(clips)} clips, {length:.1f} s, {sourceInfos[0].width}x{sourceInfos[0].height} -> {args.resolution}')
+    print(f'{"path":>8} {"wall (s)":>9} {"cpu (s)":>8} {"x realtime":>11}')
+
+    with TemporaryDirectory(prefix='benchmark_') as tempDir:
+        for name, export in paths.items():
+            output = path.join(tempDir, f'{name}.mp4')
+
+            startCpu = cpuTime()
+            start = perf_counter()
+            export(output)
+            wall = perf_counter() - start
+            cpu = cpuTime() - startCpu
+
+            print(f'{name:>8} {wall:>9.2f} {cpu:>8.2f} {length / wall:>11.1f}')
+
+if __name__ == '__main__':
+    main()
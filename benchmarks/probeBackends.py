@@ -0,0 +1,48 @@
+"""
+Compare the probe backends on a set of video files.
+
+Every backend reads every file `--repeat` times, bypassing the probe cache.
+Use it with large .mp4 and .webm recordings to see the cost of opening a `VideoFileClip`
+compared to reading the headers only.
+
+Usage (from the root of the repository):
+    python -m benchmarks.probeBackends videos/NVR4_ch28_main.mp4 videos/1_ch2.webm --repeat 5
+"""
+from argparse import ArgumentParser
+from os import path
+from time import perf_counter
+from statistics import median
+
+from models.probeBackends import BACKENDS, ProbeError
+
+def main():
+    parser = ArgumentParser(description='Benchmark the metadata probe backends.')
+    parser.add_argument('files', nargs='+', help='Video files to probe.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of times each file is probed by each backend.')
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS), help='Backends to compare.')
+    args = parser.parse_args()
+
+    print(f'{"file":<40} {"size (MB)":>10} {"backend":>8} {"median (ms)":>12} {"frames":>8} {"fps":>7} {"duration (ms)":>14}')
+    for file in args.files:
+        size = path.getsize(file) / 2**20
+
+        for name in args.backends:
+            backend = BACKENDS[name]
+            if not backend.available():
+                print(f'{path.basename(file):<40} {size:>10.1f} {name:>8} {"unavailable":>12}')
+                continue
+
+            timings = []
+            try:
+                for _ in range(args.repeat):
+                    start = perf_counter()
+                    info = backend.probe(file)
+                    timings.append(perf_counter() - start)
+            except ProbeError as e:
+                print(f'{path.basename(file):<40} {size:>10.1f} {name:>8} {"failed":>12} {e}')
+                continue
+
+            print(f'{path.basename(file):<40} {size:>10.1f} {name:>8} {median(timings) * 1000:>12.1f} {info["frames"]:>8} {info["frameRate"]:>7.2f} {info["duration"]:>14.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Compare the export paths on a timeline cut from the given video files: the moviepy re-encode,
+the stream copy and the smart render.
+
+Clips of random length are cut at random positions (not on keyframes) from the files. For every path the
+wall time is reported, together with the accuracy of the output:
+ * the difference between the number of frames written and the number of frames of the clips
+ * the mean PSNR of the first frame of every clip in the output against the frame at the in point of the source,
+   a wrong frame at a cut shows up as a low value
+
+The sources must be compatible for the stream copy and the smart render (same codec, resolution and frame rate).
+
+Usage (from the root of the repository):
+    python -m benchmarks.smartRender videos/NVR4_ch28_main.mp4 videos/NVR4_ch29_main.mp4 --clips 6
+"""
+from argparse import ArgumentParser
+from os import path, remove
+from random import Random
+from re import findall
+from subprocess import run, PIPE, DEVNULL
+from statistics import mean
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from moviepy.editor import VideoFileClip, concatenate_videoclips
+
+from models.sourceInfo import SourceInfo
+from export import ExportClip, ExportSettings, StreamCopyExporter, SmartRenderExporter, ffmpegBinary, smartRenderProblems
+
+def buildClips(sources: list[str], count: int, random: Random):
+    sourceInfos = [SourceInfo.probe(source) for source in sources]
+    clips = []
+
+    for _ in range(count):
+        sourceInfo = random.choice(sourceInfos)
+        length = random.uniform(0.1, 0.4) * sourceInfo.duration
+        inPoint = round(random.uniform(0, sourceInfo.duration - length))
+        clips.append(ExportClip(sourceInfo, inPoint, round(inPoint + length)))
+
+    return clips
+
+def exportMoviepy(clips: list[ExportClip], output: str, exportSettings: ExportSettings):
+    videoclips = [VideoFileClip(clip.source).subclip(clip.start, clip.end) for clip in clips]
+    try:
+        concatenate_videoclips(videoclips).write_videofile(output, codec=exportSettings.codec, audio=exportSettings.audio, threads=exportSettings.threads, logger=None)
+    finally:
+        for videoclip in videoclips:
+            videoclip.close()
+
+def frameCount(file: str):
+    output = run([ffmpegBinary(), '-hide_banner', '-i', file, '-map', '0:v:0', '-f', 'null', '-'], stdout=DEVNULL, stderr=PIPE).stderr.decode('utf8', 'replace')
+    frames = findall(r'frame=\s*(\d+)', output)
+
+    return int(frames[-1]) if frames else 0
+
+def framePSNR(first: str, firstTime: float, second: str, secondTime: float):
+    # PSNR of a single frame of each file, 100 for identical frames
+    cmd = [
+        ffmpegBinary(), '-hide_banner',
+        '-ss', f'{firstTime:.6f}', '-i', first,
+        '-ss', f'{secondTime:.6f}', '-i', second,
+        '-lavfi', '[0:v]trim=end_frame=1[a];[1:v]trim=end_frame=1[b];[a][b]psnr', '-f', 'null', '-'
+    ]
+    output = run(cmd, stdout=DEVNULL, stderr=PIPE).stderr.decode('utf8', 'replace')
+    values = findall(r'average:(\S+)', output)
+
+    if not values:
+        return 0.0
+
+    return 100.0 if values[-1] == 'inf' else float(values[-1])
+
+def cutAccuracy(clips: list[ExportClip], output: str):
+    values = []
+    offset = 0.0
+
+    for clip in clips:
+        frameRate = clip.sourceInfo.frameRate
+        values.append(framePSNR(output, offset, clip.source, clip.firstFrame() / frameRate))
+        offset += clip.frames(frameRate) / frameRate
+
+    return mean(values)
+
+def main():
+    parser = ArgumentParser(description='Benchmark the export paths.')
+    parser.add_argument('files', nargs='+', help='Compatible video files to cut the clips from.')
+    parser.add_argument('--clips', type=int, default=6, help='Number of clips on the timeline.')
+    parser.add_argument('--codec', default='libx264', help='Codec of the moviepy re-encode.')
+    parser.add_argument('--threads', type=int, default=2, help='Threads of the moviepy re-encode.')
+    parser.add_argument('--skip-moviepy', action='store_true', help='Do not run the moviepy re-encode.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    clips = buildClips(args.files, args.clips, Random(args.seed))
+    exportSettings = ExportSettings(codec=args.codec, audio=False, threads=args.threads)
+
+    problems = smartRenderProblems(clips, audio=False)
+    if problems:
+        parser.error('\n'.join(problems))
+
+    expectedFrames = sum(clip.frames(clip.sourceInfo.frameRate) for clip in clips)
+    length = sum(clip.length for clip in clips)
+
+    paths = {
+        'copy': lambda output: StreamCopyExporter(clips, output, exportSettings).run(),
+        'smart': lambda output: SmartRenderExporter(clips, output, exportSettings).run()
+    }
+    if not args.skip_moviepy:
+        paths['moviepy'] = lambda output: exportMoviepy(clips, output, exportSettings)
+
+    print(f'{len(clips)} clips, {length:.1f} s, {expectedFrames} frames')
+    print(f'{"path":>8} {"wall (s)":>9} {"x realtime":>11} {"frames":>8} {"frame diff":>11} {"cut PSNR (dB)":>14}')
+
+    with TemporaryDirectory(prefix='benchmark_') as tempDir:
+        for name, export in paths.items():
+            output = path.join(tempDir, f'{name}.mp4')
+
+            start = perf_counter()
+            export(output)
+            wall = perf_counter() - start
+
+            frames = frameCount(output)
+            print(f'{name:>8} {wall:>9.2f} {length / wall:>11.1f} {frames:>8} {frames - expectedFrames:>11} {cutAccuracy(clips, output):>14.1f}')
+
+            remove(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+from .ffmpeg import FFmpegError, ffmpegBinary, frameCount, runFFmpeg, streamCodecs
+from .exportClip import ExportClip
+from .telemetry import ExportTelemetry, telemetryFile
+from .exporter import Exporter, ExportSettings, ExportCancelled
+from .audio import audioCodec, audioMode
+from .streamCopy import StreamCopyExporter, compatibilityProblems
+from .keyframes import keyframeTimes
+from .smartRender import SmartRenderExporter, smartRenderProblems
+from .segmentCache import SegmentCache
+from .parallel import ParallelExporter, splitClips
+from .filterGraph import FilterGraphExporter, filterGraph
+from .factory import MODES, createExporter
+from .encoders import EXPORT_ENCODERS, PRESETS, EncoderCache, availableEncoders, calibrate, choosePreset, targetBitrate
+
+
+__all__ = [
+    'FFmpegError',
+    'ffmpegBinary',
+    'frameCount',
+    'runFFmpeg',
+    'streamCodecs',
+    'ExportClip',
+    'ExportTelemetry',
+    'telemetryFile',
+    'Exporter',
+    'ExportSettings',
+    'ExportCancelled',
+    'audioCodec',
+    'audioMode',
+    'StreamCopyExporter',
+    'compatibilityProblems',
+    'keyframeTimes',
+    'SmartRenderExporter',
+    'smartRenderProblems',
+    'SegmentCache',
+    'ParallelExporter',
+    'splitClips',
+    'FilterGraphExporter',
+    'filterGraph',
+    'MODES',
+    'createExporter',
+    'EXPORT_ENCODERS',
+    'PRESETS',
+    'EncoderCache',
+    'availableEncoders',
+    'calibrate',
+    'choosePreset',
+    'targetBitrate'
+]
@@ -0,0 +1,47 @@
+from models.sourceInfo import SourceInfo
+from .exportClip import ExportClip
+from .ffmpeg import streamCodecs
+
+# Audio codecs an MP4 file can hold, audio of these codecs is copied instead of transcoded if possible
+COPY_AUDIO_CODECS = ('aac', 'mp3', 'ac3', 'eac3', 'alac')
+
+# Options of the audio encoder, when the audio is transcoded
+AUDIO_ENCODER = ['-c:a', 'aac', '-b:a', '192k']
+
+def audioCodec(sourceInfo: SourceInfo):
+    """
+    Returns the codec of the audio stream of a source, None if it has no audio stream or the codec can not be read.
+    The codec is read from the file if it is not in the metadata (probed without ffprobe).
+
+    :param SourceInfo sourceInfo: Metadata of the video file.
+    """
+    if not sourceInfo.audio:
+        return None
+
+    if sourceInfo.audioCodec is not None:
+        return sourceInfo.audioCodec
+
+    try:
+        return streamCodecs(sourceInfo.source)[1]
+    except OSError:
+        return None
+
+def audioMode(clips: list[ExportClip], audio: bool = True):
+    """
+    Returns how the audio of the clips is exported:
+     * `none`: there is no audio to export, the exported video has no audio stream and no audio is decoded
+     * `copy`: every clip has audio of the same codec an MP4 file can hold, at its original speed, the packets are copied
+     * `encode`: the audio is decoded and transcoded, in the process writing the video
+
+    :param list clips: Clips to export.
+    :param bool audio: Whether the audio is exported, as set in the export settings.
+    """
+    if not audio or not any(clip.sourceInfo.audio for clip in clips):
+        return 'none'
+
+    codecs = {audioCodec(clip.sourceInfo) for clip in clips}
+
+    if len(codecs) == 1 and codecs <= set(COPY_AUDIO_CODECS) and all(clip.playRate == 1.0 for clip in clips):
+        return 'copy'
+
+    return 'encode'
@@ -0,0 +1,347 @@
+from os import name as osName, path, makedirs, replace, stat
+from json import load, dump
+from platform import node
+from re import finditer
+from subprocess import run, PIPE, DEVNULL
+from tempfile import TemporaryDirectory
+from threading import Lock, RLock
+from time import perf_counter
+from .exportClip import ExportClip
+from .exporter import ExportSettings
+from .ffmpeg import FFmpegError, ffmpegBinary, runFFmpeg
+from .filters import videoFilters, inputArgs, encoderArgs
+from .streamCopy import codecs
+import settings
+
+# Encoders and presets tried by the calibration, from the best quality at a given bitrate to the fastest
+CANDIDATES = [
+    ('libx265', 'medium'),
+    ('libx265', 'veryfast'),
+    ('hevc_nvenc', 'p5'),
+    ('libx264', 'medium'),
+    ('h264_nvenc', 'p5'),
+    ('libx264', 'fast'),
+    ('hevc_nvenc', 'p1'),
+    ('h264_nvenc', 'p1'),
+    ('libx264', 'veryfast'),
+    ('libx264', 'ultrafast'),
+    ('mpeg4', None)
+]
+
+# Encoders offered by the export dialog, if the local ffmpeg can use them
+EXPORT_ENCODERS = ['libx264', 'libx265', 'h264_nvenc', 'hevc_nvenc', 'mpeg4']
+
+# Presets of the encoders, from the fastest to the best quality
+PRESETS = {
+    'libx264': ['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow'],
+    'libx265': ['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow'],
+    'h264_nvenc': ['p1', 'p2', 'p3', 'p4', 'p5', 'p6', 'p7'],
+    'hevc_nvenc': ['p1', 'p2', 'p3', 'p4', 'p5', 'p6', 'p7']
+}
+
+class EncoderCache:
+    """
+    Persistent cache of the encoders usable on this machine and of the results of the calibration encodes.
+
+    The cache belongs to the machine and the ffmpeg executable it was written with,
+    a cache file written on an other machine or with an other ffmpeg is ignored.
+    """
+    _instance: 'EncoderCache' = None
+    # The shared cache is asked for by the encoder and the calibration threads, it must be created only once
+    _instanceLock = Lock()
+
+    ### Constructor
+    def __init__(self, cacheFile: str = ...):
+        self._cacheFile = cacheFile if cacheFile != ... else settings.ENCODER_CACHE_FILE
+        self._encoders: dict[str, bool] = {}
+        self._calibrations: dict[str, list[dict]] = {}
+        self._modified = False
+        self._lock = RLock()
+
+        self.read()
+
+    ### Functions
+    @classmethod
+    def instance(cls):
+        """
+        Returns the cache shared by the application, creating it on first use.
+        """
+        with cls._instanceLock:
+            if cls._instance is None:
+                cls._instance = cls()
+
+        return cls._instance
+
+    @staticmethod
+    def machine():
+        """
+        Returns the key of this machine and of its ffmpeg executable.
+        """
+        binary = ffmpegBinary()
+        try:
+            fileStat = stat(binary)
+            return f'{node()}|{path.abspath(binary)}|{fileStat.st_size}|{fileStat.st_mtime_ns}'
+        except OSError:
+            return f'{node()}|{binary}'
+
+    def encoder(self, name: str):
+        """
+        Returns whether the encoder `name` is usable, None if it was not tried yet.
+
+        :param str name: Name of an ffmpeg encoder.
+        """
+        with self._lock:
+            return self._encoders.get(name)
+
+    def putEncoder(self, name: str, usable: bool):
+        with self._lock:
+            self._encoders[name] = usable
+            self._modified = True
+
+    def calibration(self, profile: str):
+        """
+        Returns the results of the calibration of `profile`, None if it was not calibrated yet.
+
+        :param str profile: Key of the footage and the settings calibrated, as returned by `calibrationProfile()`.
+        """
+        with self._lock:
+            return self._calibrations.get(profile)
+
+    def putCalibration(self, profile: str, results: list[dict]):
+        with self._lock:
+            self._calibrations[profile] = list(results)
+            self._modified = True
+
+    def clear(self):
+        """
+        Remove every entry from the cache, e.g. after installing a new GPU driver.
+        """
+        with self._lock:
+            self._encoders.clear()
+            self._calibrations.clear()
+            self._modified = True
+
+    def read(self):
+        """
+        Read in the entries stored in the cache file. A missing or unreadable cache file, or the cache of
+        an other machine results in an empty cache.
+        """
+        try:
+            with open(self._cacheFile, 'r', encoding='utf-8') as f:
+                entries = load(f)
+        except (OSError, ValueError):
+            entries = {}
+
+        if not isinstance(entries, dict) or entries.get('machine') != self.machine():
+            entries = {}
+
+        self._encoders = dict(entries.get('encoders', {}))
+        self._calibrations = dict(entries.get('calibrations', {}))
+        self._modified = False
+
+    def write(self):
+        """
+        Write the entries of the cache into the cache file, if they changed since the last read or write.
+        """
+        with self._lock:
+            if not self._modified:
+                return
+
+            tempFile = self._cacheFile + '.tmp'
+            try:
+                makedirs(path.dirname(path.abspath(self._cacheFile)), exist_ok=True)
+                with open(tempFile, 'w', encoding='utf-8') as f:
+                    dump({'machine': self.machine(), 'encoders': self._encoders, 'calibrations': self._calibrations}, f)
+                replace(tempFile, self._cacheFile)
+            except OSError:
+                return
+
+            self._modified = False
+
+def encoderList():
+    """
+    Returns the names of the video encoders the local ffmpeg was built with (`ffmpeg -encoders`).
+    Being built with an encoder does not mean it can be used, hardware encoders need the hardware and its driver too.
+    """
+    popen_params = {
+        'stdout': PIPE,
+        'stderr': DEVNULL,
+        'stdin': DEVNULL
+    }
+    if osName == 'nt':
+        popen_params['creationflags'] = 0x08000000
+
+    try:
+        output = run([ffmpegBinary(), '-hide_banner', '-encoders'], **popen_params).stdout.decode('utf8', 'replace')
+    except OSError as e:
+        raise FFmpegError(f'Could not start ffmpeg: {e}')
+
+    return [match.group(1) for match in finditer(r'(?m)^\s*V[\w.]{5}\s+(\S+)', output)]
+
+def availableEncoders(encoders: list[str] = ...):
+    """
+    Returns the encoders of `encoders` the local ffmpeg can use, in the same order.
+    Every encoder is tried once with a short test encode, the results are kept in the encoder cache.
+
+    :param list encoders: Names of the encoders to check, the ones offered by the export dialog by default.
+    """
+    encoders = encoders if encoders != ... else EXPORT_ENCODERS
+    cache = EncoderCache.instance()
+    built = None
+    usable = []
+
+    for encoder in encoders:
+        works = cache.encoder(encoder)
+
+        if works is None:
+            if built is None:
+                built = set(encoderList())
+
+            works = encoder in built and testEncoder(encoder)
+            cache.putEncoder(encoder, works)
+
+        if works:
+            usable.append(encoder)
+
+    cache.write()
+
+    return usable
+
+def testEncoder(encoder: str):
+    """
+    Returns whether `encoder` can encode a few frames of a generated test video.
+
+    :param str encoder: Name of an ffmpeg encoder.
+    """
+    try:
+        runFFmpeg(['-f', 'lavfi', '-i', 'testsrc2=size=640x360:rate=25', '-frames:v', '10', '-pix_fmt', 'yuv420p', '-c:v', encoder, '-f', 'null', '-'])
+    except FFmpegError:
+        return False
+
+    return True
+
+def calibrationSample(clips: list[ExportClip], sampleLength: float = 2.0):
+    """
+    Returns a clip of `sampleLength` seconds from the middle of the longest clip, the footage the calibration encodes.
+
+    :param list clips: Clips to export.
+    :param float sampleLength: Length of the sample in seconds.
+    """
+    clip = max(clips, key=lambda clip: clip.length)
+    length = min(sampleLength, clip.length)
+    start = clip.start + (clip.length - length) / 2
+
+    return ExportClip(clip.sourceInfo, round(start * 1000), round((start + length) * 1000))
+
+def calibrationProfile(sample: ExportClip, exportSettings: ExportSettings, resolution: tuple[int, int]):
+    """
+    Returns the key the calibration results of the sample footage are cached under. The footage is described
+    by its codec, size and frame rate, results for one recording are valid for the other recordings of the same camera.
+
+    :param ExportClip sample: Footage encoded by the calibration.
+    :param ExportSettings exportSettings: Settings of the exported video file.
+    :param tuple resolution: Width and height of the exported video.
+    """
+    sourceInfo = sample.sourceInfo
+    codec, _ = codecs(sourceInfo)
+    source = f'{codec}:{sourceInfo.width}x{sourceInfo.height}@{sourceInfo.frameRate:g}'
+
+    return f'{source}->{resolution[0]}x{resolution[1]}:{exportSettings.bitrate}:{max(exportSettings.threads, 1)}'
+
+def calibrate(clips: list[ExportClip], exportSettings: ExportSettings, candidates: list[tuple[str, str | None]] = ..., sampleLength: float = 2.0):
+    """
+    Encode a sample of the clips with every usable candidate encoder and preset, and return their speed and size.
+    The results are dictionaries with the keys `codec`, `preset`, `speed` (compared to real time) and `bytesPerSecond`
+    (of the encoded video), in the order of the candidates. They are cached for the footage and the settings.
+
+    :param list clips: Clips to export.
+    :param ExportSettings exportSettings: Settings of the exported video file, the bitrate and the threads are calibrated.
+    :param list candidates: Pairs of encoder and preset to try, `CANDIDATES` by default.
+    :param float sampleLength: Length of the encoded sample in seconds.
+
+    :raises FFmpegError: If the sample could not be decoded.
+    """
+    candidates = candidates if candidates != ... else CANDIDATES
+    sample = calibrationSample(clips, sampleLength)
+    frameRate = sample.sourceInfo.frameRate or 25.0
+    resolution = exportSettings.resolution or (sample.sourceInfo.width, sample.sourceInfo.height)
+
+    cache = EncoderCache.instance()
+    profile = calibrationProfile(sample, exportSettings, resolution)
+    results = cache.calibration(profile)
+
+    if results is not None:
+        return results
+
+    usable = set(availableEncoders(list(dict.fromkeys(codec for codec, _ in candidates))))
+    frames = max(round(sample.length * frameRate), 1)
+    duration = frames / frameRate
+    results = []
+
+    with TemporaryDirectory(prefix='calibration_') as tempDir:
+        output = path.join(tempDir, 'sample.mkv')
+
+        for codec, preset in candidates:
+            if codec not in usable:
+                continue
+
+            candidateSettings = ExportSettings(codec, exportSettings.bitrate, resolution, False, exportSettings.threads, preset)
+            args = inputArgs(sample, sample.start, duration, frameRate)
+            args += ['-map', '0:v:0', '-vf', ','.join(videoFilters(sample, resolution, frameRate, frames)), *encoderArgs(candidateSettings), '-an', output]
+
+            start = perf_counter()
+            try:
+                runFFmpeg(args)
+            except FFmpegError:
+                continue
+            wall = perf_counter() - start
+
+            results.append({
+                'codec': codec,
+                'preset': preset,
+                'speed': duration / wall if wall > 0 else 0.0,
+                'bytesPerSecond': path.getsize(output) / duration
+            })
+
+    if not results:
+        raise FFmpegError('None of the encoders could encode the sample of the clips')
+
+    cache.putCalibration(profile, results)
+    cache.write()
+
+    return results
+
+def choosePreset(results: list[dict], targetSpeed: float = ..., targetSize: int = 0, duration: float = 0.0):
+    """
+    Returns the calibration result to export with: the first one (the best quality) meeting the target speed
+    and, if a target size is given, fitting the exported video into it. If none of them does, the fastest one.
+
+    :param list results: Results of `calibrate()`.
+    :param float targetSpeed: Speed to reach compared to real time, the `EXPORT_TARGET_SPEED` setting by default.
+    :param int targetSize: Largest size of the exported video in bytes, 0 for no limit.
+    :param float duration: Length of the exported video in seconds, used with `targetSize`.
+    """
+    targetSpeed = targetSpeed if targetSpeed != ... else getattr(settings, 'EXPORT_TARGET_SPEED', 4.0)
+
+    for result in results:
+        if result['speed'] < targetSpeed:
+            continue
+        if targetSize > 0 and result['bytesPerSecond'] * duration > targetSize:
+            continue
+
+        return result
+
+    return max(results, key=lambda result: result['speed'])
+
+def targetBitrate(targetSize: int, duration: float, audio: bool = True):
+    """
+    Returns the video bitrate fitting an exported video of `duration` seconds into `targetSize` bytes, as ffmpeg takes it.
+    A few percents are kept for the overhead of the container, and the bitrate of the audio if it is exported.
+
+    :param int targetSize: Largest size of the exported video in bytes.
+    :param float duration: Length of the exported video in seconds.
+    :param bool audio: Whether the audio is exported too.
+    """
+    bitrate = targetSize * 8 * 0.97 / max(duration, 0.001) / 1000 - (192 if audio else 0)
+
+    return f'{max(int(bitrate), 5)}k'
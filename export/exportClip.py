@@ -0,0 +1,87 @@
+from math import ceil
+from dataclasses import dataclass
+from models.sourceInfo import SourceInfo
+
+# Positions within this fraction of a frame after a frame are taken as the position of the frame (rounding of the millieseconds)
+FRAME_TOLERANCE = 1e-3
+
+def frameAt(position: float, frameRate: float):
+    """
+    Returns the index of the first frame at or after `position`, the frame a decoding seek to `position` starts with.
+    Every exporter starts a clip, or a part of it, with this frame.
+
+    :param float position: Position in a video file in seconds.
+    :param float frameRate: Frame rate of the video file.
+    """
+    return ceil(position * frameRate - FRAME_TOLERANCE)
+
+@dataclass(frozen=True)
+class ExportClip:
+    """
+    A clip of the timeline as the exporters see it: the metadata of its video file and the part of it to export.
+    In and out points are in millieseconds, -1 if unset.
+    """
+    sourceInfo: SourceInfo
+    inPoint: int = -1
+    outPoint: int = -1
+    playRate: float = 1.0
+
+    @classmethod
+    def fromRecord(cls, record: tuple):
+        """
+        Create an export clip from a record of a clip store, as returned by `TimelineModel.records()`.
+
+        :param tuple record: The attributes of a clip in the form `ClipStore.insert()` takes them.
+        """
+        sourceInfo, _, playRate, inPoint, outPoint, _ = record
+
+        return cls(sourceInfo, inPoint, outPoint, playRate)
+
+    @classmethod
+    def fromDict(cls, clip: dict, sourceInfo: SourceInfo):
+        """
+        Create an export clip from an entry of the clips file of a project.
+
+        :param dict clip: The saved attributes of the clip.
+        :param SourceInfo sourceInfo: Metadata of the video file of the clip.
+        """
+        return cls(sourceInfo, clip.get('inPoint', -1), clip.get('outPoint', -1), clip.get('playRate', 1.0))
+
+    @property
+    def source(self):
+        return self.sourceInfo.source
+
+    @property
+    def start(self):
+        """
+        Start of the clip in the video file in seconds.
+        """
+        return self.inPoint / 1000 if self.inPoint > 0 else 0.0
+
+    @property
+    def end(self):
+        """
+        End of the clip in the video file in seconds.
+        """
+        return self.outPoint / 1000 if self.outPoint > 1 else self.sourceInfo.duration / 1000
+
+    @property
+    def length(self):
+        """
+        Length of the clip in seconds.
+        """
+        return max(self.end - self.start, 0.0)
+
+    def firstFrame(self):
+        """
+        Index of the first frame of the clip in its video file (see `frameAt()`).
+        """
+        return frameAt(self.start, self.sourceInfo.frameRate)
+
+    def frames(self, frameRate: float):
+        """
+        Number of frames of the clip in an exported video, every exporter writes this many frames of the clip.
+
+        :param float frameRate: Frame rate of the exported video.
+        """
+        return round(self.length / self.playRate * frameRate)
@@ -0,0 +1,210 @@
+from dataclasses import dataclass
+from logging import Logger
+from subprocess import Popen
+from threading import Lock
+from typing import Callable
+from .exportClip import ExportClip
+from .ffmpeg import FFmpegError, frameCount, runFFmpeg
+from .audio import audioMode
+from .telemetry import ExportTelemetry
+
+class ExportCancelled(FFmpegError):
+    """
+    Raised by an exporter, when its export was cancelled.
+    """
+
+@dataclass
+class ExportSettings:
+    """
+    Settings of the exported video file, as chosen in the export dialog.
+    """
+    codec: str = 'libx264'
+    bitrate: str = '50k'
+    resolution: tuple[int, int] | None = None
+    audio: bool = True
+    threads: int = 1
+    preset: str | None = None
+
+class Exporter:
+    """
+    Base class of the exporters writing a list of clips into a single video file.
+
+    An exporter runs in the thread calling `run()`, `cancel()` can be called from any other thread.
+    Only the ffmpeg processes started by the exporter itself are terminated when it is cancelled.
+
+    The progress is reported with dictionaries having the keys:
+     * `frame`: number of frames written
+     * `fps`: frames written per second
+     * `outTime`: position in the exported video in millieseconds
+     * `duration`: length of the exported video in millieseconds
+     * `end`: whether this is the last report
+
+    Every ffmpeg process of the export is recorded in the telemetry of the exporter, `export()` writes its report.
+    """
+    name = ''
+
+    ### Constructor
+    def __init__(self, clips: list[ExportClip], output: str, exportSettings: ExportSettings = ...):
+        self._clips = list(clips)
+        self._output = output
+        self._settings = exportSettings if exportSettings != ... else ExportSettings()
+
+        self._processes: set[Popen] = set()
+        self._lock = Lock()
+        self._cancelled = False
+        self._audioMode: str | None = None
+        self._telemetry = ExportTelemetry(self.name, self._clips, output, self._settings, self.frameRate)
+
+    ### Properties
+    @property
+    def clips(self):
+        return self._clips
+
+    @property
+    def output(self):
+        return self._output
+
+    @property
+    def settings(self):
+        return self._settings
+
+    @property
+    def telemetry(self):
+        return self._telemetry
+
+    @property
+    def duration(self):
+        """
+        Length of the exported video in millieseconds.
+        """
+        return sum(clip.length / clip.playRate for clip in self._clips) * 1000
+
+    @property
+    def frameRate(self):
+        """
+        Frame rate of the exported video, the highest frame rate of the clips.
+        """
+        return max((clip.sourceInfo.frameRate for clip in self._clips), default=0) or 25.0
+
+    @property
+    def resolution(self):
+        """
+        Width and height of the exported video, the resolution of the settings or the size of the first clip.
+        """
+        if self._settings.resolution:
+            return self._settings.resolution
+
+        first = self._clips[0].sourceInfo
+        return (first.width, first.height)
+
+    ### Functions
+    def run(self, onProgress: Callable[[dict], None] = None):
+        """
+        Write the clips into the output file.
+
+        :param Callable onProgress: Called with every progress report.
+
+        :raises ExportCancelled: If the export was cancelled.
+        :raises FFmpegError: If ffmpeg failed to write the file.
+        """
+        raise NotImplementedError
+
+    def export(self, onProgress: Callable[[dict], None] = None, logger: Logger = ...):
+        """
+        Write the clips into the output file (see `run()`), then write the telemetry report next to it
+        and its summary into `logger`. The report is written for cancelled and failed exports too.
+
+        :param Callable onProgress: Called with every progress report.
+        :param Logger logger: Logger the summary of the telemetry is written into, the `export` logger by default.
+
+        :raises ExportCancelled: If the export was cancelled.
+        :raises FFmpegError: If ffmpeg failed to write the file.
+        """
+        self._telemetry.start()
+
+        try:
+            self.run(onProgress)
+        except ExportCancelled:
+            self._telemetry.finish('cancelled')
+            raise
+        except Exception as e:
+            self._telemetry.finish('failed', str(e))
+            raise
+        else:
+            self._telemetry.finish('succeeded')
+        finally:
+            self._telemetry.write()
+            self._telemetry.log(logger)
+
+    def cancel(self):
+        """
+        Stop the export, terminating the running ffmpeg processes of the exporter.
+        """
+        with self._lock:
+            self._cancelled = True
+
+        self._killProcesses()
+
+    def isCancelled(self):
+        return self._cancelled
+
+    def audioMode(self):
+        """
+        Returns how the audio is exported: `none`, `copy` or `encode` (see `export.audio.audioMode()`).
+        """
+        if self._audioMode is None:
+            self._audioMode = audioMode(self._clips, self._settings.audio)
+
+        return self._audioMode
+
+    def hasAudio(self):
+        """
+        Returns whether the exported video has an audio stream.
+        """
+        return self.audioMode() != 'none'
+
+    def _killProcesses(self):
+        ### Terminate the running ffmpeg processes of the exporter
+        with self._lock:
+            processes = list(self._processes)
+
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+
+    def _runFFmpeg(self, args: list[str], onProgress: Callable[[dict], None] = None, stage: str = ..., clip: int | None = None):
+        ### Run an ffmpeg process owned by the exporter, recorded in the telemetry under `stage` and the index of `clip`
+        if self._cancelled:
+            raise ExportCancelled('The export was cancelled')
+
+        def started(process: Popen):
+            with self._lock:
+                self._processes.add(process)
+                cancelled = self._cancelled
+
+            # Cancelled while the process was starting
+            if cancelled:
+                process.kill()
+
+        try:
+            statistics = runFFmpeg(args, onProgress, started)
+        except FFmpegError:
+            if self._cancelled:
+                raise ExportCancelled('The export was cancelled')
+            raise
+        finally:
+            with self._lock:
+                self._processes = {process for process in self._processes if process.poll() is None}
+
+        # The process writing the output of the export reports the frames of the exported video, copied frames are counted
+        output = args[-1] == self._output
+        if output and statistics['frames'] == 0:
+            try:
+                statistics = {**statistics, 'frames': frameCount(self._output)}
+            except FFmpegError:
+                pass
+
+        self._telemetry.record(stage if stage != ... else self.name, statistics, clip, output)
+
+        if self._cancelled:
+            raise ExportCancelled('The export was cancelled')
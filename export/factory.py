@@ -0,0 +1,54 @@
+from .exportClip import ExportClip
+from .exporter import ExportSettings
+from .streamCopy import StreamCopyExporter, compatibilityProblems
+from .smartRender import SmartRenderExporter, smartRenderProblems
+from .parallel import ParallelExporter, splitClips
+from .filterGraph import FilterGraphExporter
+
+# Export modes: `encode` picks `parallel` or `graph` by the number of processes it could run at once
+MODES = ('smart', 'copy', 'encode', 'parallel', 'graph')
+
+# Every clip is an input of the filter graph, longer timelines are encoded in segments to keep the open decoders few
+GRAPH_MAX_CLIPS = 64
+
+def createExporter(mode: str, clips: list[ExportClip], output: str, exportSettings: ExportSettings = ...):
+    """
+    Returns the exporter of `mode` for the clips.
+    The fast modes (`smart` and `copy`) fall back to re-encoding every clip, if the sources are not compatible with them.
+    Re-encoding uses a pool of processes, if it can run more than one of them or the segment cache holds segments
+    of the timeline from an earlier export, otherwise a single filter graph.
+
+    :param str mode: One of `MODES`.
+    :param list clips: Clips to export.
+    :param str output: Path of the exported video file.
+    :param ExportSettings exportSettings: Settings of the exported video file.
+
+    :raises ValueError: If the mode is unknown.
+    """
+    exportSettings = exportSettings if exportSettings != ... else ExportSettings()
+
+    match mode:
+        case 'smart' if not smartRenderProblems(clips, exportSettings.audio):
+            return SmartRenderExporter(clips, output, exportSettings)
+        case 'copy' if not compatibilityProblems(clips, exportSettings.audio):
+            return StreamCopyExporter(clips, output, exportSettings)
+        case 'parallel':
+            return ParallelExporter(clips, output, exportSettings)
+        case 'graph':
+            return FilterGraphExporter(clips, output, exportSettings)
+        case 'smart' | 'copy' | 'encode':
+            # The segments of the timeline are encoded concurrently, by as many processes as threads are set
+            exporter = ParallelExporter(clips, output, exportSettings)
+            segments = splitClips(clips, exporter.frameRate)
+            workers, _ = exporter.workers(len(segments))
+
+            if workers > 1 or len(clips) > GRAPH_MAX_CLIPS:
+                return exporter
+
+            # A timeline exported through the segments before is exported the same way, only its changed clips are encoded
+            if exporter.storedSegments(segments) > 0:
+                return exporter
+
+            return FilterGraphExporter(clips, output, exportSettings)
+        case _:
+            raise ValueError(f'Unknown export mode: \'{mode}\'')
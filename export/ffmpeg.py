@@ -0,0 +1,216 @@
+from os import name as osName, stat
+from re import search
+from time import perf_counter
+from functools import lru_cache
+from subprocess import Popen, PIPE, DEVNULL, run
+from tempfile import TemporaryFile
+from typing import Callable
+from moviepy.config import get_setting
+import psutil
+import settings
+
+class FFmpegError(OSError):
+    """
+    Raised when an ffmpeg process exits with an error.
+    """
+
+def ffmpegBinary():
+    """
+    Returns the ffmpeg executable to use: the one set in the settings, otherwise the one used by moviepy.
+    """
+    if getattr(settings, 'FFMPEG_BINARY', None):
+        return settings.FFMPEG_BINARY
+
+    return get_setting('FFMPEG_BINARY')
+
+def runFFmpeg(args: list[str], onProgress: Callable[[dict], None] = None, onStart: Callable[[Popen], None] = None):
+    """
+    Run ffmpeg with `args` and wait for it to finish.
+
+    The progress ffmpeg reports is passed to `onProgress` as a dictionary with the keys:
+     * `frame`: number of frames written
+     * `fps`: frames written per second
+     * `outTime`: position in the output in millieseconds
+     * `speed`: speed compared to real time
+     * `size`: bytes written to the output so far
+     * `end`: whether this is the last report
+
+    Returns the statistics of the process (see `processStatistics()`).
+
+    :param list args: Arguments of ffmpeg, without the executable.
+    :param Callable onProgress: Called with every progress report.
+    :param Callable onStart: Called with the started process, e.g. to be able to terminate it.
+
+    :raises FFmpegError: If ffmpeg could not be started or exits with an error.
+    """
+    # The CPU time of the process is printed by `-benchmark` when it exits
+    cmd = [ffmpegBinary(), '-hide_banner', '-nostdin', '-nostats', '-benchmark', '-progress', 'pipe:1', '-y', *args]
+    popen_params = {
+        'stdout': PIPE,
+        'stdin': DEVNULL
+    }
+    if osName == 'nt':
+        popen_params['creationflags'] = 0x08000000
+
+    # The errors are written into a file, a pipe left unread could fill up and block ffmpeg
+    with TemporaryFile() as errors:
+        start = perf_counter()
+        try:
+            process = Popen(cmd, stderr=errors, **popen_params)
+        except OSError as e:
+            raise FFmpegError(f'Could not start ffmpeg: {e}')
+
+        if onStart is not None:
+            onStart(process)
+
+        report = {}
+        last = {}
+        bytesRead = 0
+        for line in process.stdout:
+            key, _, value = line.decode('utf8', 'replace').strip().partition('=')
+            report[key] = value
+
+            if key == 'progress':
+                last = report
+                bytesRead = readBytes(process.pid, bytesRead)
+                if onProgress is not None:
+                    onProgress(parseProgress(report))
+                report = {}
+
+        process.stdout.close()
+        returnCode = process.wait()
+        wall = perf_counter() - start
+
+        errors.seek(0)
+        output = errors.read().decode('utf8', 'replace')
+
+        if returnCode != 0:
+            message = [line for line in output.strip().splitlines() if not line.startswith('bench:')][-5:]
+            raise FFmpegError(f'ffmpeg exited with code {returnCode}: ' + '\n'.join(message))
+
+    return processStatistics(output, last, wall, bytesRead)
+
+def readBytes(pid: int, previous: int = 0):
+    """
+    Returns the number of bytes a running process has read so far, `previous` if it can not be read (e.g. it has exited).
+
+    :param int pid: Id of the process.
+    :param int previous: Value returned by the previous call for the process.
+    """
+    try:
+        counters = psutil.Process(pid).io_counters()
+    except (psutil.Error, AttributeError):
+        return previous
+
+    # Reads served from the page cache are counted too on Linux, Windows counts them in `read_bytes`
+    return max(getattr(counters, 'read_chars', counters.read_bytes), previous)
+
+def processStatistics(errors: str, report: dict, wall: float, bytesRead: int):
+    """
+    Returns the statistics of a finished ffmpeg process as a dictionary with the keys:
+     * `wall`: time the process ran in seconds
+     * `cpu`: CPU time of the process in seconds (user and system time of every thread)
+     * `frames`: number of frames written
+     * `bytesRead`: bytes read by the process, sampled at its last progress report
+     * `bytesWritten`: size of the output
+
+    :param str errors: Error output of the process, with the `-benchmark` lines.
+    :param dict report: Last progress report of the process.
+    :param float wall: Time the process ran in seconds.
+    :param int bytesRead: Bytes read by the process.
+    """
+    cpu = search(r'bench: utime=([\d.]+)s stime=([\d.]+)s', errors)
+
+    def number(key: str):
+        try:
+            return int(report.get(key, ''))
+        except ValueError:
+            return 0
+
+    return {
+        'wall': wall,
+        'cpu': float(cpu.group(1)) + float(cpu.group(2)) if cpu else 0.0,
+        'frames': number('frame'),
+        'bytesRead': bytesRead,
+        'bytesWritten': number('total_size')
+    }
+
+def parseProgress(report: dict):
+    """
+    Returns the values of an ffmpeg progress report (`-progress`) as numbers.
+
+    :param dict report: The `key=value` pairs of a single report.
+    """
+    def number(key: str, type = float):
+        try:
+            return type(report.get(key, '').rstrip('x'))
+        except ValueError:
+            return type(0)
+
+    return {
+        'frame': number('frame', int),
+        'fps': number('fps'),
+        'outTime': number('out_time_us', int) / 1000,
+        'speed': number('speed'),
+        'size': number('total_size', int),
+        'end': report.get('progress') == 'end'
+    }
+
+def streamCodecs(source: str):
+    """
+    Returns the names of the codecs of the first video and audio stream of `source`, None for a missing stream.
+    The headers are read with `ffmpeg -i`, for sources probed without ffprobe.
+
+    :param str source: Path to a video file.
+    """
+    fileStat = stat(source)
+
+    return _streamCodecs(source, fileStat.st_size, fileStat.st_mtime_ns)
+
+@lru_cache(maxsize=256)
+def _streamCodecs(source: str, size: int, mtime: int):
+    ### Cached by the identity of the file, the size and the modification time are part of the key
+    popen_params = {
+        'stdout': DEVNULL,
+        'stderr': PIPE,
+        'stdin': DEVNULL
+    }
+    if osName == 'nt':
+        popen_params['creationflags'] = 0x08000000
+
+    try:
+        output = run([ffmpegBinary(), '-hide_banner', '-i', source], **popen_params).stderr.decode('utf8', 'replace')
+    except OSError as e:
+        raise FFmpegError(f'Could not start ffmpeg: {e}')
+
+    video = search(r'Stream #\S+: Video: (\w+)', output)
+    audio = search(r'Stream #\S+: Audio: (\w+)', output)
+
+    return (video.group(1) if video else None, audio.group(1) if audio else None)
+
+def frameCount(file: str):
+    """
+    Returns the number of frames of the first video stream of `file`, counting its packets without decoding them.
+    ffmpeg does not report the frames of copied streams in its progress, this counts them after the fact.
+
+    :param str file: Path to a video file.
+
+    :raises FFmpegError: If the file could not be read.
+    """
+    popen_params = {
+        'stdout': PIPE,
+        'stderr': DEVNULL,
+        'stdin': DEVNULL
+    }
+    if osName == 'nt':
+        popen_params['creationflags'] = 0x08000000
+
+    try:
+        process = run([ffmpegBinary(), '-v', 'error', '-i', file, '-map', '0:v:0', '-c', 'copy', '-f', 'framecrc', '-'], **popen_params)
+    except OSError as e:
+        raise FFmpegError(f'Could not start ffmpeg: {e}')
+
+    if process.returncode != 0:
+        raise FFmpegError(f'Could not count the frames of \'{file}\'')
+
+    return sum(1 for line in process.stdout.decode('utf8', 'replace').splitlines() if line and not line.startswith('#'))
@@ -0,0 +1,89 @@
+from os import path
+from tempfile import TemporaryDirectory
+from typing import Callable
+from .exportClip import ExportClip
+from .exporter import Exporter
+from .audio import AUDIO_ENCODER
+from .streamCopy import concatList
+from .filters import videoFilters, audioFilters, inputArgs, encoderArgs
+
+def filterGraph(clips: list[ExportClip], resolution: tuple[int, int], frameRate: float, audio: bool = True):
+    """
+    Returns the ffmpeg input arguments and the `filter_complex` graph rendering the clips into a single video.
+
+    Every clip is an input of its own, seeked to its in point. Its video is conformed to the exported video
+    (play rate, size, frame rate, exact number of frames), its audio to the exported audio, then the clips are joined by
+    the `concat` filter into the `[v]` and `[a]` outputs. Clips without audio get silence of their length.
+
+    :param list clips: Clips to render, every clip must have a positive length.
+    :param tuple resolution: Width and height of the exported video.
+    :param float frameRate: Frame rate of the exported video.
+    :param bool audio: Whether the `[a]` output is created.
+    """
+    args = []
+    chains = []
+    labels = []
+
+    for index, clip in enumerate(clips):
+        frames = max(clip.frames(frameRate), 1)
+        duration = frames / frameRate
+
+        args += inputArgs(clip, clip.start, duration, frameRate)
+        chains.append(f'[{index}:v:0]' + ','.join(videoFilters(clip, resolution, frameRate, frames)) + f'[v{index}]')
+        labels.append(f'[v{index}]')
+
+        if audio:
+            if clip.sourceInfo.audio:
+                chains.append(f'[{index}:a:0]' + ','.join(audioFilters(clip, duration)) + f'[a{index}]')
+            else:
+                chains.append(f'anullsrc=r=48000:cl=stereo,atrim=duration={duration:.6f}[a{index}]')
+            labels.append(f'[a{index}]')
+
+    chains.append(''.join(labels) + f'concat=n={len(clips)}:v=1:a={int(audio)}[v]' + ('[a]' if audio else ''))
+
+    return (args, ';'.join(chains))
+
+class FilterGraphExporter(Exporter):
+    """
+    Re-encodes the clips with the codec and bitrate of the export settings in a single ffmpeg process.
+
+    The clips are compiled into one filter graph (see `filterGraph()`), the frames are decoded, filtered and encoded
+    by ffmpeg itself, they never pass through Python. The exporter only supervises the process and parses its progress.
+    Audio that can be copied is read by the concat demuxer in the same process, instead of passing through the graph.
+    """
+    name = 'graph'
+
+    def run(self, onProgress: Callable[[dict], None] = None):
+        duration = self.duration
+        audio = self.hasAudio()
+
+        def progress(report: dict):
+            if onProgress is not None:
+                onProgress({**report, 'duration': duration})
+
+        # Clips without a single frame would leave the concat filter without an input
+        clips = [clip for clip in self._clips if clip.frames(self.frameRate) > 0]
+
+        # Audio that can be copied is read by the concat demuxer, an other input of the same process
+        copyAudio = self.audioMode() == 'copy'
+
+        args, graph = filterGraph(clips, self.resolution, self.frameRate, audio and not copyAudio)
+
+        with TemporaryDirectory(prefix='export_') as tempDir:
+            if copyAudio:
+                clipList = path.join(tempDir, 'clips.ffconcat')
+                with open(clipList, 'w', encoding='utf-8') as f:
+                    f.write(concatList(clips))
+                args += ['-f', 'concat', '-safe', '0', '-i', clipList]
+
+            args += ['-filter_complex', graph, '-map', '[v]']
+            args += encoderArgs(self._settings)
+
+            if copyAudio:
+                args += ['-map', f'{len(clips)}:a:0', '-c:a', 'copy', '-shortest']
+            else:
+                args += ['-map', '[a]', *AUDIO_ENCODER] if audio else ['-an']
+
+            args += [self._output]
+
+            self._runFFmpeg(args, progress, 'render')
@@ -0,0 +1,89 @@
+from .exportClip import ExportClip
+from .exporter import ExportSettings
+
+def atempoFilters(playRate: float):
+    """
+    Returns the `atempo` filters changing the speed of the audio by `playRate`.
+    A single filter only accepts a factor between 0.5 and 2, other factors are built from a chain of them.
+
+    :param float playRate: Speed of the clip compared to its source.
+    """
+    filters = []
+
+    while playRate > 2.0:
+        filters.append('atempo=2.0')
+        playRate /= 2.0
+    while playRate < 0.5:
+        filters.append('atempo=0.5')
+        playRate /= 0.5
+
+    if playRate != 1.0:
+        filters.append(f'atempo={playRate:.6f}')
+
+    return filters
+
+def videoFilters(clip: ExportClip, resolution: tuple[int, int], frameRate: float, frames: int):
+    """
+    Returns the filters conforming the video of a clip to the exported video: play rate, size, frame rate and pixel format.
+    The input is expected to start at the first frame of the clip, the output has exactly `frames` frames.
+
+    :param ExportClip clip: Clip to conform.
+    :param tuple resolution: Width and height of the exported video.
+    :param float frameRate: Frame rate of the exported video.
+    :param int frames: Number of frames to keep.
+    """
+    width, height = resolution
+
+    return [
+        f'setpts=(PTS-STARTPTS)/{clip.playRate:.6f}',
+        f'scale={width}:{height}',
+        'setsar=1',
+        f'fps={frameRate:g}',
+        f'trim=end_frame={frames}',
+        'format=yuv420p'
+    ]
+
+def audioFilters(clip: ExportClip, duration: float):
+    """
+    Returns the filters conforming the audio of a clip to the exported audio: play rate, sample rate and length.
+    Audio shorter than the video is padded with silence, so every clip is exactly `duration` long.
+
+    :param ExportClip clip: Clip to conform.
+    :param float duration: Length of the clip in the exported video in seconds.
+    """
+    return [
+        'asetpts=PTS-STARTPTS',
+        *atempoFilters(clip.playRate),
+        'aresample=48000',
+        'aformat=sample_rates=48000:channel_layouts=stereo',
+        'apad',
+        f'atrim=duration={duration:.6f}'
+    ]
+
+def inputArgs(clip: ExportClip, start: float, duration: float, frameRate: float):
+    """
+    Returns the ffmpeg input options reading `duration` seconds of the exported video from the source of a clip.
+    Seeking on the input is frame accurate when decoding, and only decodes from the keyframe before the position.
+
+    :param ExportClip clip: Clip to read.
+    :param float start: Position in the source in seconds.
+    :param float duration: Length in the exported video in seconds.
+    :param float frameRate: Frame rate of the exported video.
+    """
+    # A frame more is read, the filters cut the clip to its exact length
+    return ['-ss', f'{start:.6f}', '-t', f'{duration * clip.playRate + 1 / frameRate:.6f}', '-i', clip.source]
+
+def encoderArgs(exportSettings: ExportSettings, threads: int = ...):
+    """
+    Returns the ffmpeg output options encoding the video with the codec, bitrate and preset of the export settings.
+
+    :param ExportSettings exportSettings: Settings of the exported video file.
+    :param int threads: Number of threads of the encoder, the threads of the settings by default.
+    """
+    threads = threads if threads != ... else max(exportSettings.threads, 1)
+    args = ['-c:v', exportSettings.codec, '-b:v', exportSettings.bitrate]
+
+    if exportSettings.preset:
+        args += ['-preset', exportSettings.preset]
+
+    return args + ['-threads', str(threads)]
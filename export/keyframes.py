@@ -0,0 +1,52 @@
+from os import name as osName, stat
+from re import finditer
+from json import loads
+from functools import lru_cache
+from subprocess import run, PIPE, DEVNULL, CalledProcessError
+from models.probeBackends import FFprobeBackend
+from .ffmpeg import FFmpegError, ffmpegBinary
+
+def keyframeTimes(source: str):
+    """
+    Returns the positions of the keyframes of the first video stream of `source` in seconds, in ascending order.
+
+    The packet flags are read with ffprobe without decoding, if it is available.
+    Otherwise ffmpeg decodes the keyframes only. The result is cached for as long as the file does not change.
+
+    :param str source: Path to a video file.
+
+    :raises FFmpegError: If the keyframes could not be read.
+    """
+    fileStat = stat(source)
+
+    return list(_keyframeTimes(source, fileStat.st_size, fileStat.st_mtime_ns))
+
+@lru_cache(maxsize=64)
+def _keyframeTimes(source: str, size: int, mtime: int):
+    ### Cached by the identity of the file, the size and the modification time are part of the key
+    popen_params = {
+        'stdout': PIPE,
+        'stderr': PIPE,
+        'stdin': DEVNULL
+    }
+    if osName == 'nt':
+        popen_params['creationflags'] = 0x08000000
+
+    ffprobe = FFprobeBackend.binary()
+
+    try:
+        if ffprobe is not None:
+            cmd = [ffprobe, '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'packet=pts_time,flags:format=start_time', '-of', 'json', source]
+            output = loads(run(cmd, check=True, **popen_params).stdout.decode('utf8'))
+
+            startTime = float(output.get('format', {}).get('start_time', 0) or 0)
+            times = [float(packet['pts_time']) - startTime for packet in output.get('packets', []) if 'K' in packet.get('flags', '') and packet.get('pts_time', 'N/A') != 'N/A']
+        else:
+            cmd = [ffmpegBinary(), '-hide_banner', '-nostdin', '-skip_frame', 'nokey', '-i', source, '-map', '0:v:0', '-vf', 'showinfo', '-f', 'null', '-']
+            output = run(cmd, check=True, **popen_params).stderr.decode('utf8', 'replace')
+
+            times = [float(match.group(1)) for match in finditer(r'pts_time:\s*([-\d.]+)', output)]
+    except (OSError, ValueError, KeyError, CalledProcessError) as e:
+        raise FFmpegError(f'Could not read the keyframes of \'{source}\': {e}')
+
+    return tuple(sorted(set(times)))
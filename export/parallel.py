@@ -0,0 +1,270 @@
+from os import path, remove
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+from dataclasses import dataclass
+from tempfile import TemporaryDirectory
+from threading import Lock
+from typing import Callable
+from .exportClip import ExportClip
+from .exporter import Exporter, ExportSettings, ExportCancelled
+from .filters import videoFilters, audioFilters, inputArgs, encoderArgs
+from .audio import AUDIO_ENCODER
+from .streamCopy import concatList, concatPath
+from .segmentCache import SegmentCache
+import settings
+
+# Hardware encoders allow only a few sessions at once, and run on the GPU whatever the core count is
+HARDWARE_ENCODERS = ('_nvenc', '_qsv', '_vaapi', '_amf', '_videotoolbox')
+HARDWARE_SESSIONS = 2
+
+@dataclass(frozen=True)
+class Segment:
+    """
+    A part of a clip encoded by a single ffmpeg process. Positions are in seconds in the source,
+    the length of the encoded segment is given in frames of the output.
+    """
+    clip: ExportClip
+    start: float
+    frames: int
+
+def splitClips(clips: list[ExportClip], frameRate: float, chunkLength: float = ...):
+    """
+    Split the clips into segments that can be encoded independently of each other.
+    Every clip is a segment of its own, clips longer than `chunkLength` are cut into chunks of that length.
+    The boundaries are placed on whole frames of the output, so the segments add up to the frames of the clips.
+
+    :param list clips: Clips to split.
+    :param float frameRate: Frame rate of the output.
+    :param float chunkLength: Longest segment in seconds of the output, the `EXPORT_CHUNK_LENGTH` setting by default.
+    """
+    chunkLength = chunkLength if chunkLength != ... else getattr(settings, 'EXPORT_CHUNK_LENGTH', 30)
+    chunkFrames = max(round(chunkLength * frameRate), 1)
+    segments = []
+
+    for clip in clips:
+        clipFrames = clip.frames(frameRate)
+
+        for first in range(0, clipFrames, chunkFrames):
+            start = clip.start + first / frameRate * clip.playRate
+            segments.append(Segment(clip, start, min(chunkFrames, clipFrames - first)))
+
+    return segments
+
+class ParallelExporter(Exporter):
+    """
+    Re-encodes the clips with the codec and bitrate of the export settings, encoding several segments at once.
+
+    The clips are split into segments (see `splitClips()`), which are encoded concurrently by a pool of ffmpeg processes
+    sized from the `threads` setting, every process getting an equal share of the threads. Hardware encoders
+    are limited to `HARDWARE_SESSIONS` processes. The segments are written as Matroska files and joined without
+    re-encoding them. The play rate of the clips is applied to both the video and the audio,
+    audio of a codec an MP4 file can hold is copied by the join if the play rate of every clip is 1.
+
+    Encoded segments are kept in the segment cache (see `SegmentCache`), exporting the timeline again
+    only encodes the segments of the clips that changed and joins them with the stored ones.
+    """
+    name = 'parallel'
+
+    ### Constructor
+    def __init__(self, clips: list[ExportClip], output: str, exportSettings: ExportSettings = ..., segmentCache: SegmentCache | None = ...):
+        super().__init__(clips, output, exportSettings)
+
+        # Segments encoded by earlier exports are reused, only the segments of changed clips are encoded
+        self._segmentCache = segmentCache if segmentCache != ... else SegmentCache.instance()
+        self._cachedSegments = 0
+
+    ### Properties
+    @property
+    def segmentCache(self):
+        return self._segmentCache
+
+    @property
+    def cachedSegments(self):
+        """
+        Number of segments of the last run taken from the segment cache.
+        """
+        return self._cachedSegments
+
+    ### Functions
+    def workers(self, segments: int):
+        """
+        Returns the number of ffmpeg processes run at once and the number of threads of each of them.
+
+        :param int segments: Number of segments to encode.
+        """
+        threads = max(self._settings.threads, 1)
+        workers = min(threads, segments)
+
+        if self._settings.codec.endswith(HARDWARE_ENCODERS):
+            workers = min(workers, HARDWARE_SESSIONS)
+
+        workers = max(workers, 1)
+
+        return (workers, max(threads // workers, 1))
+
+    def segmentKey(self, segment: Segment):
+        """
+        Returns the key of an encoded segment in the segment cache.
+        Copied audio is added by the join, so the segment only depends on whether the audio is encoded.
+
+        :param Segment segment: Segment to encode.
+        """
+        return SegmentCache.key(
+            segment.clip.source, segment.start, segment.frames, segment.clip.playRate, self._settings,
+            frameRate=self.frameRate, resolution=list(self.resolution), audio=self.audioMode() == 'encode'
+        )
+
+    def storedSegments(self, segments: list[Segment]):
+        """
+        Returns the number of `segments` stored in the segment cache, 0 if the cache is disabled.
+
+        :param list segments: Segments of the export, as returned by `splitClips()`.
+        """
+        if self._segmentCache is None:
+            return 0
+
+        return sum(self._segmentCache.contains(self.segmentKey(segment)) for segment in segments)
+
+    def segmentArgs(self, segment: Segment, output: str, threads: int = 1):
+        """
+        Returns the arguments of ffmpeg encoding a segment into `output`.
+
+        :param Segment segment: Segment to encode.
+        :param str output: Path of the encoded segment.
+        :param int threads: Number of threads of the encoder.
+        """
+        clip = segment.clip
+        frameRate = self.frameRate
+        duration = segment.frames / frameRate
+
+        args = inputArgs(clip, segment.start, duration, frameRate)
+
+        # Every segment needs an audio stream to be joined, silence is used for the sources without one
+        silence = self.hasAudio() and not clip.sourceInfo.audio
+        if silence:
+            args += ['-f', 'lavfi', '-i', 'anullsrc=r=48000:cl=stereo']
+
+        args += ['-map', '0:v:0', '-vf', ','.join(videoFilters(clip, self.resolution, frameRate, segment.frames)), '-frames:v', str(segment.frames)]
+        args += encoderArgs(self._settings, threads)
+
+        # Copied audio is added by the join, packets copied from a seeked input would start before the video
+        match self.audioMode():
+            case 'encode':
+                if silence:
+                    args += ['-map', '1:a:0']
+                else:
+                    args += ['-map', '0:a:0', '-af', ','.join(audioFilters(clip, duration))]
+                args += [*AUDIO_ENCODER, '-ac', '2', '-ar', '48000', '-t', f'{duration:.6f}']
+            case _:
+                args += ['-an']
+
+        args += ['-f', 'matroska', output]
+
+        return args
+
+    def run(self, onProgress: Callable[[dict], None] = None):
+        duration = self.duration
+        frameRate = self.frameRate
+        segments = splitClips(self._clips, frameRate)
+        workers, threads = self.workers(len(segments))
+
+        # Position written by every segment in millieseconds, updated by the threads of the pool
+        written = [0.0] * len(segments)
+        frames = [0] * len(segments)
+        lock = Lock()
+        failed = False
+
+        def report(end: bool = False):
+            if onProgress is not None:
+                with lock:
+                    outTime = sum(written)
+                    frameCount = sum(frames)
+                onProgress({'frame': frameCount, 'fps': 0.0, 'outTime': outTime, 'speed': 0.0, 'duration': duration, 'end': end})
+
+        cache = self._segmentCache
+        self._cachedSegments = 0
+
+        # Index of the clip of every segment, for the telemetry
+        clipIndex = {id(clip): index for index, clip in enumerate(self._clips)}
+
+        # The segments of the export are pinned until they are joined, so other exports do not evict them meanwhile
+        keys = [self.segmentKey(segment) for segment in segments] if cache is not None else []
+
+        with TemporaryDirectory(prefix='export_') as tempDir, cache.pinned(keys) if cache is not None else nullcontext():
+            outputs = [path.join(tempDir, f'segment{index:05d}.mkv') for index in range(len(segments))]
+
+            # Segments found in the cache are not encoded again
+            if cache is not None:
+                for index, key in enumerate(keys):
+                    cached = cache.get(key)
+                    if cached is not None:
+                        outputs[index] = cached
+                        written[index] = segments[index].frames / frameRate * 1000
+                        frames[index] = segments[index].frames
+                        self._cachedSegments += 1
+                        self._telemetry.record('cached', {'wall': 0.0, 'frames': segments[index].frames}, clipIndex[id(segments[index].clip)])
+
+            def encode(index: int):
+                if failed:
+                    raise ExportCancelled('An other segment of the export failed')
+
+                def progress(segmentReport: dict):
+                    with lock:
+                        written[index] = min(segmentReport['outTime'], segments[index].frames / frameRate * 1000)
+                        frames[index] = segmentReport['frame']
+
+                clip = clipIndex[id(segments[index].clip)]
+
+                if cache is None:
+                    self._runFFmpeg(self.segmentArgs(segments[index], outputs[index], threads), progress, 'segment', clip)
+                    return
+
+                # The segment is written next to the cache, and moved into it once it is complete
+                partFile = cache.partFile(keys[index])
+                try:
+                    self._runFFmpeg(self.segmentArgs(segments[index], partFile, threads), progress, 'segment', clip)
+                    outputs[index] = cache.put(keys[index], partFile)
+                finally:
+                    if path.exists(partFile):
+                        remove(partFile)
+
+            ### Encode the segments, the progress is reported from the thread calling `run()`
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export') as pool:
+                pending = {pool.submit(encode, index) for index in range(len(segments)) if path.dirname(outputs[index]) == tempDir}
+
+                try:
+                    while pending:
+                        done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                        report()
+                except BaseException:
+                    # The segments still encoding are stopped, the error of the first failed one is raised
+                    failed = True
+                    for future in pending:
+                        future.cancel()
+                    self._killProcesses()
+                    raise
+
+            ### Join the segments
+            segmentList = path.join(tempDir, 'segments.ffconcat')
+            with open(segmentList, 'w', encoding='utf-8') as f:
+                f.write('ffconcat version 1.0\n' + ''.join(f'file {concatPath(output)}\n' for output in outputs))
+
+            args = ['-f', 'concat', '-safe', '0', '-i', segmentList]
+
+            if self.audioMode() == 'copy':
+                clipList = path.join(tempDir, 'clips.ffconcat')
+                with open(clipList, 'w', encoding='utf-8') as f:
+                    f.write(concatList(self._clips))
+
+                args += ['-f', 'concat', '-safe', '0', '-i', clipList, '-map', '0:v:0', '-map', '1:a:0', '-shortest']
+            else:
+                args += ['-map', '0']
+
+            self._runFFmpeg([*args, '-c', 'copy', self._output], stage='join')
+
+        if cache is not None:
+            cache.evict()
+
+        report(end=True)
@@ -0,0 +1,238 @@
+from os import path, makedirs, listdir, remove, replace, stat, utime
+from hashlib import sha1
+from uuid import uuid4
+from json import dumps
+from threading import Lock
+from contextlib import contextmanager
+from .exporter import ExportSettings
+import settings
+
+class SegmentCache:
+    """
+    Cache of encoded segments on disk, so exporting a timeline again only encodes the clips that changed.
+
+    A segment is stored in a file named by the hash of its key: the identity of its source file (path, size and
+    modification time), its position and length, the play rate of its clip and every setting of the export affecting
+    the encoded file. The least recently used segments are removed when the cache grows over its size limit,
+    except the ones pinned by the exports using them. The cache can be used from multiple threads and by multiple exports at once.
+    """
+    _instance: 'SegmentCache' = None
+    _instanceLock = Lock()
+
+    ### Constructor
+    def __init__(self, directory: str = ..., maxSize: int = ...):
+        self._directory = path.abspath(directory if directory != ... else settings.SEGMENT_CACHE_DIR)
+        self._maxSize = maxSize if maxSize != ... else settings.SEGMENT_CACHE_SIZE
+        self._lock = Lock()
+        # Number of exports using each pinned segment
+        self._pinned: dict[str, int] = {}
+
+    ### Properties
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def maxSize(self):
+        """
+        Largest size of the cache in bytes.
+        """
+        return self._maxSize
+
+    ### Functions
+    @classmethod
+    def instance(cls):
+        """
+        Returns the cache shared by the application, creating it on first use. None if the cache is disabled in the settings.
+        """
+        if getattr(settings, 'SEGMENT_CACHE_SIZE', 0) <= 0:
+            return None
+
+        with cls._instanceLock:
+            if cls._instance is None:
+                cls._instance = cls()
+
+        return cls._instance
+
+    @staticmethod
+    def key(source: str, start: float, frames: int, playRate: float, exportSettings: ExportSettings, **parameters):
+        """
+        Returns the key of an encoded segment.
+
+        :param str source: Path to the source of the segment.
+        :param float start: Position of the segment in the source in seconds.
+        :param int frames: Number of frames of the segment.
+        :param float playRate: Play rate of the clip of the segment.
+        :param ExportSettings exportSettings: Settings the segment is encoded with, the threads do not change the segment.
+        :param parameters: Any other value the encoded segment depends on, e.g. the frame rate of the exported video.
+
+        :raises OSError: If the source does not exist.
+        """
+        fileStat = stat(source)
+        identity = {
+            'source': path.normcase(path.abspath(source)),
+            'size': fileStat.st_size,
+            'mtime': fileStat.st_mtime_ns,
+            'start': round(start, 6),
+            'frames': frames,
+            'playRate': round(playRate, 6),
+            'codec': exportSettings.codec,
+            'bitrate': exportSettings.bitrate,
+            'preset': exportSettings.preset,
+            'resolution': list(exportSettings.resolution) if exportSettings.resolution else None,
+            **parameters
+        }
+
+        return sha1(dumps(identity, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def file(self, key: str):
+        """
+        Returns the path a segment is stored at.
+
+        :param str key: Key of the segment.
+        """
+        return path.join(self._directory, key + '.mkv')
+
+    def contains(self, key: str):
+        """
+        Returns whether a segment is stored, without marking it as used.
+
+        :param str key: Key of the segment.
+        """
+        return path.isfile(self.file(key))
+
+    def get(self, key: str):
+        """
+        Returns the path of the stored segment, or None if it is not in the cache.
+        The segment is marked as the most recently used one.
+
+        :param str key: Key of the segment.
+        """
+        file = self.file(key)
+
+        try:
+            utime(file)
+        except OSError:
+            return None
+
+        return file
+
+    def partFile(self, key: str):
+        """
+        Returns a new path a segment is encoded into before it is stored, in the directory of the cache.
+        Exports encoding the same segment at once never write the same file.
+
+        :param str key: Key of the segment.
+        """
+        makedirs(self._directory, exist_ok=True)
+
+        return self.file(key) + f'.{uuid4().hex[:8]}.part'
+
+    def put(self, key: str, file: str):
+        """
+        Store an encoded segment, moving `file` into the cache. Returns the path of the stored segment.
+
+        :param str key: Key of the segment.
+        :param str file: Path of the encoded segment, preferably returned by `partFile()`.
+        """
+        makedirs(self._directory, exist_ok=True)
+        replace(file, self.file(key))
+
+        return self.file(key)
+
+    def pin(self, keys: list[str]):
+        """
+        Protect segments from eviction while an export uses them, until they are unpinned.
+        A segment can be pinned by several exports at once.
+
+        :param list keys: Keys of the segments.
+        """
+        with self._lock:
+            for key in keys:
+                self._pinned[key] = self._pinned.get(key, 0) + 1
+
+    def unpin(self, keys: list[str]):
+        """
+        Release segments pinned by `pin()`.
+
+        :param list keys: Keys of the segments.
+        """
+        with self._lock:
+            for key in keys:
+                count = self._pinned.get(key, 0) - 1
+                if count > 0:
+                    self._pinned[key] = count
+                else:
+                    self._pinned.pop(key, None)
+
+    @contextmanager
+    def pinned(self, keys: list[str]):
+        """
+        Pin segments for the duration of the `with` block (see `pin()`).
+
+        :param list keys: Keys of the segments.
+        """
+        self.pin(keys)
+        try:
+            yield self
+        finally:
+            self.unpin(keys)
+
+    def size(self):
+        """
+        Returns the size of the stored segments in bytes.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, maxSize: int = ...):
+        """
+        Remove the least recently used segments, until the cache is not larger than `maxSize`.
+        Pinned segments are kept, the cache may stay larger than `maxSize` while they are in use.
+
+        :param int maxSize: Largest size of the cache in bytes, the size limit of the cache by default.
+        """
+        maxSize = maxSize if maxSize != ... else self._maxSize
+
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            size = sum(size for _, size, _ in entries)
+
+            for file, fileSize, _ in entries:
+                if size <= maxSize:
+                    break
+                if path.basename(file)[:-len('.mkv')] in self._pinned:
+                    continue
+
+                try:
+                    remove(file)
+                except OSError:
+                    continue
+                size -= fileSize
+
+    def clear(self):
+        """
+        Remove every stored segment.
+        """
+        self.evict(0)
+
+    def _entries(self):
+        ### Path, size and last use of every stored segment
+        entries = []
+
+        try:
+            names = listdir(self._directory)
+        except OSError:
+            return entries
+
+        for name in names:
+            if not name.endswith('.mkv'):
+                continue
+
+            file = path.join(self._directory, name)
+            try:
+                fileStat = stat(file)
+            except OSError:
+                continue
+            entries.append((file, fileStat.st_size, fileStat.st_mtime))
+
+        return entries
@@ -0,0 +1,171 @@
+from os import path
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from tempfile import TemporaryDirectory
+from typing import Callable
+from .exportClip import ExportClip
+from .exporter import Exporter
+from .keyframes import keyframeTimes
+from .streamCopy import codecs, compatibilityProblems, concatList, joinArgs
+
+# Encoders re-encoding the partial GOPs, for the codecs of the sources
+ENCODERS = {
+    'h264': 'libx264',
+    'hevc': 'libx265',
+    'mpeg4': 'mpeg4'
+}
+
+# Quality of the re-encoded GOPs, they should not be visibly different from the copied ones
+QUALITY = {
+    'libx264': ['-crf', '16', '-preset', 'veryfast', '-pix_fmt', 'yuv420p'],
+    'libx265': ['-crf', '18', '-preset', 'veryfast', '-pix_fmt', 'yuv420p'],
+    'mpeg4': ['-q:v', '2', '-pix_fmt', 'yuv420p']
+}
+
+@dataclass(frozen=True)
+class Piece:
+    """
+    A part of a clip, either copied from its source or re-encoded. Positions are in seconds in the source.
+    """
+    source: str
+    start: float
+    frames: int
+    copy: bool
+
+def planClip(clip: ExportClip, keyframes: list[float]):
+    """
+    Split a clip into the pieces a smart render writes: the partial GOP before the first keyframe of the clip
+    and the one after the last keyframe are re-encoded, the keyframe aligned part between them is copied.
+
+    :param ExportClip clip: Clip to split.
+    :param list keyframes: Positions of the keyframes of the source in seconds, in ascending order.
+    """
+    frameRate = clip.sourceInfo.frameRate
+
+    # The clip is cut to the same frames as the re-encoding exporters cut it (see `ExportClip.firstFrame()`)
+    startFrame = clip.firstFrame()
+    endFrame = startFrame + clip.frames(frameRate)
+
+    # Keyframes within half a frame of the first or after the last frame of the clip belong to it
+    firstIndex = bisect_left(keyframes, (startFrame - 0.5) / frameRate)
+    lastIndex = bisect_right(keyframes, (endFrame + 0.5) / frameRate) - 1
+
+    firstKeyframe = max(round(keyframes[firstIndex] * frameRate), startFrame) if firstIndex < len(keyframes) else None
+    lastKeyframe = min(round(keyframes[lastIndex] * frameRate), endFrame) if lastIndex >= 0 else None
+
+    def piece(begin: int, finish: int, copy: bool):
+        return Piece(clip.source, begin / frameRate, finish - begin, copy)
+
+    # There is no whole GOP in the clip, all of it is re-encoded
+    if firstKeyframe is None or lastKeyframe is None or lastKeyframe <= firstKeyframe:
+        return [piece(startFrame, endFrame, False)] if endFrame > startFrame else []
+
+    pieces = []
+
+    if firstKeyframe > startFrame:
+        pieces.append(piece(startFrame, firstKeyframe, False))
+
+    pieces.append(piece(firstKeyframe, lastKeyframe, True))
+
+    if endFrame > lastKeyframe:
+        pieces.append(piece(lastKeyframe, endFrame, False))
+
+    return pieces
+
+def smartRenderProblems(clips: list[ExportClip], audio: bool = True):
+    """
+    Returns the reasons the clips can not be smart rendered, an empty list if they can.
+    The sources must be compatible for joining them without re-encoding, and their codec must have a known encoder.
+
+    :param list clips: Clips to export.
+    :param bool audio: Whether the audio is exported too.
+    """
+    problems = compatibilityProblems(clips, audio)
+
+    if not problems:
+        codec, _ = codecs(clips[0].sourceInfo)
+        if codec not in ENCODERS:
+            problems.append(f'There is no encoder for re-encoding {codec} at the cuts')
+
+    return problems
+
+class SmartRenderExporter(Exporter):
+    """
+    Cuts the clips frame accurately while re-encoding as little as possible.
+
+    Only the partial GOPs at the start and at the end of every clip are re-encoded (with the encoder of the codec
+    of the sources), the keyframe aligned parts are copied. The pieces are written as Matroska files, keeping the codec
+    parameters of every piece, then joined with the concat demuxer. The audio is taken from the exact in and out points
+    of the clips and copied or encoded in the same process that joins the video.
+
+    Only usable if `smartRenderProblems()` finds no problems. The resolution and codec settings are ignored.
+    """
+    name = 'smart'
+
+    def plan(self):
+        """
+        Returns the pieces of every clip, paired with the index of their clip.
+        """
+        pieces = []
+
+        for index, clip in enumerate(self._clips):
+            with self._telemetry.measure('keyframes', index):
+                keyframes = keyframeTimes(clip.source)
+
+            pieces += [(index, piece) for piece in planClip(clip, keyframes)]
+
+        return pieces
+
+    def run(self, onProgress: Callable[[dict], None] = None):
+        duration = self.duration
+        frameRate = self._clips[0].sourceInfo.frameRate
+        codec, _ = codecs(self._clips[0].sourceInfo)
+        encoder = ENCODERS[codec]
+
+        pieces = self.plan()
+
+        # Time written by the finished pieces, in millieseconds
+        done = 0.0
+        frames = 0
+
+        def progress(report: dict):
+            if onProgress is not None:
+                onProgress({**report, 'frame': frames + report['frame'], 'outTime': done + report['outTime'], 'duration': duration, 'end': False})
+
+        with TemporaryDirectory(prefix='export_') as tempDir:
+            segments = []
+
+            for index, (clip, piece) in enumerate(pieces):
+                segment = path.join(tempDir, f'piece{index:05d}.mkv')
+
+                # Seeking slightly after a keyframe makes sure the seek does not land on the keyframe before it
+                seek = piece.start + 0.001 if piece.copy else piece.start
+
+                args = ['-ss', f'{seek:.6f}', '-i', piece.source, '-map', '0:v:0', '-an', '-frames:v', str(piece.frames)]
+                args += ['-c:v', 'copy'] if piece.copy else ['-c:v', encoder, *QUALITY[encoder], '-r', f'{frameRate:g}']
+                args += ['-f', 'matroska', segment]
+
+                self._runFFmpeg(args, progress, 'copy' if piece.copy else 'encode', clip)
+
+                segments.append(segment)
+                done += piece.frames / frameRate * 1000
+                frames += piece.frames
+
+            ### Join the pieces, and add the audio of the clips
+            segmentList = path.join(tempDir, 'pieces.ffconcat')
+            with open(segmentList, 'w', encoding='utf-8') as f:
+                f.write('ffconcat version 1.0\n' + ''.join(f'file \'{path.basename(segment)}\'\n' for segment in segments))
+
+            clipList = None
+            if self.hasAudio():
+                clipList = path.join(tempDir, 'clips.ffconcat')
+                with open(clipList, 'w', encoding='utf-8') as f:
+                    f.write(concatList(self._clips))
+
+            args = joinArgs(segmentList, clipList, self.audioMode(), frames / frameRate) + [self._output]
+
+            # Joining copies every packet, it takes a fraction of the time of the pieces
+            self._runFFmpeg(args, stage='join')
+
+        if onProgress is not None:
+            onProgress({'frame': frames, 'fps': 0.0, 'outTime': duration, 'speed': 0.0, 'duration': duration, 'end': True})
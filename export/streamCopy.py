@@ -0,0 +1,223 @@
+from os import path
+from bisect import bisect_left, bisect_right
+from dataclasses import replace
+from tempfile import TemporaryDirectory
+from typing import Callable
+from models.sourceInfo import SourceInfo
+from .exportClip import ExportClip
+from .exporter import Exporter
+from .ffmpeg import streamCodecs
+from .audio import AUDIO_ENCODER
+from .keyframes import keyframeTimes
+
+def compatibilityProblems(clips: list[ExportClip], audio: bool = True):
+    """
+    Returns the reasons the clips can not be joined without re-encoding, an empty list if they can.
+    The video streams of every clip must have the same known codec, dimensions and frame rate,
+    and the audio streams the same codec, if audio is exported.
+    Codecs missing from the metadata (probed without ffprobe) are read from the headers of the files.
+
+    :param list clips: Clips to export.
+    :param bool audio: Whether the audio is exported too.
+    """
+    if not clips:
+        return ['There are no clips to export']
+
+    problems = []
+    first = clips[0].sourceInfo
+    firstCodec, firstAudioCodec = codecs(first)
+
+    for clip in clips:
+        sourceInfo = clip.sourceInfo
+        name = path.basename(sourceInfo.source)
+        codec, audioCodec = codecs(sourceInfo)
+
+        if codec is None:
+            problems.append(f'The video codec of \'{name}\' is unknown')
+        elif codec != firstCodec:
+            problems.append(f'\'{name}\' is encoded with {codec} instead of {firstCodec}')
+
+        if (sourceInfo.width, sourceInfo.height) != (first.width, first.height):
+            problems.append(f'\'{name}\' is {sourceInfo.width}x{sourceInfo.height} instead of {first.width}x{first.height}')
+
+        if abs(sourceInfo.frameRate - first.frameRate) > 0.01:
+            problems.append(f'\'{name}\' has {sourceInfo.frameRate:g} frames per second instead of {first.frameRate:g}')
+
+        if audio and (sourceInfo.audio != first.audio or audioCodec != firstAudioCodec):
+            problems.append(f'The audio of \'{name}\' differs from the audio of the first clip')
+
+        if clip.playRate != 1.0:
+            problems.append(f'A clip of \'{name}\' has a play rate of {clip.playRate:g}')
+
+    # A source is reported only once for each problem
+    return list(dict.fromkeys(problems))
+
+def codecs(sourceInfo: SourceInfo):
+    """
+    Returns the video and audio codec of a source, reading them from the file if they are not in its metadata.
+
+    :param SourceInfo sourceInfo: Metadata of the video file.
+    """
+    if sourceInfo.codec is not None:
+        return (sourceInfo.codec, sourceInfo.audioCodec)
+
+    try:
+        return streamCodecs(sourceInfo.source)
+    except OSError:
+        return (None, None)
+
+def concatPath(file: str):
+    """
+    Returns the absolute path of `file` quoted for a script of the ffmpeg concat demuxer.
+
+    :param str file: Path to a file.
+    """
+    escaped = path.abspath(file).replace('\\', '/').replace('\'', '\'\\\'\'')
+
+    return f'\'{escaped}\''
+
+def concatList(clips: list[ExportClip]):
+    """
+    Returns the script of the ffmpeg concat demuxer joining `clips`.
+
+    :param list clips: Clips to join.
+    """
+    lines = ['ffconcat version 1.0']
+
+    for clip in clips:
+        lines.append(f'file {concatPath(clip.source)}')
+
+        if clip.inPoint > 0:
+            lines.append(f'inpoint {clip.start:.6f}')
+        if clip.outPoint > 1:
+            lines.append(f'outpoint {clip.end:.6f}')
+
+    return '\n'.join(lines) + '\n'
+
+def snapToKeyframe(clip: ExportClip, keyframes: list[float]):
+    """
+    Returns the part of a clip a stream copy can write: whole GOPs, from the last keyframe at or before the first frame
+    of the clip to the first keyframe after its last frame, or to the end of its source. A copied GOP can not be cut
+    short, the frames of a GOP are not stored in the order they are shown. Both points are placed on whole frames,
+    so the returned clip has exactly `frames()` frames at the frame rate of its source.
+
+    :param ExportClip clip: Clip to snap.
+    :param list keyframes: Positions of the keyframes of the source in seconds, in ascending order.
+    """
+    frameRate = clip.sourceInfo.frameRate
+    startFrame = clip.firstFrame()
+    endFrame = startFrame + clip.frames(frameRate)
+
+    if endFrame <= startFrame:
+        return clip
+
+    # Keyframes within half a frame of the first or after the last frame of the clip are taken as on those frames
+    firstIndex = bisect_right(keyframes, (startFrame + 0.5) / frameRate) - 1
+    lastIndex = bisect_left(keyframes, (endFrame - 0.5) / frameRate)
+
+    first = min(round(keyframes[firstIndex] * frameRate), startFrame) if firstIndex >= 0 else 0
+    if lastIndex < len(keyframes):
+        last = max(round(keyframes[lastIndex] * frameRate), endFrame)
+    else:
+        last = max(clip.sourceInfo.frames or round(clip.sourceInfo.duration / 1000 * frameRate), endFrame)
+
+    return replace(clip, inPoint=first / frameRate * 1000, outPoint=last / frameRate * 1000)
+
+def joinArgs(segmentList: str, clipList: str | None, audioMode: str, duration: float):
+    """
+    Returns the ffmpeg options joining the video pieces listed in `segmentList` without re-encoding them,
+    with the audio of the clips listed in `clipList` copied or encoded as `audioMode` tells (see `export.audio.audioMode()`).
+    The output is cut to `duration`, the audio cut at the packets of the clips may end slightly before the video,
+    which must not cut off its last frame.
+
+    :param str segmentList: Script of the concat demuxer listing the video pieces.
+    :param str clipList: Script of the concat demuxer listing the clips, the audio is read from it. None without audio.
+    :param str audioMode: How the audio is exported: `none`, `copy` or `encode`.
+    :param float duration: Length of the joined video pieces in seconds.
+    """
+    args = ['-f', 'concat', '-safe', '0', '-i', segmentList]
+
+    if clipList is not None and audioMode != 'none':
+        args += ['-f', 'concat', '-safe', '0', '-i', clipList, '-map', '0:v:0', '-map', '1:a:0?']
+        args += ['-c:a', 'copy'] if audioMode == 'copy' else AUDIO_ENCODER
+    else:
+        args += ['-map', '0:v:0', '-an']
+
+    return args + ['-c:v', 'copy', '-t', f'{duration:.6f}']
+
+class StreamCopyExporter(Exporter):
+    """
+    Joins the clips with the ffmpeg concat demuxer, copying the packets of the sources without decoding them.
+
+    Only usable if `compatibilityProblems()` finds no problems. The export settings besides audio are ignored.
+    Copied streams can only be cut at keyframes, so a clip is extended to the whole GOPs it covers (see `snapToKeyframe()`).
+    Every clip is cut into a Matroska file of its own with exactly the frames of its GOPs, then the pieces are joined
+    with the concat demuxer, so the timestamps of the joined video increase at the frame rate of the sources.
+    The audio is read from the same parts of the clips.
+    """
+    name = 'copy'
+
+    def plan(self):
+        """
+        Returns the clips snapped to the keyframes of their sources.
+        """
+        clips = []
+
+        for index, clip in enumerate(self._clips):
+            with self._telemetry.measure('keyframes', index):
+                keyframes = keyframeTimes(clip.source)
+
+            clips.append(snapToKeyframe(clip, keyframes))
+
+        return clips
+
+    def run(self, onProgress: Callable[[dict], None] = None):
+        duration = self.duration
+        frameRate = self._clips[0].sourceInfo.frameRate
+
+        clips = self.plan()
+
+        # Time written by the finished pieces, in millieseconds
+        done = 0.0
+        frames = 0
+
+        def progress(report: dict):
+            if onProgress is not None:
+                onProgress({**report, 'frame': frames + report['frame'], 'outTime': done + report['outTime'], 'duration': duration, 'end': False})
+
+        with TemporaryDirectory(prefix='export_') as tempDir:
+            segments = []
+
+            for index, clip in enumerate(clips):
+                clipFrames = clip.frames(frameRate)
+                if clipFrames <= 0:
+                    continue
+
+                segment = path.join(tempDir, f'clip{index:05d}.mkv')
+
+                # Seeking slightly after the keyframe makes sure the seek does not land on the keyframe before it
+                args = ['-ss', f'{clip.start + 0.001:.6f}', '-i', clip.source, '-map', '0:v:0', '-an', '-frames:v', str(clipFrames)]
+                args += ['-c:v', 'copy', '-f', 'matroska', segment]
+
+                self._runFFmpeg(args, progress, 'copy', index)
+
+                segments.append(segment)
+                done += clipFrames / frameRate * 1000
+                frames += clipFrames
+
+            ### Join the pieces, and add the audio of the same parts of the clips
+            segmentList = path.join(tempDir, 'pieces.ffconcat')
+            with open(segmentList, 'w', encoding='utf-8') as f:
+                f.write('ffconcat version 1.0\n' + ''.join(f'file \'{path.basename(segment)}\'\n' for segment in segments))
+
+            clipList = None
+            if self.hasAudio():
+                clipList = path.join(tempDir, 'clips.ffconcat')
+                with open(clipList, 'w', encoding='utf-8') as f:
+                    f.write(concatList(clips))
+
+            # Audio an MP4 file can not hold (e.g. G.711 of the NVR recordings) is transcoded in the same process
+            self._runFFmpeg(joinArgs(segmentList, clipList, self.audioMode(), frames / frameRate) + [self._output], stage='join')
+
+        if onProgress is not None:
+            onProgress({'frame': frames, 'fps': 0.0, 'outTime': duration, 'speed': 0.0, 'duration': duration, 'end': True})
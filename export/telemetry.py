@@ -0,0 +1,239 @@
+from os import path, replace, cpu_count
+from json import dump
+from platform import node, platform
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime
+from logging import Logger, getLogger
+from threading import Lock
+from time import perf_counter, process_time
+from .exportClip import ExportClip
+from .ffmpeg import ffmpegBinary
+
+def telemetryFile(output: str):
+    """
+    Returns the path of the telemetry report of an export, next to its output.
+
+    :param str output: Path of the exported video file.
+    """
+    return path.splitext(output)[0] + '.telemetry.json'
+
+class ExportTelemetry:
+    """
+    Timing and throughput of a single export, reported as a JSON document.
+
+    Every ffmpeg process and every other measured step of the export is recorded under the stage it belongs to
+    (e.g. `segment`, `join`, `keyframes`) and, if it worked on a single clip, under that clip. Decoding, scaling and
+    encoding run in the same ffmpeg process, so a stage covers all of them: its CPU time compared to its wall time
+    shows whether the process was limited by the CPU (many cores busy) or by reading and writing (few cores busy).
+
+    The frames of the report are the ones ffmpeg wrote into the output, `nominalFrames` the ones of the timeline.
+    Stages can be recorded from multiple threads at once.
+    """
+    ### Constructor
+    def __init__(self, name: str, clips: list[ExportClip], output: str, exportSettings: 'ExportSettings', frameRate: float = 25.0):
+        self._name = name
+        self._clips = list(clips)
+        self._output = output
+        self._settings = exportSettings
+        self._frameRate = frameRate
+
+        self._records: list[dict] = []
+        self._lock = Lock()
+        self._started: datetime | None = None
+        self._startTime = 0.0
+        self._wall = 0.0
+        # Frames ffmpeg reported writing into the output, None until the process writing it finished
+        self._written: int | None = None
+        self._status = 'running'
+        self._error: str | None = None
+
+    ### Properties
+    @property
+    def records(self):
+        """
+        Recorded stages, in the order they finished.
+        """
+        with self._lock:
+            return list(self._records)
+
+    @property
+    def status(self):
+        """
+        Outcome of the export: `running`, `succeeded`, `cancelled` or `failed`.
+        """
+        return self._status
+
+    ### Functions
+    def start(self):
+        """
+        Mark the start of the export, the records of an earlier run are dropped.
+        """
+        with self._lock:
+            self._records = []
+            self._written = None
+
+        self._started = datetime.now().astimezone()
+        self._startTime = perf_counter()
+        self._status = 'running'
+        self._error = None
+
+    def finish(self, status: str, error: str | None = None):
+        """
+        Mark the end of the export.
+
+        :param str status: Outcome of the export: `succeeded`, `cancelled` or `failed`.
+        :param str error: Message of the error the export failed with.
+        """
+        self._wall = perf_counter() - self._startTime
+        self._status = status
+        self._error = error
+
+    def record(self, stage: str, statistics: dict, clip: int | None = None, output: bool = False):
+        """
+        Record a finished step of the export.
+
+        :param str stage: Name of the stage the step belongs to.
+        :param dict statistics: Statistics of the step, as returned by `runFFmpeg()`.
+        :param int clip: Index of the clip the step worked on, None if it worked on several clips.
+        :param bool output: Whether the step wrote the output of the export, its frames are the frames of the exported video.
+        """
+        with self._lock:
+            self._records.append({'stage': stage, 'clip': clip, **statistics})
+            if output:
+                self._written = statistics.get('frames')
+
+    @contextmanager
+    def measure(self, stage: str, clip: int | None = None):
+        """
+        Record the step run in the `with` block, measuring its wall time and the CPU time of this process.
+        Steps running ffmpeg are recorded from the statistics of the process instead.
+
+        :param str stage: Name of the stage the step belongs to.
+        :param int clip: Index of the clip the step worked on.
+        """
+        wall = perf_counter()
+        cpu = process_time()
+
+        try:
+            yield
+        finally:
+            self.record(stage, {'wall': perf_counter() - wall, 'cpu': process_time() - cpu}, clip)
+
+    def report(self):
+        """
+        Returns the telemetry of the export as a dictionary that can be written as JSON.
+        """
+        records = self.records
+        cpus = cpu_count() or 1
+        wall = self._wall if self._status != 'running' else perf_counter() - self._startTime
+        duration = sum(clip.length / clip.playRate for clip in self._clips)
+        # The frames of the timeline, the exported video may have more (e.g. whole GOPs copied) or fewer of them
+        nominalFrames = round(duration * self._frameRate)
+        frames = self._written if self._written is not None else nominalFrames
+
+        clips = []
+        for index, clip in enumerate(self._clips):
+            clipRecords = [record for record in records if record['clip'] == index]
+            clips.append({
+                'index': index,
+                'source': clip.source,
+                'start': clip.start,
+                'end': clip.end,
+                'playRate': clip.playRate,
+                'stages': self._stages(clipRecords)
+            })
+
+        totals = self._totals(records)
+        # The bytes written by the export are the ones of the output file, not of the intermediate files
+        try:
+            bytesWritten = path.getsize(self._output) if self._status == 'succeeded' else 0
+        except OSError:
+            bytesWritten = 0
+
+        return {
+            'exporter': self._name,
+            'output': path.abspath(self._output),
+            'status': self._status,
+            'error': self._error,
+            'started': self._started.isoformat(timespec='seconds') if self._started else None,
+            'machine': {
+                'node': node(),
+                'platform': platform(),
+                'cpus': cpus,
+                'ffmpeg': ffmpegBinary()
+            },
+            'settings': asdict(self._settings),
+            'clips': len(self._clips),
+            'duration': duration,
+            'frames': frames,
+            'nominalFrames': nominalFrames,
+            'wall': wall,
+            'cpu': totals['cpu'],
+            'cpuUtilisation': totals['cpu'] / (wall * cpus) if wall > 0 else 0.0,
+            'fps': frames / wall if wall > 0 else 0.0,
+            'speed': duration / wall if wall > 0 else 0.0,
+            'bytesRead': totals['bytesRead'],
+            'bytesWritten': bytesWritten,
+            'stages': self._stages(records),
+            'perClip': clips
+        }
+
+    def write(self, file: str = ...):
+        """
+        Write the report into a JSON file, next to the output by default (see `telemetryFile()`).
+        Returns the path of the file, None if it could not be written.
+
+        :param str file: Path of the report.
+        """
+        file = file if file != ... else telemetryFile(self._output)
+
+        tempFile = file + '.tmp'
+        try:
+            with open(tempFile, 'w', encoding='utf-8') as f:
+                dump(self.report(), f, indent=2)
+            replace(tempFile, file)
+        except OSError:
+            return None
+
+        return file
+
+    def log(self, logger: Logger = ...):
+        """
+        Write a summary of the report into a logger: the totals at info level, every stage at debug level.
+
+        :param Logger logger: Logger to write into, the `export` logger by default.
+        """
+        logger = logger if logger != ... else getLogger('export')
+        report = self.report()
+
+        logger.info(
+            f'Export {report["status"]} by \'{report["exporter"]}\' in {report["wall"]:.1f} s: {report["speed"]:.2f}x real time, '
+            f'{report["fps"]:.1f} fps, CPU {report["cpuUtilisation"] * 100:.0f}% of {report["machine"]["cpus"]} cores, '
+            f'{report["bytesRead"] / 2**20:.1f} MiB read, {report["bytesWritten"] / 2**20:.1f} MiB written'
+        )
+
+        for stage, values in report['stages'].items():
+            logger.debug(
+                f'Stage \'{stage}\': {values["steps"]} steps, {values["wall"]:.2f} s, {values["fps"]:.1f} fps, '
+                f'{values["cores"]:.2f} cores busy, {values["bytesRead"] / 2**20:.1f} MiB read, {values["bytesWritten"] / 2**20:.1f} MiB written'
+            )
+
+    def _totals(self, records: list[dict]):
+        ### Sums of the statistics of the records
+        return {key: sum(record.get(key, 0) for record in records) for key in ('wall', 'cpu', 'frames', 'bytesRead', 'bytesWritten')}
+
+    def _stages(self, records: list[dict]):
+        ### Statistics of every stage, the wall time is summed over the steps, which can overlap
+        stages = {}
+
+        for stage in dict.fromkeys(record['stage'] for record in records):
+            totals = self._totals([record for record in records if record['stage'] == stage])
+            stages[stage] = {
+                'steps': sum(1 for record in records if record['stage'] == stage),
+                **totals,
+                'fps': totals['frames'] / totals['wall'] if totals['wall'] > 0 else 0.0,
+                'cores': totals['cpu'] / totals['wall'] if totals['wall'] > 0 else 0.0
+            }
+
+        return stages
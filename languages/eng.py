@@ -1,2 +1,12 @@
 TITLE="Title"
-VIDEOBAR="Files"
\ No newline at end of file
+VIDEOBAR="Files"
+
+### TRACK ACTIONS ###
+TRACK='&Track'
+ADD_TRACK='New track'
+ADD_TRACK_HINT='Add a new track to the timeline, e.g. for the recordings of an other camera.'
+REMOVE_TRACK='Remove track'
+REMOVE_TRACK_HINT='Remove the selected track together with its clips.'
+
+### Errors ###
+REMUX_FAILED_ERROR='The video file could not be converted.'
\ No newline at end of file
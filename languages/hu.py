@@ -16,6 +16,13 @@ EXPORT_HINT='Projekt exportálása és befejezése'
 EXIT='&Kilépés'
 EXIT_HINT='Program leállítása.'
 
+### TRACK ACTIONS ###
+TRACK='&Sáv'
+ADD_TRACK='Új sáv'
+ADD_TRACK_HINT='Új sáv hozzáadása az idővonalhoz, pl. egy másik kamera felvételeinek.'
+REMOVE_TRACK='Sáv törlése'
+REMOVE_TRACK_HINT='A kiválasztott sáv törlése a klipjeivel együtt.'
+
 ### FILE MANAGER ###
 FILE_MANAGER_TITLE='Importált fájlok'
 OPEN_FOLDER_BUTTON='Mappa megnyitása'
@@ -34,4 +41,5 @@ FORWARD='ELőrelépés'
 ### Errors ###
 ERROR_TITLE='Hiba!'
 NO_VIDEO_FILES_IN_FOLDER_ERROR='A kiválasztott mappa nem tartalmaz videó fájlokat(.mp4, .webm).'
-SAVE_DIR_HAS_NO_NECESSARY_FILES='A kiválasztott mappa nem tartalmazza a szükséges fájlokat.'
\ No newline at end of file
+SAVE_DIR_HAS_NO_NECESSARY_FILES='A kiválasztott mappa nem tartalmazza a szükséges fájlokat.'
+REMUX_FAILED_ERROR='A videó fájl átalakítása nem sikerült.'
\ No newline at end of file
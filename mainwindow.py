@@ -12,6 +12,7 @@ from PySide6.QtWidgets import (
     QStyle,
     QTreeWidget,
     QTreeWidgetItem,
+    QTreeWidgetItemIterator,
     QSizePolicy,
     QMenu,
     QDialog,
@@ -45,18 +46,30 @@ from models import (
     TimelineModel,
     VideoFileWidgetItem,
     ClipInfo,
-    SignalLogger
+    SourceInfo,
+    ProbeCache,
+    ExportJob,
+    CalibrationWorker,
+    EncoderWorker,
+    RemuxQueue,
+    ProjectManifest,
+    linkOrCopy,
+    writeJson
+)
+from export import (
+    ExportClip,
+    ExportSettings,
+    Exporter,
+    createExporter,
+    telemetryFile,
+    EXPORT_ENCODERS,
+    PRESETS
 )
 import settings
 from languages import importLanguage
 
-from moviepy.editor import VideoFileClip, concatenate_videoclips
-from moviepy.config import get_setting
-
-from os import listdir
-from subprocess import Popen, DEVNULL
+from os import listdir, path
 from multiprocessing import cpu_count
-from psutil import process_iter
 from math import floor
 from re import split, sub
 from json import load, dump
@@ -69,6 +82,20 @@ class MainWindow(QMainWindow):
         ### Create temporary directory for the project
         self.tempDir = QTemporaryDir()
 
+        # Names of the imported sources, as shown by the source selectors and stored in the saved projects
+        self.sourceNames: dict[str, str] = {}
+        # Recordings converted on demand, by the path of the converted file in the workspace
+        self.davSources: dict[str, str] = {}
+
+        # Running exports, they are cancelled when the window is closed
+        self.exportJobs: set[ExportJob] = set()
+
+        # The .dav recordings are converted in the background, their sources are added once they are converted
+        self.remuxQueue = RemuxQueue(self)
+        self.remuxQueue.progressed.connect(self.sourceRemuxProgressed)
+        self.remuxQueue.remuxed.connect(self.sourceRemuxed)
+        self.remuxQueue.failed.connect(self.sourceRemuxFailed)
+
         ### Read in adjecency file
         try:
             with open(settings.ADJACENT_FILE, 'r', encoding='utf-8') as f:
@@ -140,6 +167,25 @@ class MainWindow(QMainWindow):
         fileMenu.addSeparator()
         fileMenu.addAction(exit)
 
+        ### Build 'Track' menu
+        timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
+
+        ## Create 'Add track' action
+        addTrack = QAction(language.ADD_TRACK, self)
+        addTrack.setToolTip(language.ADD_TRACK_HINT)
+        addTrack.triggered.connect(timeline.addTrack)
+
+        ## Create 'Remove track' action
+        removeTrack = QAction(language.REMOVE_TRACK, self)
+        removeTrack.setToolTip(language.REMOVE_TRACK_HINT)
+        removeTrack.triggered.connect(lambda: timeline.removeTrack(timeline.currentTrack))
+
+        ## Create 'Track' menu and add actions
+        trackMenu = menu.addMenu(language.TRACK)
+        trackMenu.setObjectName('trackMenu')
+        trackMenu.setToolTipsVisible(True)
+        trackMenu.addActions((addTrack, removeTrack))
+
         ### Create 'settings' menu
         settingsMenu = menu.addMenu(language.SETTINGS)
         settingsMenu.setObjectName('settingsMenu')
@@ -457,6 +503,9 @@ class MainWindow(QMainWindow):
         timeline.setObjectName('timeline')
         timeline.currentClipChanged.connect(self.currentClipChanged)
         timeline.selectedClipChanged.connect(self.selectedClipChanged)
+        timeline.sourceProbed.connect(self.sourceProbed)
+        timeline.sourceFailed.connect(self.sourceFailed)
+        timeline.sourceRequested.connect(self.sourceRequested)
         central = CentralWidget(QQmlEngine(), self)
         central.setObjectName('centralWidget')
         central.setMinimumSize(600, 400)
@@ -488,6 +537,13 @@ class MainWindow(QMainWindow):
         audioCheck = QCheckBox('Audio')
         audioCheck.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
         audioCheck.setChecked(True)
+
+        # Most channels of the NVR record no audio, there is no audio to export if none of the clips has any
+        records = self.findChild(TimelineModel, 'timeline').records()
+        if records and not any(sourceInfo.audio for sourceInfo, *_ in records):
+            audioCheck.setChecked(False)
+            audioCheck.setEnabled(False)
+            audioCheck.setToolTip('A klipek videóinak nincs hangsávja.')
         resolutionLabel = QLabel('Felbontás')
         resolutionComboBox = QComboBox()
         resolutionComboBox.addItem('1920x1080')
@@ -504,18 +560,45 @@ class MainWindow(QMainWindow):
         firstRowLayout.addWidget(resolutionLabel)
         firstRowLayout.addWidget(resolutionComboBox, 4)
 
+        # Sources with the same codec, resolution and frame rate can be joined without re-encoding all of them,
+        # the other sources are always re-encoded
+        modeComboBox = QComboBox()
+        modeComboBox.addItem('Pontos vágás, részleges újrakódolás', 'smart')
+        modeComboBox.addItem('Vágás kulcskockánál, újrakódolás nélkül', 'copy')
+        modeComboBox.addItem('Teljes újrakódolás', 'encode')
+        modeComboBox.setToolTip('Azonos kódolású, felbontású és képkockasebességű videóknál a felbontás és a codec beállítás nem érvényes,\nkülönben a videó teljes újrakódolással készül.')
+
         codecLabel = QLabel('Codec')
+        presetLabel = QLabel('Preset')
         bitrateLabel = QLabel('Bitrate')
 
         secondRowLayout = QHBoxLayout()
         secondRowLayout.addWidget(codecLabel)
+        secondRowLayout.addWidget(presetLabel)
         secondRowLayout.addWidget(bitrateLabel)
 
+        def codecCurrentTextChanged(codec: str):
+            presetComboBox.clear()
+            presetComboBox.addItem('')
+            presetComboBox.addItems(PRESETS.get(codec, []))
+
+        def encodersFound(encoders: list):
+            codec = codecComboBox.currentText()
+            codecComboBox.clear()
+            codecComboBox.addItems(encoders or EXPORT_ENCODERS)
+            codecComboBox.setCurrentText(codec)
+
+        presetComboBox = QComboBox()
         codecComboBox = QComboBox()
-        codecComboBox.addItem('h264_nvenc')
-        codecComboBox.addItem('hevc_nvenc')
-        codecComboBox.addItem('mpeg4')
-        codecComboBox.addItem('libx264') 
+        codecComboBox.currentTextChanged.connect(codecCurrentTextChanged)
+        codecComboBox.addItem(EXPORT_ENCODERS[0])
+
+        # Only the encoders the local ffmpeg can use are offered, e.g. no hardware encoders on machines without a GPU.
+        # Finding them may take test encodes, they are added once they are found
+        encoderWorker = EncoderWorker(self)
+        encoderWorker.found.connect(encodersFound)
+        encoderWorker.finished.connect(encoderWorker.deleteLater)
+        encoderWorker.start()
         bitrateSpinBox = QSpinBox()
         bitrateSpinBox.setButtonSymbols(QSpinBox.ButtonSymbols.PlusMinus)
         bitrateSpinBox.setCorrectionMode(QSpinBox.CorrectionMode.CorrectToNearestValue)
@@ -537,8 +620,62 @@ class MainWindow(QMainWindow):
 
         thirdRowLayout = QHBoxLayout()
         thirdRowLayout.addWidget(codecComboBox, 1)
+        thirdRowLayout.addWidget(presetComboBox, 1)
         thirdRowLayout.addWidget(bitrateSpinBox, 1)
 
+        # Largest size of the exported video the calibration chooses the bitrate for, 0 for no limit
+        sizeLabel = QLabel('Méret')
+        sizeSpinBox = QSpinBox()
+        sizeSpinBox.setButtonSymbols(QSpinBox.ButtonSymbols.PlusMinus)
+        sizeSpinBox.setSuffix(' MB')
+        sizeSpinBox.setSpecialValueText('Nincs korlát')
+        sizeSpinBox.setMinimum(0)
+        sizeSpinBox.setMaximum(100000)
+        sizeSpinBox.setValue(0)
+        sizeSpinBox.setToolTip('A kalibrálás ehhez a fájlmérethez választja a bitrátát.')
+
+        calibrateRowLayout = QHBoxLayout()
+        calibrateRowLayout.addWidget(sizeLabel)
+        calibrateRowLayout.addWidget(sizeSpinBox, 1)
+
+        def calibrateButtonClicked():
+            timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
+            exportClips = [ExportClip.fromRecord(record) for record in timeline.records()]
+
+            if not exportClips:
+                self.findChild(QLabel, 'errorLabel').setText('A projekt nem tartalmaz videókat!')
+                self.findChild(QDialog, 'errorDialog').exec()
+                return
+
+            resolution = tuple(int(res) for res in resolutionComboBox.currentText().split('x'))
+            exportSettings = ExportSettings(codecComboBox.currentText(), bitrateSpinBox.text(), resolution, audioCheck.isChecked(), coreSlider.value())
+
+            # The calibration encodes a sample of the footage with every encoder, it runs on a thread of its own
+            worker = CalibrationWorker(exportClips, exportSettings, targetSize=sizeSpinBox.value() * 2**20, parent=exportDialog)
+            worker.calibrated.connect(calibrated)
+            worker.failed.connect(calibrationFailed)
+            worker.finished.connect(worker.deleteLater)
+            worker.finished.connect(lambda: calibrateButton.setEnabled(True))
+
+            calibrateButton.setEnabled(False)
+            calibrateButton.setText('Kalibrálás...')
+            worker.start()
+
+        def calibrated(result: dict):
+            codecComboBox.setCurrentText(result['codec'])
+            presetComboBox.setCurrentText(result['preset'] or '')
+            bitrateSpinBox.setValue(int(result['bitrate'].rstrip('k')))
+            calibrateButton.setText(f'Kalibrálás ({result["speed"]:.1f}x valós idő)')
+
+        def calibrationFailed(message: str):
+            calibrateButton.setText('Kalibrálás')
+            self.findChild(QLabel, 'errorLabel').setText(f'Hiba történt a kalibrálás közben!\nA rendszer üzenete: {message}')
+            self.findChild(QDialog, 'errorDialog').exec()
+
+        calibrateButton = QPushButton('Kalibrálás')
+        calibrateButton.setToolTip(f'A codec és a preset kiválasztása a projekt videóinak egy részletén mért sebesség alapján.\nA leggyorsabb, legalább {settings.EXPORT_TARGET_SPEED:g}x valós idejű beállítás kerül kiválasztásra,\nmegadott méret esetén a bitráta is, hogy a videó beleférjen.')
+        calibrateButton.clicked.connect(calibrateButtonClicked)
+
         def exportBrowseClicked():
             exportFileName, _ = QFileDialog.getSaveFileName(self, 'Fájl kiválasztása', QDir.currentPath(), 'Videos (*.mp4)')
             if exportFileName:
@@ -555,75 +692,32 @@ class MainWindow(QMainWindow):
 
         def exportButtonClicked():
             timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
-            clips = timeline.data(timeline.createIndex(0, 0, 128))
+            # The current track is exported
+            exportClips = [ExportClip.fromRecord(record) for record in timeline.records()]
+
+            # Clips waiting for the conversion or the metadata of their source can not be exported yet
+            waiting = {clip.source for clip in exportClips if timeline.isDeferred(clip.source) or timeline.isProbing(clip.source)}
+            for source in waiting:
+                self.requestSource(source, RemuxQueue.TIMELINE)
 
-            if len(clips):
+            if waiting:
+                self.findChild(QLabel, 'errorLabel').setText('A projekt videóinak átalakítása még folyamatban van, próbálja újra később!')
+                self.findChild(QDialog, 'errorDialog').exec()
+            elif len(exportClips):
                 exportFile: str = exportFileLabel.property('exportFile')
 
                 if exportFile:
                     audio = audioCheck.isChecked()
-                    resolution = resolutionComboBox.currentText().split('x')
-                    resolution = tuple(reversed([int(res) for res in resolution]))
+                    resolution = tuple(int(res) for res in resolutionComboBox.currentText().split('x'))
                     codec = codecComboBox.currentText()
+                    preset = presetComboBox.currentText() or None
                     bitrate = bitrateSpinBox.text()
                     cores = coreSlider.value()
-                    
-                    videoclips: list[VideoFileClip] = []
-                    for clip in clips:
-                        clip: ClipInfo
-                        start = clip.inPoint / 1000 if clip.inPoint > 0 else 0
-                        end = clip.outPoint / 1000 if clip.outPoint > 1 else clip.duration / 1000
-                        videoclips.append(VideoFileClip(clip.source, target_resolution=resolution).subclip(start, end))
-
-                                 
-                    def loggerCalled(param: dict):
-                        if progressDialog.wasCanceled():
-                            for proc in process_iter(): 
-                                if proc.name().startswith('ffmpeg'): proc.kill()
-                        else:
-                            key, value = param.popitem()
-                            match key:
-                                case 'chunk__total':
-                                    progressDialog.setMaximum(value)
-                                case 'chunk__index':
-                                    progressDialog.setValue(value)
-                                case 't__total':
-                                    progressDialog.setMaximum(value)
-                                case 't__index':
-                                    progressDialog.setValue(value)
-                                case _:
-                                    progressDialog.setLabelText(value)                        
-
-                    progressDialog = QProgressDialog(f'{exportFile} mentése...', 'Mégse', 0, 100, exportDialog)
-                    progressDialog.setWindowModality(Qt.WindowModality.WindowModal)
-                    progressDialog.setAutoReset(False)
-
-                    logger = SignalLogger()
-                    logger.loggerCalled.connect(loggerCalled)
-
-                    temp_audiofile = ''.join(exportFile.split('.')[:-1]) + '_temp_audio.mp3'
-                    final = concatenate_videoclips(videoclips)
-                    try:
-                        final.write_videofile(exportFile, codec=codec, bitrate=bitrate, audio=audio, temp_audiofile=temp_audiofile, threads=cores, logger=logger)
-
-                        progressDialog.reset()
-
-                    except IndexError:
-                        final.subclip(t_end=(final.duration - 1.0/final.fps))
-
-                        final.write_videofile(exportFile, codec=codec, bitrate=bitrate, audio=audio, temp_audiofile=temp_audiofile, threads=cores, logger=logger)
-
-                        progressDialog.reset()
-                    except OSError as e:
-                        if (progressDialog.wasCanceled()):
-                            QFile.remove(temp_audiofile)
-                            QFile.remove(exportFile)
-                        else:
-                            self.findChild(QLabel, 'errorLabel').setText(f'Hiba történt a videó exportálása közben!\nA rendszer üzenete: {e}')
-                            self.findChild(QDialog, 'errorDialog').exec()
-
-                    finally:
-                        for videoClip in videoclips: videoClip.close()
+
+                    exportSettings = ExportSettings(codec, bitrate, resolution, audio, cores, preset)
+
+                    # Fast paths copy as much of the sources as possible, if they are compatible
+                    runExporter(createExporter(modeComboBox.currentData(), exportClips, exportFile, exportSettings))
                 else:
                     self.findChild(QLabel, 'errorLabel').setText('Válasszon ki egy fájlt mentésre')
                     self.findChild(QDialog, 'errorDialog').exec()
@@ -631,13 +725,64 @@ class MainWindow(QMainWindow):
                 self.findChild(QLabel, 'errorLabel').setText('A projekt nem tartalmaz videókat!')
                 self.findChild(QDialog, 'errorDialog').exec()
 
+        def runExporter(exporter: Exporter):
+            # The export runs on a thread of its own, the editor can be used while it is written
+            job = ExportJob(exporter, self)
+            self.exportJobs.add(job)
+
+            progressDialog = QProgressDialog(f'{job.output} mentése...', 'Mégse', 0, 1000, self)
+            progressDialog.setWindowModality(Qt.WindowModality.NonModal)
+            progressDialog.setAutoReset(False)
+            progressDialog.setAutoClose(False)
+            progressDialog.setMinimumDuration(0)
+            progressDialog.canceled.connect(job.cancel)
+
+            def jobProgressed(frames: int, fps: float, progress: float, eta: float):
+                progressDialog.setValue(int(progress * 1000))
+                if eta >= 0:
+                    progressDialog.setLabelText(f'{job.output} mentése...\n{frames} képkocka, {fps:.1f} kép/s, hátralévő idő: {self.millieSectoTimeString(int(eta * 1000))[:-4]}')
+
+            def jobCancelled(output: str):
+                QFile.remove(output)
+
+            def jobFailed(output: str, message: str):
+                self.findChild(QLabel, 'errorLabel').setText(f'Hiba történt a videó exportálása közben!\nA rendszer üzenete: {message}')
+                self.findChild(QDialog, 'errorDialog').exec()
+
+            def jobReported(report: dict):
+                # The summary of a written video is shown in the status bar, the whole report is next to the video
+                if report['status'] == 'succeeded':
+                    self.statusBar().showMessage(
+                        f'{path.basename(job.output)} elkészült {report["wall"]:.1f} s alatt: {report["speed"]:.2f}x valós idő, '
+                        f'{report["fps"]:.1f} kép/s, CPU {report["cpuUtilisation"] * 100:.0f}%. Részletek: {path.basename(telemetryFile(job.output))}',
+                        30000
+                    )
+
+            def jobFinished():
+                progressDialog.reset()
+                progressDialog.deleteLater()
+                self.exportJobs.discard(job)
+                job.deleteLater()
+
+            job.progressed.connect(jobProgressed)
+            job.reported.connect(jobReported)
+            job.cancelled.connect(jobCancelled)
+            job.failed.connect(jobFailed)
+            job.finished.connect(jobFinished)
+
+            exportDialog.accept()
+            job.start()
+
         exportButton = QPushButton('Exportálás')
         exportButton.clicked.connect(exportButtonClicked)
 
         exportBoxLayout = QVBoxLayout()
         exportBoxLayout.addLayout(firstRowLayout)
+        exportBoxLayout.addWidget(modeComboBox)
         exportBoxLayout.addLayout(secondRowLayout)
         exportBoxLayout.addLayout(thirdRowLayout)
+        exportBoxLayout.addLayout(calibrateRowLayout)
+        exportBoxLayout.addWidget(calibrateButton)
         exportBoxLayout.addWidget(coreLabel)
         exportBoxLayout.setAlignment(coreLabel, Qt.AlignmentFlag.AlignLeft)
         exportBoxLayout.addWidget(coreSlider)
@@ -653,8 +798,8 @@ class MainWindow(QMainWindow):
 
         exportDialog = QDialog(self, Qt.WindowType.Dialog)
         exportDialog.setWindowTitle('Exportálás')
-        exportDialog.setMinimumSize(250, 250)
-        exportDialog.setMaximumSize(250, 250)
+        exportDialog.setMinimumSize(250, 340)
+        exportDialog.setMaximumSize(250, 340)
         exportDialog.setLayout(exportDialogLayout)
 
         return exportDialog
@@ -672,17 +817,24 @@ class MainWindow(QMainWindow):
         adjacency: dict[str, str|dict] = self.property('adjacency')
         
         clips = []
-        for clip in timeline.data(timeline.createIndex(0, 0, 128)):
-            clip: ClipInfo
-
-            clipJson = {
-                'source': sub(self.tempDir.path()+'/', '', clip.source),
-                'name': clip.name,
-                'playRate': clip.playRate,
-                'inPoint': clip.inPoint,
-                'outPoint': clip.outPoint
-            }
-            clips.append(clipJson)
+        for trackRow in range(timeline.trackCount):
+            track = timeline.trackIndex(trackRow)
+            for source, name, playRate, inPoint, outPoint in zip(
+                timeline.data(track, timeline.Roles.SourceRole),
+                timeline.data(track, timeline.Roles.NameRole),
+                timeline.data(track, timeline.Roles.PlayRateRole),
+                timeline.data(track, timeline.Roles.InPointRole),
+                timeline.data(track, timeline.Roles.OutPointRole)
+            ):
+                clipJson = {
+                    'source': self.displayName(source),
+                    'name': name,
+                    'playRate': playRate,
+                    'inPoint': inPoint,
+                    'outPoint': outPoint,
+                    'track': trackRow
+                }
+                clips.append(clipJson)
 
         if not(self.property('saved')):
             saveDirPath, _ = QFileDialog.getSaveFileName(self, "Save", QDir.currentPath(), options=QFileDialog.Option.ShowDirsOnly | QFileDialog.Option.DontResolveSymlinks)
@@ -694,21 +846,25 @@ class MainWindow(QMainWindow):
         else:
             saveDirPath: str = self.property('saveDirPath')
         
-        with open(saveDirPath+'/'+settings.ADJACENT_FILE, 'w', encoding='utf-8') as f:
-            dump(adjacency, f)
-
-        with open(saveDirPath+'/'+settings.CLIPS_FILE, 'w', encoding='utf-8') as f:
-            dump(clips, f)
-
-        for entry in QDir(self.tempDir.path()).entryInfoList(QDir.Filter.AllEntries | QDir.Filter.NoDotAndDotDot):
-            if not QDir(saveDirPath).exists(): QDir(saveDirPath).mkdir(entry.fileName())
-            if entry.isDir():
-                for file in QDir(entry.absoluteFilePath()).entryInfoList(QDir.Filter.AllEntries | QDir.Filter.NoDotAndDotDot):
-                    saveDirPath+'/'+entry.fileName()+'/'+file.fileName()
-                    QFile.copy(file.absoluteFilePath(), saveDirPath+'/'+entry.fileName()+'/'+file.fileName())
+        # Only the media new or changed since the last save are linked or copied into the project, see the manifest
+        manifest = ProjectManifest(saveDirPath)
+        names = []
+        for source in timeline.sources:
+            if timeline.isDeferred(source):
+                # Recordings not converted yet are saved as they are, they are converted when the project needs them
+                names.append(sub(r'\.mp4$', '.dav', self.displayName(source)))
+                manifest.update(names[-1], self.davSources[source])
             else:
-                saveDirPath+'/'+entry.fileName()
-                QFile.copy(entry.absoluteFilePath(), saveDirPath+'/'+entry.fileName())
+                # The metadata of the source is saved with it, so opening the project does not have to probe it
+                sourceInfo = timeline.sourceInfo(source)
+                names.append(self.displayName(source))
+                manifest.update(names[-1], source, sourceInfo.toDict() if sourceInfo is not None else None)
+        manifest.retain(names)
+
+        # The media are saved before the files referencing them
+        manifest.write()
+        writeJson(saveDirPath+'/'+settings.ADJACENT_FILE, adjacency)
+        writeJson(saveDirPath+'/'+settings.CLIPS_FILE, clips)
 
     def load_project(self):
         """
@@ -737,8 +893,9 @@ class MainWindow(QMainWindow):
         adjecentSourceDisplays: list[QComboBox] = self.findChildren(QComboBox, QRegularExpression(r'SourceDisplay'), Qt.FindChildOption.FindChildrenRecursively)
         fileDisplayWidget: QTreeWidget = self.findChild(QTreeWidget, 'fileDisplayWidget', Qt.FindChildOption.FindChildrenRecursively)
 
-        while (timeline.rowCount(timeline.createIndex(0, 0, 128))):
-            timeline.removeClip(0) 
+        while (timeline.trackCount > 1):
+            timeline.removeTrack(timeline.trackCount - 1)
+        timeline.clearClips()
 
         while (len(timeline.sources)):
             timeline.removeSource(0)
@@ -758,56 +915,79 @@ class MainWindow(QMainWindow):
             adjecentSourceDisplay.addItem(None)
 
         self.tempDir = QTemporaryDir()
+        self.sourceNames = {}
+        self.davSources = {}
+
+        # The media of the project is referenced in place, with the metadata saved in its manifest,
+        # the files are only validated against it in the background
+        manifest = ProjectManifest(loadDirPath)
+        sources: dict[str, str] = {}
 
         for entry in loadDir.entryInfoList(QDir.Filter.AllEntries | QDir.Filter.NoDotAndDotDot, QDir.SortFlag.DirsFirst | QDir.SortFlag.Name):
             if entry.isDir():
-                QDir(self.tempDir.path()).mkdir(entry.fileName())
-
                 FolderItem = QTreeWidgetItem(fileDisplayWidget)
                 FolderItem.setIcon(0, QStyle.standardIcon(self.style(), QStyle.StandardPixmap.SP_DirIcon))
                 FolderItem.setText(1, entry.fileName())
                 FolderItem.setFont(1, QFont('Helvetica', 12, 2))
 
                 for file in QDir(entry.absoluteFilePath()).entryInfoList(QDir.Filter.AllEntries | QDir.Filter.NoDotAndDotDot):
-                    QFile.copy(file.absoluteFilePath(), self.tempDir.path()+'/'+entry.fileName()+'/'+file.fileName())
-
-                    videoFileItem = VideoFileWidgetItem(self.tempDir.path() + '/' + entry.fileName() + '/' + file.fileName(), FolderItem)
+                    name = entry.fileName()+'/'+file.fileName()
+                    info = manifest.info(name)
+                    if file.suffix() == 'dav':
+                        source = self.importRecording(file.absoluteFilePath(), name)
+                        name = self.displayName(source)
+                    else:
+                        source = self.importSource(file.absoluteFilePath(), name)
+                    sources[name] = source
+
+                    videoFileItem = VideoFileWidgetItem(source, FolderItem)
                     videoFileItem.setIcon(1, QStyle.standardIcon(self.style(), QStyle.StandardPixmap.SP_FileIcon))
                     videoFileItem.setText(1, videoFileItem.name)
                     videoFileItem.setFont(1, QFont('Helvetica', 12, 1))
                     videoFileItem.setToolTip(1, videoFileItem.source)
 
-                    timeline.addSource(self.tempDir.path()+'/'+entry.fileName()+'/'+file.fileName())
-                    sourceDisplay.addItem(entry.fileName()+'/'+file.fileName())
-                    sourceDisplay.setItemData(sourceDisplay.count()-1, entry.fileName()+'/'+file.fileName(), Qt.ItemDataRole.ToolTipRole)
+                    timeline.addSource(videoFileItem.source, videoFileItem.source in self.davSources, SourceInfo.fromDict(source, info) if info is not None else None)
+                    videoFileItem.probing = timeline.isProbing(videoFileItem.source)
+                    sourceDisplay.addItem(name)
+                    sourceDisplay.setItemData(sourceDisplay.count()-1, name, Qt.ItemDataRole.ToolTipRole)
                     for adjecentSourceDisplay in adjecentSourceDisplays:
-                        adjecentSourceDisplay.addItem(entry.fileName()+'/'+file.fileName())
-                        adjecentSourceDisplay.setItemData(adjecentSourceDisplay.count()-1, entry.fileName()+'/'+file.fileName(), Qt.ItemDataRole.ToolTipRole)
+                        adjecentSourceDisplay.addItem(name)
+                        adjecentSourceDisplay.setItemData(adjecentSourceDisplay.count()-1, name, Qt.ItemDataRole.ToolTipRole)
                 
                 FolderItem.setExpanded(True)
 
             elif not entry.fileName().endswith('.json'):
-                QFile.copy(entry.absoluteFilePath(), self.tempDir.path()+'/'+entry.fileName())
+                name = entry.fileName()
+                info = manifest.info(name)
+                if entry.suffix() == 'dav':
+                    source = self.importRecording(entry.absoluteFilePath(), name)
+                    name = self.displayName(source)
+                else:
+                    source = self.importSource(entry.absoluteFilePath(), name)
+                sources[name] = source
 
-                videoFileItem = VideoFileWidgetItem(entry.absoluteFilePath(), fileDisplayWidget)
+                videoFileItem = VideoFileWidgetItem(source, fileDisplayWidget)
                 videoFileItem.setIcon(0, QStyle.standardIcon(self.style(), QStyle.StandardPixmap.SP_FileIcon))
                 videoFileItem.setText(1, videoFileItem.name)
                 videoFileItem.setFont(1, QFont('Helvetica', 12, 1))
                 videoFileItem.setToolTip(0, videoFileItem.source)
 
-                timeline.addSource(self.tempDir.path()+'/'+entry.fileName())
-                sourceDisplay.addItem(entry.fileName())
-                sourceDisplay.setItemData(sourceDisplay.count()-1, entry.fileName(), Qt.ItemDataRole.ToolTipRole)
+                timeline.addSource(videoFileItem.source, videoFileItem.source in self.davSources, SourceInfo.fromDict(source, info) if info is not None else None)
+                videoFileItem.probing = timeline.isProbing(videoFileItem.source)
+                sourceDisplay.addItem(name)
+                sourceDisplay.setItemData(sourceDisplay.count()-1, name, Qt.ItemDataRole.ToolTipRole)
                 for adjecentSourceDisplay in adjecentSourceDisplays:
-                    adjecentSourceDisplay.addItem(entry.fileName())
-                    adjecentSourceDisplay.setItemData(adjecentSourceDisplay.count()-1, entry.fileName(), Qt.ItemDataRole.ToolTipRole)
+                    adjecentSourceDisplay.addItem(name)
+                    adjecentSourceDisplay.setItemData(adjecentSourceDisplay.count()-1, name, Qt.ItemDataRole.ToolTipRole)
         
-        for index, clip in enumerate(clips):
-            timeline.loadSource(self.tempDir.path()+'/'+clip['source'])
-            timeline.setData(timeline.createIndex(index, 0, 0), clip['name'], timeline.Roles.NameRole)
-            timeline.setData(timeline.createIndex(index, 0, 0), clip['playRate'], timeline.Roles.PlayRateRole)
-            timeline.setData(timeline.createIndex(index, 0, 0), clip['inPoint'], timeline.Roles.InPointRole)
-            timeline.setData(timeline.createIndex(index, 0, 0), clip['outPoint'], timeline.Roles.OutPointRole)
+        # The clips of every track are inserted at once, with the metadata probed for the sources
+        # Projects saved before tracks were introduced have every clip on the first track
+        trackCount = max((clip.get('track', 0) for clip in clips), default=0) + 1
+        while (timeline.trackCount < trackCount):
+            timeline.addTrack()
+
+        for trackRow in range(trackCount):
+            timeline.loadClips([{**clip, 'source': sources.get(clip['source'], loadDirPath+'/'+clip['source'])} for clip in clips if clip.get('track', 0) == trackRow], track=trackRow)
 
         timeline.currentIndex = 0
 
@@ -840,53 +1020,38 @@ class MainWindow(QMainWindow):
             FolderItem.setText(1, openedDirPath.split('/')[-1])
             FolderItem.setFont(1, QFont('Helvetica', 12, 2))
 
-            ### Make folder
-            QDir('').mkpath(self.tempDir.path() +'/'+ openedDirPath.split('/')[-1])
-            ### Copy and convert dav files
-            for file in listdir(openedDirPath):
-                if file.split('.')[-1] == 'dav':
-                    cmd =[get_setting("FFMPEG_BINARY"), "-i", openedDirPath+'/'+file, '-c', 'copy', sub('.dav', '.mp4', self.tempDir.path()+'/'+openedDirPath.split('/')[-1]+'/'+file)]
-                    popen_params = {
-                        "bufsize": int(10**5),
-                        "stdout": DEVNULL,
-                        "stderr": DEVNULL,
-                    }
-                    Popen(cmd, **popen_params).communicate()
-
-                    videoFileItem = VideoFileWidgetItem(sub('.dav', '.mp4', self.tempDir.path()+'/'+openedDirPath.split('/')[-1]+'/'+file), FolderItem)
-                    videoFileItem.setIcon(1, QStyle.standardIcon(self.style(), QStyle.StandardPixmap.SP_FileIcon))
-                    videoFileItem.setText(1, videoFileItem.name)
-                    videoFileItem.setFont(1, QFont('Helvetica', 12, 1))
-                    videoFileItem.setToolTip(1, videoFileItem.source)
+            ### Register the dav files, they are converted once they are needed
+            davFiles = sorted(file for file in listdir(openedDirPath) if file.split('.')[-1] == 'dav')
+            for file in davFiles:
+                videoFileItem = VideoFileWidgetItem(self.importRecording(openedDirPath+'/'+file, openedDirPath.split('/')[-1]+'/'+file), FolderItem)
+                videoFileItem.setIcon(1, QStyle.standardIcon(self.style(), QStyle.StandardPixmap.SP_FileIcon))
+                videoFileItem.setText(1, videoFileItem.name)
+                videoFileItem.setFont(1, QFont('Helvetica', 12, 1))
+                videoFileItem.setToolTip(1, videoFileItem.source)
 
-                    timeline.addSource(videoFileItem.source)
-                    sourceDisplay.addItem(sub(self.tempDir.path()+'/', '', videoFileItem.source))
-                    sourceDisplay.setItemData(sourceDisplay.count()-1, sub(self.tempDir.path()+'/', '', videoFileItem.source), Qt.ItemDataRole.ToolTipRole)
-                    for adjecentSourceDisplay in adjecentSourceDisplays:
-                        adjecentSourceDisplay.addItem(sub(self.tempDir.path()+'/', '', videoFileItem.source))
-                        adjecentSourceDisplay.setItemData(adjecentSourceDisplay.count()-1, sub(self.tempDir.path()+'/', '', videoFileItem.source), Qt.ItemDataRole.ToolTipRole)
+                self.addSource(videoFileItem.source, deferred=True)
 
             openedDir = QDir(openedDirPath)
             files = openedDir.entryInfoList(['*.mp4', '*.webm'], QDir.Filter.Files, QDir.SortFlag.Name)
-            if len(files): 
+            if len(files) or len(davFiles):
 
                 for file in files:
-                    QFile.copy(file.absoluteFilePath(), self.tempDir.path() + '/' + openedDir.dirName() + '/' + file.fileName())
-
-                    videoFileItem = VideoFileWidgetItem(sub('.dav', '.mp4', self.tempDir.path()+'/'+openedDir.dirName()+'/'+file.fileName()), FolderItem)
+                    videoFileItem = VideoFileWidgetItem(self.importSource(file.absoluteFilePath(), openedDir.dirName() + '/' + file.fileName()), FolderItem)
                     videoFileItem.setIcon(1, QStyle.standardIcon(self.style(), QStyle.StandardPixmap.SP_FileIcon))
                     videoFileItem.setText(1, videoFileItem.name)
                     videoFileItem.setFont(1, QFont('Helvetica', 12, 1))
                     videoFileItem.setToolTip(1, videoFileItem.source)
                     
                     timeline.addSource(videoFileItem.source)
-                    sourceDisplay.addItem(sub(self.tempDir.path()+'/', '', videoFileItem.source))
-                    sourceDisplay.setItemData(sourceDisplay.count()-1, sub(self.tempDir.path()+'/', '', videoFileItem.source), Qt.ItemDataRole.ToolTipRole)
+                    videoFileItem.probing = timeline.isProbing(videoFileItem.source)
+                    sourceDisplay.addItem(self.displayName(videoFileItem.source))
+                    sourceDisplay.setItemData(sourceDisplay.count()-1, self.displayName(videoFileItem.source), Qt.ItemDataRole.ToolTipRole)
                     for adjecentSourceDisplay in adjecentSourceDisplays:
-                        adjecentSourceDisplay.addItem(sub(self.tempDir.path()+'/', '', videoFileItem.source))
-                        adjecentSourceDisplay.setItemData(adjecentSourceDisplay.count()-1, sub(self.tempDir.path()+'/', '', videoFileItem.source), Qt.ItemDataRole.ToolTipRole)
+                        adjecentSourceDisplay.addItem(self.displayName(videoFileItem.source))
+                        adjecentSourceDisplay.setItemData(adjecentSourceDisplay.count()-1, self.displayName(videoFileItem.source), Qt.ItemDataRole.ToolTipRole)
 
-                if timeline.rowCount(timeline.createIndex(0, 0, 128)) == 0: 
+                # A folder of dav files only has no source until the first one is converted
+                if timeline.rowCount(timeline.trackIndex()) == 0 and len(timeline.sources):
                     timeline.loadSource(0)
                     timeline.currentIndex = 0
                     timeline.position = 0
@@ -915,29 +1080,30 @@ class MainWindow(QMainWindow):
 
             for file in filenames:
                 if file.split('.')[-1] == 'dav':
-                        cmd =[get_setting("FFMPEG_BINARY"), "-i", file, '-c', 'copy', sub('.dav', '.mp4', self.tempDir.path()+'/'+file.split('/')[-1])]
-                        popen_params = {
-                            "bufsize": int(10**5),
-                            "stdout": DEVNULL,
-                            "stderr": DEVNULL,
-                        }
-                        Popen(cmd, **popen_params).communicate()
+                    source = self.importRecording(file, file.split('/')[-1])
                 else:
-                    QFile.copy(file, self.tempDir.path()+'/'+file.split('/')[-1])
-                videoFileItem = VideoFileWidgetItem(sub('.dav', '.mp4', self.tempDir.path()+'/'+file.split('/')[-1]), fileDisplayWidget)
+                    source = self.importSource(file, file.split('/')[-1])
+
+                videoFileItem = VideoFileWidgetItem(source, fileDisplayWidget)
                 videoFileItem.setIcon(0, QStyle.standardIcon(self.style(), QStyle.StandardPixmap.SP_FileIcon))
                 videoFileItem.setText(1, videoFileItem.name)
                 videoFileItem.setFont(1, QFont('Helvetica', 12, 1))
                 videoFileItem.setToolTip(0, videoFileItem.source)
 
+                # dav files are converted once they are needed
+                if file.split('.')[-1] == 'dav':
+                    self.addSource(videoFileItem.source, deferred=True)
+                    continue
+
                 timeline.addSource(videoFileItem.source)
-                sourceDisplay.addItem(sub(self.tempDir.path()+'/', '', videoFileItem.source))
-                sourceDisplay.setItemData(sourceDisplay.count()-1, sub(self.tempDir.path()+'/', '', videoFileItem.source), Qt.ItemDataRole.ToolTipRole)
+                videoFileItem.probing = timeline.isProbing(videoFileItem.source)
+                sourceDisplay.addItem(self.displayName(videoFileItem.source))
+                sourceDisplay.setItemData(sourceDisplay.count()-1, self.displayName(videoFileItem.source), Qt.ItemDataRole.ToolTipRole)
                 for adjecentSourceDisplay in adjecentSourceDisplays:
-                        adjecentSourceDisplay.addItem(sub(self.tempDir.path()+'/', '', videoFileItem.source))
-                        adjecentSourceDisplay.setItemData(adjecentSourceDisplay.count()-1, sub(self.tempDir.path()+'/', '', videoFileItem.source), Qt.ItemDataRole.ToolTipRole)
+                        adjecentSourceDisplay.addItem(self.displayName(videoFileItem.source))
+                        adjecentSourceDisplay.setItemData(adjecentSourceDisplay.count()-1, self.displayName(videoFileItem.source), Qt.ItemDataRole.ToolTipRole)
                 
-            if timeline.rowCount(timeline.createIndex(0, 0, 128)) == 0: 
+            if timeline.rowCount(timeline.trackIndex()) == 0 and len(timeline.sources):
                 timeline.loadSource(0)
                 timeline.currentIndex = 0
                 timeline.position = 0
@@ -968,7 +1134,7 @@ class MainWindow(QMainWindow):
                 inPointDisplay.setEnabled(False)
 
             ## Enable the editing of outpoint if the selected clip is not the last
-            if timeline.selectedIndex != timeline.rowCount(timeline.createIndex(0, 0, 128)) - 1:
+            if timeline.selectedIndex != timeline.rowCount(timeline.trackIndex()) - 1:
                 outPointDisplay.setEnabled(True)
             ## Otherwise disable it
             else:
@@ -979,7 +1145,7 @@ class MainWindow(QMainWindow):
             if not clipDataToggleAction.isEnabled(): clipDataToggleAction.setEnabled(True)
 
             ## Set the source of the selected clip to display
-            sourceDisplay.setCurrentIndex(sourceDisplay.findText(sub(self.tempDir.path()+'/', '', selectedClip.source)))
+            sourceDisplay.setCurrentIndex(sourceDisplay.findText(self.displayName(selectedClip.source)))
             ## Convert and set the inpoint of the selected clip to display
             inPointDisplay.setText(self.millieSectoTimeString(selectedClip.inPoint))
             ## Convert and set the outpoint of the selected clip to display
@@ -998,12 +1164,12 @@ class MainWindow(QMainWindow):
                     adjecentSourceDisplay.view().setRowHidden(row, False)
 
                 # Find index of the source of the selected clip
-                hideIndex = adjecentSourceDisplay.findText(sub(self.tempDir.path()+'/', '', selectedClip.source))
+                hideIndex = adjecentSourceDisplay.findText(self.displayName(selectedClip.source))
                 # Hide item of found index
                 adjecentSourceDisplay.view().setRowHidden(hideIndex, True)        
 
                 ## Remove the name of the temporary directory from the source of the selcted clip
-                file = sub(self.tempDir.path() +'/', '', selectedClip.source)
+                file = self.displayName(selectedClip.source)
                 
                 ## Remove parts of source specified by the 'WRAPPER' to create the key
                 adjecentKey = sub(adjacency['WRAPPER'], '', file)
@@ -1046,7 +1212,7 @@ class MainWindow(QMainWindow):
             central: CentralWidget = self.findChild(CentralWidget, 'centralWidget')
             
             ### Get adjacent sources
-            key = sub(adjacency['WRAPPER'], '', sub(self.tempDir.path() + '/', '', currentClip.source))
+            key = sub(adjacency['WRAPPER'], '', self.displayName(currentClip.source))
 
             adjacentSources = {
                 'N': False,
@@ -1062,14 +1228,184 @@ class MainWindow(QMainWindow):
                 for k, v in adjacency[key].items():
                     if (v): adjacentSources[k] = True
 
+                # The cameras the animal can walk into next are converted ahead of time
+                for file in adjacency[key].values():
+                    source = self.adjacentSource(file) if file else None
+                    if source is not None:
+                        self.requestSource(source, RemuxQueue.ADJACENT)
+
             ### Pass adjecent sources
             central.rootContext().setContextProperty('adjacentSources', adjacentSources)
 
+    def findFileItems(self, source: str):
+        """
+        Returns the items of the file display showing `source`.
+
+        :param str source: Path to a video file.
+        """
+        fileDisplayWidget: QTreeWidget = self.findChild(QTreeWidget, 'fileDisplayWidget', Qt.FindChildOption.FindChildrenRecursively)
+        items: list[VideoFileWidgetItem] = []
+
+        iterator = QTreeWidgetItemIterator(fileDisplayWidget)
+        while iterator.value():
+            item = iterator.value()
+            if isinstance(item, VideoFileWidgetItem) and item.source == source:
+                items.append(item)
+            iterator += 1
+
+        return items
+
+    def sourceProbed(self, source: str):
+        ### Metadata of the source arrived from the background, enable its items
+        for item in self.findFileItems(source):
+            item.probing = False
+
+    def sourceFailed(self, source: str, message: str):
+        ### The source could not be probed, its items stay disabled and show the reason
+        for item in self.findFileItems(source):
+            item.setToolTip(0, message)
+            item.setToolTip(1, message)
+
+    def displayName(self, source: str):
+        """
+        Returns the name of a source, as shown by the source selectors and stored in the saved projects: the name of its
+        folder and its file name for the sources of an imported folder, otherwise its file name.
+        Sources converted into the workspace are named by their path in it.
+
+        :param str source: Path to a video file.
+        """
+        if source in self.sourceNames:
+            return self.sourceNames[source]
+
+        return sub(self.tempDir.path() + '/', '', source)
+
+    def importSource(self, file: str, name: str):
+        """
+        Returns the source of an imported video file that can be played as it is. With `IMPORT_IN_PLACE` the file
+        is referenced where it is, otherwise it is linked (or copied, see `linkOrCopy()`) into the workspace.
+
+        :param str file: Path to the imported video file.
+        :param str name: Name of the source (see `displayName()`).
+        """
+        if getattr(settings, 'IMPORT_IN_PLACE', True):
+            source = path.abspath(file).replace('\\', '/')
+        else:
+            source = self.tempDir.path() + '/' + name
+            linkOrCopy(file, source)
+
+        self.sourceNames[source] = name
+
+        return source
+
+    def importRecording(self, file: str, name: str):
+        """
+        Returns the source of an imported recording that has to be converted to be played (.dav).
+        The source is the converted file in the workspace, the recording is converted once the source is needed.
+
+        :param str file: Path to the imported recording.
+        :param str name: Name of the recording, the name of the source is the same with the extension of the converted file.
+        """
+        name = sub(r'\.dav$', '.mp4', name)
+        source = self.tempDir.path() + '/' + name
+        QDir('').mkpath(path.dirname(source))
+
+        self.davSources[source] = file
+        self.sourceNames[source] = name
+
+        return source
+
+    def requestSource(self, source: str, priority: int = RemuxQueue.TIMELINE):
+        """
+        Convert a recording registered by `importRecording()`, if it is not converted yet.
+        Sources needed right away (placed on the timeline, selected or exported) are converted before the ones offered as
+        adjacent cameras, which are converted ahead of time so a camera change does not wait for them.
+
+        :param str source: Path to the converted file.
+        :param int priority: How soon the source is needed, one of the priorities of `RemuxQueue`.
+        """
+        timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
+        if source not in self.davSources or not timeline.isDeferred(source):
+            return
+
+        if not self.remuxQueue.isPending(self.davSources[source]):
+            for item in self.findFileItems(source):
+                item.progress = 0.0
+
+        self.remuxQueue.remux(self.davSources[source], source, priority)
+
+    def adjacentSource(self, file: str):
+        """
+        Returns the source shown by the camera of an adjacency, the first source whose name starts with `file`, None if there is none.
+
+        :param str file: Name of the camera, as stored in the adjacency dictionary.
+        """
+        timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
+
+        for source in timeline.sources:
+            if self.displayName(source).startswith(file):
+                return source
+
+        return None
+
+    def addSource(self, source: str, deferred: bool = False):
+        """
+        Add a video file to the timeline and to the source selectors, its items are enabled once it is probed.
+        The first source of an empty timeline is loaded into it.
+
+        :param str source: Path to a video file.
+        :param bool deferred: Whether the source is a recording converted on demand (see `importRecording()`).
+        """
+        timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
+        sourceDisplay: QComboBox = self.findChild(QComboBox, 'sourceDisplay', Qt.FindChildOption.FindChildrenRecursively)
+        adjecentSourceDisplays: list[QComboBox] = self.findChildren(QComboBox, QRegularExpression(r'SourceDisplay'), Qt.FindChildOption.FindChildrenRecursively)
+
+        timeline.addSource(source, deferred)
+        for item in self.findFileItems(source):
+            item.probing = timeline.isProbing(source)
+
+        for display in [sourceDisplay, *adjecentSourceDisplays]:
+            display.addItem(self.displayName(source))
+            display.setItemData(display.count()-1, self.displayName(source), Qt.ItemDataRole.ToolTipRole)
+
+        if timeline.rowCount(timeline.trackIndex()) == 0:
+            timeline.loadSource(source)
+            timeline.currentIndex = 0
+            timeline.position = 0
+
+    def sourceRemuxProgressed(self, source: str, output: str, progress: float):
+        ### Show the progress of the conversion on the items of the converted file
+        for item in self.findFileItems(output):
+            item.progress = progress
+
+    def sourceRequested(self, source: str):
+        ### A clip needs a source converted on demand
+        self.requestSource(source, RemuxQueue.TIMELINE)
+
+    def sourceRemuxed(self, source: str, output: str):
+        ### A dav file is converted, its source is probed and passed to the clips waiting for it
+        timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
+        timeline.sourceAvailable(output)
+
+        for item in self.findFileItems(output):
+            item.progress = None
+            item.probing = timeline.isProbing(output)
+
+    def sourceRemuxFailed(self, source: str, output: str, message: str):
+        ### The file could not be converted, its items stay disabled and show the reason
+        timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
+        timeline.sourceProbeFailed(output, message)
+
+        for item in self.findFileItems(output):
+            item.progress = None
+            item.setDisabled(True)
+            item.setToolTip(0, f'{language.REMUX_FAILED_ERROR}\n{message}')
+            item.setToolTip(1, f'{language.REMUX_FAILED_ERROR}\n{message}')
+
     def itemDoubleClicked(self, item: VideoFileWidgetItem, column: int):
         timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
-        timeline.setData(timeline.createIndex(timeline.currentIndex, 0, 0), item.source, timeline.Roles.SourceRole)
-        # timeline.data(timeline.createIndex(timeline.currentIndex, 0, 0), timeline.Roles.InPointRole)
-        # timeline.data(timeline.createIndex(timeline.currentIndex, 0, 0), timeline.Roles.OutPointRole)
+        timeline.setData(timeline.clipIndex(timeline.currentIndex), item.source, timeline.Roles.SourceRole)
+        # timeline.data(timeline.clipIndex(timeline.currentIndex), timeline.Roles.InPointRole)
+        # timeline.data(timeline.clipIndex(timeline.currentIndex), timeline.Roles.OutPointRole)
 
     def clipClicked(self, clipIndex: int):
         self.findChild(TimelineModel, 'timeline').selectedIndex=clipIndex
@@ -1080,14 +1416,11 @@ class MainWindow(QMainWindow):
         timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
         adjacency: dict[str, str|dict[str, str]] = self.property('adjacency')
         
-        adjacentKey = sub(adjacency['WRAPPER'], '', sub(self.tempDir.path() + '/', '', timeline.currentClip.source))
+        adjacentKey = sub(adjacency['WRAPPER'], '', self.displayName(timeline.currentClip.source))
         file = adjacency[adjacentKey][dircetion]
-        for source in timeline.sources:
-            if sub(self.tempDir.path() + '/', '', source).startswith(file):
-                file = source
-                break;
+        file = self.adjacentSource(file) or file
         
-        timeline.setData(timeline.createIndex(timeline.currentIndex, 0, 0), file, timeline.Roles.SourceRole)
+        timeline.setData(timeline.clipIndex(timeline.currentIndex), file, timeline.Roles.SourceRole)
 
     def warningRequested(self, warning_text):
         self.findChild(QLabel, 'errorLabel').setText(warning_text)
@@ -1097,24 +1430,28 @@ class MainWindow(QMainWindow):
         timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
         # try:
 
-        length_old = timeline.data(timeline.createIndex(timeline.selectedIndex, 0, 0), timeline.Roles.LengthRole)
-        timeline.setData(timeline.createIndex(timeline.selectedIndex, 0, 0), timeline.sources[index], timeline.Roles.SourceRole)
+        # The selected source is converted right away, even if no clip is selected to show it
+        if 0 <= index < len(timeline.sources):
+            self.requestSource(timeline.sources[index], RemuxQueue.TIMELINE)
+
+        length_old = timeline.data(timeline.clipIndex(timeline.selectedIndex), timeline.Roles.LengthRole)
+        timeline.setData(timeline.clipIndex(timeline.selectedIndex), timeline.sources[index], timeline.Roles.SourceRole)
 
 
-        length_new = timeline.data(timeline.createIndex(timeline.selectedIndex, 0, 0), timeline.Roles.LengthRole)
-        duration_new = timeline.data(timeline.createIndex(timeline.selectedIndex, 0, 0), timeline.Roles.DurationRole)
+        length_new = timeline.data(timeline.clipIndex(timeline.selectedIndex), timeline.Roles.LengthRole)
+        duration_new = timeline.data(timeline.clipIndex(timeline.selectedIndex), timeline.Roles.DurationRole)
         
         if not length_old == None and not duration_new == None:
             if length_old > duration_new:
-                timeline.setData(timeline.createIndex(timeline.selectedIndex, 0, 0), -1, timeline.Roles.InPointRole)
-                timeline.setData(timeline.createIndex(timeline.selectedIndex, 0, 0), -1, timeline.Roles.OutPointRole)
+                timeline.setData(timeline.clipIndex(timeline.selectedIndex), -1, timeline.Roles.InPointRole)
+                timeline.setData(timeline.clipIndex(timeline.selectedIndex), -1, timeline.Roles.OutPointRole)
 
             elif length_new > length_old:
-                inPoint = timeline.data(timeline.createIndex(timeline.selectedIndex, 0, 0), timeline.Roles.InPointRole)
-                timeline.setData(timeline.createIndex(timeline.selectedIndex, 0, 0), inPoint + length_old, timeline.Roles.OutPointRole)
+                inPoint = timeline.data(timeline.clipIndex(timeline.selectedIndex), timeline.Roles.InPointRole)
+                timeline.setData(timeline.clipIndex(timeline.selectedIndex), inPoint + length_old, timeline.Roles.OutPointRole)
 
             if timeline.selectedIndex == timeline.currentIndex:
-                timeline.currentClipChanged.emit(timeline.data(timeline.createIndex(timeline.selectedIndex, 0, 0)))
+                timeline.currentClipChanged.emit(timeline.data(timeline.clipIndex(timeline.selectedIndex)))
 
         # except IndexError:
         #     pass
@@ -1125,7 +1462,7 @@ class MainWindow(QMainWindow):
         timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
         if not timeline.selectedClip:
             return
-        sourceKey = sub(adjacency['WRAPPER'], '', sub(self.tempDir.path() + '/', '', timeline.selectedClip.source))
+        sourceKey = sub(adjacency['WRAPPER'], '', self.displayName(timeline.selectedClip.source))
         sourceDisplay: QComboBox = self.findChild(QComboBox, self.property('sourceDisplayName'), Qt.FindChildOption.FindChildrenRecursively)
         source = sourceDisplay.itemText(index)
 
@@ -1169,7 +1506,7 @@ class MainWindow(QMainWindow):
 
     def inPointReturnPressed(self):
         timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
-        timeline.setData(timeline.createIndex(timeline.selectedIndex, 0, 0), self.timeStringToMillieSec(self.newInPointText, timeline.selectedClip.frameRate), timeline.Roles.InPointRole)
+        timeline.setData(timeline.clipIndex(timeline.selectedIndex), self.timeStringToMillieSec(self.newInPointText, timeline.selectedClip.frameRate), timeline.Roles.InPointRole)
         del self.newInPointText
     
     def outPointEdited(self, text: str):
@@ -1177,7 +1514,7 @@ class MainWindow(QMainWindow):
 
     def outPointReturnPressed(self):
         timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
-        timeline.setData(timeline.createIndex(timeline.selectedIndex, 0, 0), self.timeStringToMillieSec(self.newOutPointText, timeline.selectedClip.frameRate), timeline.Roles.OutPointRole)
+        timeline.setData(timeline.clipIndex(timeline.selectedIndex), self.timeStringToMillieSec(self.newOutPointText, timeline.selectedClip.frameRate), timeline.Roles.OutPointRole)
         del self.newInPointText
 
     def clipDataVisibilityChanged(self, visible: bool):
@@ -1186,9 +1523,18 @@ class MainWindow(QMainWindow):
             timeline.selectedIndex = -1
 
     def closeEvent(self, event):
+        self.remuxQueue.cancel()
+        self.remuxQueue.waitForDone()
+
+        for job in list(self.exportJobs):
+            job.cancel()
+            job.wait()
+
         timeline: TimelineModel = self.findChild(TimelineModel, 'timeline')
+        timeline.stopProbing()
         timeline.currentClip = None
         self.tempDir.remove()
+        ProbeCache.instance().write()
 
         if not self.property('saved'):
             with open(settings.ADJACENT_FILE, 'w', encoding='utf-8') as f:
@@ -2,8 +2,18 @@ from .iconProvider import IconProvider
 from .centralWidget import CentralWidget
 from .timelineModel import TimelineModel
 from .clipInfo import ClipInfo
+from .sourceInfo import SourceInfo
+from .clipStore import ClipStore
 from .clipsWidgetItem import VideoFileWidgetItem
 from .signalLogger import SignalLogger
+from .probeCache import ProbeCache
+from .probeBackends import ProbeError, probeFile
+from .probeWorker import ProbeWorker
+from .exportJob import ExportJob
+from .calibrationWorker import CalibrationWorker, EncoderWorker
+from .remuxQueue import RemuxQueue
+from .mediaFiles import linkOrCopy, writeJson
+from .projectManifest import ProjectManifest, fingerprint
 
 
 __all__ = [
@@ -11,6 +21,20 @@ __all__ = [
     'CentralWidget',
     'TimelineModel',
     'ClipInfo',
+    'SourceInfo',
+    'ClipStore',
     'VideoFileWidgetItem',
-    'SignalLogger'
+    'SignalLogger',
+    'ProbeCache',
+    'ProbeError',
+    'probeFile',
+    'ProbeWorker',
+    'ExportJob',
+    'CalibrationWorker',
+    'EncoderWorker',
+    'RemuxQueue',
+    'linkOrCopy',
+    'writeJson',
+    'ProjectManifest',
+    'fingerprint'
 ]
\ No newline at end of file
@@ -0,0 +1,63 @@
+from dataclasses import replace
+from PySide6.QtCore import (
+    QObject,
+    QThread,
+    Signal
+)
+
+class EncoderWorker(QThread):
+    """
+    Finds the encoders the local ffmpeg can use on a thread of its own, the first time it is asked this takes
+    a short test encode with every encoder. The usable encoders are reported with `found`.
+    """
+    ### Signals
+    found = Signal(list, name='found', arguments=['encoders'])
+
+    ### Functions
+    def run(self):
+        # The export package imports the models, it is imported when the encoders are first looked for
+        from export import availableEncoders
+
+        try:
+            encoders = availableEncoders()
+        except OSError:
+            encoders = []
+
+        self.found.emit(encoders)
+
+class CalibrationWorker(QThread):
+    """
+    Runs the calibration encodes of the export settings on a thread of its own, and chooses the encoder and preset
+    to export with. If a target size is given, the bitrate fitting the export into it is chosen first, and the encoder
+    and preset are chosen among the ones reaching that size. The result is reported with either `calibrated` or `failed`,
+    the result holds the chosen `bitrate` too.
+    """
+    ### Constructor
+    def __init__(self, clips: list['ExportClip'], exportSettings: 'ExportSettings', targetSpeed: float = ..., targetSize: int = 0, parent: QObject = None):
+        super().__init__(parent)
+
+        self._clips = list(clips)
+        self._settings = exportSettings
+        self._targetSpeed = targetSpeed
+        self._targetSize = targetSize
+
+    ### Signals
+    calibrated = Signal(dict, name='calibrated', arguments=['result'])
+    failed = Signal(str, name='failed', arguments=['message'])
+
+    ### Functions
+    def run(self):
+        # The export package imports the models, it is imported when the first calibration runs
+        from export import calibrate, choosePreset, targetBitrate
+
+        duration = sum(clip.length / clip.playRate for clip in self._clips)
+        exportSettings = self._settings
+        if self._targetSize > 0:
+            exportSettings = replace(exportSettings, bitrate=targetBitrate(self._targetSize, duration, exportSettings.audio))
+
+        try:
+            results = calibrate(self._clips, exportSettings)
+        except OSError as e:
+            self.failed.emit(str(e))
+        else:
+            self.calibrated.emit({**choosePreset(results, self._targetSpeed, self._targetSize, duration), 'bitrate': exportSettings.bitrate})
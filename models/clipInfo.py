@@ -1,25 +1,31 @@
 from os import path
-from moviepy.editor import VideoFileClip
 from PySide6.QtCore import QObject, Property, Signal
+from .sourceInfo import SourceInfo
+from .clipStore import ClipStore
 
 class ClipInfo(QObject):
     """
     Holds metadata about a clip of a video file.
+
+    A clip is a view of a row of a `ClipStore`. The metadata of the video file itself is a shared
+    `SourceInfo` record, the row only holds the name, play rate, in and out points of the clip.
+    A clip created on its own gets a store with a single row.
     """
-    def __init__(self, source: str = ...):
+    def __init__(self, source: str = ..., sourceInfo: SourceInfo = ..., store: ClipStore = ..., row: int = 0):
         super().__init__()
 
-        self._source = ''
-        self._name = ''
-        self._frames = 0
-        self._frameRate = 0
-        self._playRate = 1.0
-        self._inPoint = -1
-        self._outPoint = -1
-        self._duration = 0.0
+        if store != ...:
+            self._store = store
+            self._row = row
+        else:
+            store = ClipStore()
+            store.insert(0, SourceInfo(''))
+            store.attach(self, 0)
 
-        if source != ...:
-            self.source = source
+            if sourceInfo != ...:
+                self.setSourceInfo(sourceInfo)
+            elif source != ...:
+                self.source = source
 
     ### Destructor
     def __del__(self):
@@ -34,54 +40,57 @@ class ClipInfo(QObject):
     inPointChanged = Signal(int, name='inPointChanged', arguments=['inPoint'])
     outPointChanged = Signal(int, name='outPointChanged', arguments=['outPoint'])
     validityChanged = Signal(bool, name='valididtyChanged', arguments=['valid'])
+    probingChanged = Signal(bool, name='probingChanged', arguments=['probing'])
 
     ### Proprerties (PySide)
     ## Getters
     @Property(str, notify=sourceChanged)
     def source(self):
-        return self._source
+        return self._store.source(self._row)
 
     @Property(str, notify=nameChanged)
     def name(self):
-        return self._name if self._name != '' else self._source
+        return self._store.name(self._row)
 
     @Property(int)
     def totalFrames(self):
-        return self._frames
+        return self._store.sourceInfo(self._row).frames
 
     @Property(int, notify=frameRateChanged)
     def frameRate(self):
-        return self._frameRate
+        return self._store.sourceInfo(self._row).frameRate
 
     @Property(int, notify=playRateChanged)
     def playRate(self):
-        return self._playRate
+        return self._store.playRate(self._row)
 
     @Property(int, notify=inPointChanged)
     def inPoint(self):
-        return self._inPoint
+        return self._store.inPoint(self._row)
 
     @Property(int, notify=outPointChanged)
     def outPoint(self):
-        return self._outPoint
+        return self._store.outPoint(self._row)
 
     @Property(int)
     def length(self):
-        inPoint = self._inPoint if 0 <= self._inPoint else 0
-        outPoint = self._outPoint if 0 < self._outPoint else self._duration
-
-        return outPoint - inPoint
+        return self._store.length(self._row)
 
     @Property(float, notify=durationChanged)
     def duration(self):
-        return self._duration
+        return self._store.duration(self._row)
 
     @Property(bool, notify=validityChanged)
     def valid(self):
-        inPoint = self._inPoint if 0 <= self._inPoint else 0
-        outPoint = self._outPoint if 0 < self._outPoint else self._duration
+        return self._store.valid(self._row)
 
-        return 0 < outPoint - inPoint <= self._duration and outPoint <= self._duration
+    @Property(bool, notify=probingChanged)
+    def probing(self):
+        return self._store.probing(self._row)
+
+    @property
+    def sourceInfo(self):
+        return self._store.sourceInfo(self._row)
 
     ## Setters
     @source.setter
@@ -90,71 +99,87 @@ class ClipInfo(QObject):
             raise FileNotFoundError(
                 f'File \'{value}\' does not exist'
             )
-        
-        if self._source != value:
-            valid = self.valid
-
-            file = VideoFileClip(value)
-
-            self._source = file.filename
-            self.sourceChanged.emit(self._source)
-
-            self._frames: int = file.reader.nframes
-
-            self._frameRate: int = file.fps
-            self.frameRateChanged.emit(self._frameRate)
-
-            self._duration: float = file.duration * 1000
-            self.durationChanged.emit(self._duration)
-
-            file.close()
 
-            if self.valid != valid:
-                self.validityChanged.emit(self.valid)
+        # The file is probed in the background by the owner of the store, the clip is probing until then
+        if self.source != value or self.probing:
+            self._store.setSource(self._row, value)
 
     @name.setter
     def name(self, value: str):
-        if self._name != value:
-            self._name = value
-            self.nameChanged.emit(self._name)
+        self._store.setName(self._row, value)
 
     @playRate.setter
     def playRate(self, value: float):
-        if self._playRate != value:
-            self._playRate = value
-            self.playRateChanged.emit(self._playRate)
+        self._store.setPlayRate(self._row, value)
 
     @inPoint.setter
     def inPoint(self, value: int):
-        valueValid = False
-
-        if value == -1:
-            valueValid = True
-
-        elif self._outPoint >= 0:
-            valueValid = (0 <= value < self._outPoint)
-
-        else:
-            valueValid = (0 <= value < self._duration)
-
-        if valueValid:
-            valid = self.valid
-            
-            self._inPoint = value
-            self.inPointChanged.emit(self._inPoint)
-
-            if self.valid != valid:
-                self.validityChanged.emit(self.valid)
+        self._store.setInPoint(self._row, value)
 
     @outPoint.setter
     def outPoint(self, value: int):
-        inPoint = self._inPoint if 0 <= self._inPoint else 0
-
-        if value == -1 or (inPoint < value < self._duration):
-            valid = self.valid
-
-            self._outPoint = value
-            self.outPointChanged.emit(self._outPoint)
-
-            if self.valid != valid:
-                self.validityChanged.emit(valid)
\ No newline at end of file
+        self._store.setOutPoint(self._row, value)
+
+    ### Functions
+    def setSourceInfo(self, sourceInfo: SourceInfo, probing: bool = False):
+        """
+        Set the source of the clip to an already probed record, without reading the file.
+
+        :param SourceInfo sourceInfo: Metadata of the video file.
+        :param bool probing: Whether the metadata is a placeholder, while the real one is being probed.
+        """
+        self._store.setSourceInfo(self._row, sourceInfo, probing)
+
+    def copy(self):
+        """
+        Returns a new clip with the same attributes, referencing the same `SourceInfo` record.
+        """
+        store = ClipStore()
+        store.insert(0, *self.record())
+
+        return store.view(0)
+
+    def record(self):
+        """
+        Returns the attributes of the clip in the form `ClipStore.insert()` takes them.
+        """
+        return self._store.record(self._row)
+
+    @property
+    def store(self):
+        """
+        Store holding the values of the clip.
+        """
+        return self._store
+
+    @property
+    def row(self):
+        """
+        Row of the clip in its store.
+        """
+        return self._row
+
+    def bind(self, store: ClipStore, row: int):
+        """
+        Make the clip a view of `row` of `store`, called by the store (see `ClipStore.attach()`).
+        """
+        self._store = store
+        self._row = row
+
+    def notify(self, attributes: tuple[str], valid: bool):
+        """
+        Emit the change signals of `attributes`, and `validityChanged` if the validity differs from `valid`. Called by the store.
+        """
+        for attribute in attributes:
+            getattr(self, attribute + 'Changed').emit(getattr(self, attribute))
+
+        if self.valid != valid:
+            self.validityChanged.emit(self.valid)
+
+    def detach(self):
+        """
+        The row of the clip was removed from its store, the values of the clip are kept in a store of its own.
+        """
+        store = ClipStore()
+        store.insert(0, *self._store.record(self._row))
+        store.attach(self, 0)
@@ -0,0 +1,530 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Callable
+from weakref import WeakValueDictionary
+from .sourceInfo import SourceInfo
+
+class ClipStore:
+    """
+    Struct-of-arrays storage of the clips of a track.
+
+    Every attribute of the clips is held in its own contiguous array, the SourceInfo records are stored
+    once and referenced by their id, a record is dropped once no clip references it.
+    `ClipInfo` objects are only created as views of a row, when one is asked for, and are only kept while they are used.
+    The owner of the store (e.g. `TimelineModel`) resolves the metadata of the sources set by path (see `setSource()`).
+    """
+    ### Constructor
+    def __init__(self, sourceSetter: Callable[['ClipStore', int, str], None] = None):
+        # Sets the source of a row by its path, probing the file in the background if its metadata is not known yet
+        self._sourceSetter = sourceSetter
+
+        # Distinct SourceInfo records, their ids and the number of clips referencing them. Ids of dropped records are reused
+        self._sourceInfos: list[SourceInfo | None] = []
+        self._sourceIdOf: dict[SourceInfo, int] = {}
+        self._sourceRefs: list[int] = []
+        self._freeSourceIds: list[int] = []
+
+        # Columns, in and out points are whole millieseconds, -1 if unset
+        self._sourceIds = array('l')
+        self._inPoints = array('q')
+        self._outPoints = array('q')
+        self._durations = array('d')
+        self._playRates = array('d')
+        self._probing = array('b')
+        self._names: list[str] = []
+
+        # Offsets (start of the clips on the track) as a prefix sum of the lengths,
+        # updated incrementally on every insert, remove and change of a length
+        self._offsets = array('d')
+        self._totalLength = 0.0
+
+        # Views of rows, as long as they are referenced elsewhere
+        self._views: WeakValueDictionary = WeakValueDictionary()
+
+    ### Implementations
+    def __len__(self):
+        return len(self._sourceIds)
+
+    ### Functions
+    ## Structure
+    def insert(self, row: int, sourceInfo: SourceInfo, name: str = '', playRate: float = 1.0, inPoint: float = -1, outPoint: float = -1, probing: bool = False):
+        """
+        Insert a clip before `row`.
+
+        :param int row: Index to insert the clip at.
+        :param SourceInfo sourceInfo: Record of the video file of the clip.
+        """
+        self._sourceIds.insert(row, self._acquireSource(sourceInfo))
+        self._inPoints.insert(row, round(inPoint))
+        self._outPoints.insert(row, round(outPoint))
+        self._durations.insert(row, sourceInfo.duration)
+        self._playRates.insert(row, playRate)
+        self._probing.insert(row, probing)
+        self._names.insert(row, name)
+        self._offsets.insert(row, self._offsets[row] if row < len(self._offsets) else self._totalLength)
+
+        self._shiftOffsets(row + 1, self.length(row))
+        self._shiftViews(row, 1)
+
+    def insertMany(self, row: int, records: list[tuple]):
+        """
+        Insert many clips before `row` at once, the offsets are computed once for all of them.
+        In and out points are validated the same way the setters validate them, invalid ones are left unset.
+
+        :param int row: Index to insert the clips at.
+        :param list records: Arguments of `insert()` for each clip, without the row.
+        """
+        sourceIds, inPoints, outPoints, durations, playRates, probings, names = [], [], [], [], [], [], []
+
+        for record in records:
+            sourceInfo, name, playRate, inPoint, outPoint, probing = self._record(*record)
+
+            # Points are set in the order a clip is edited, the in point first
+            if not self.validInPoint(inPoint, -1, sourceInfo.duration, probing):
+                inPoint = -1
+            if not self.validOutPoint(outPoint, inPoint, sourceInfo.duration, probing):
+                outPoint = -1
+
+            sourceIds.append(self._acquireSource(sourceInfo))
+            inPoints.append(round(inPoint))
+            outPoints.append(round(outPoint))
+            durations.append(sourceInfo.duration)
+            playRates.append(playRate)
+            probings.append(probing)
+            names.append(name)
+
+        count = len(sourceIds)
+        if count == 0:
+            return 0
+
+        self._sourceIds[row:row] = array('l', sourceIds)
+        self._inPoints[row:row] = array('q', inPoints)
+        self._outPoints[row:row] = array('q', outPoints)
+        self._durations[row:row] = array('d', durations)
+        self._playRates[row:row] = array('d', playRates)
+        self._probing[row:row] = array('b', probings)
+        self._names[row:row] = names
+        self._offsets[row:row] = array('d', bytes(8 * count))
+
+        self.rebuildOffsets(row)
+        self._shiftViews(row, count)
+
+        return count
+
+    @staticmethod
+    def _record(sourceInfo: SourceInfo, name: str = '', playRate: float = 1.0, inPoint: float = -1, outPoint: float = -1, probing: bool = False):
+        return (sourceInfo, name, playRate, inPoint, outPoint, probing)
+
+    def remove(self, row: int, count: int = 1):
+        """
+        Remove `count` clips starting at `row`.
+        """
+        # Views of removed rows keep their values in a store of their own
+        for removed in range(row, row + count):
+            view = self._views.pop(removed, None)
+            if view is not None:
+                view.detach()
+
+        removedLength = sum(self.length(removed) for removed in range(row, row + count))
+
+        for sourceId in self._sourceIds[row:row+count]:
+            self._releaseSource(sourceId)
+
+        for column in (self._sourceIds, self._inPoints, self._outPoints, self._durations, self._playRates, self._probing, self._names, self._offsets):
+            del column[row:row+count]
+
+        self._shiftOffsets(row, -removedLength)
+        self._shiftViews(row + count, -count)
+
+    def record(self, row: int):
+        """
+        Returns the arguments `insert()` needs to create a copy of the clip at `row`.
+        """
+        return (self.sourceInfo(row), self._names[row], self._playRates[row], self._inPoints[row], self._outPoints[row], bool(self._probing[row]))
+
+    def _acquireSource(self, sourceInfo: SourceInfo):
+        ### Returns the id of `sourceInfo` for a clip referencing it, storing the record if it is new
+        sourceId = self._sourceIdOf.get(sourceInfo)
+
+        if sourceId is None:
+            if self._freeSourceIds:
+                sourceId = self._freeSourceIds.pop()
+                self._sourceInfos[sourceId] = sourceInfo
+            else:
+                sourceId = len(self._sourceInfos)
+                self._sourceInfos.append(sourceInfo)
+                self._sourceRefs.append(0)
+            self._sourceIdOf[sourceInfo] = sourceId
+
+        self._sourceRefs[sourceId] += 1
+
+        return sourceId
+
+    def _releaseSource(self, sourceId: int):
+        ### A clip no longer references the record of `sourceId`, the record is dropped if it was the last one
+        self._sourceRefs[sourceId] -= 1
+
+        if self._sourceRefs[sourceId] == 0:
+            del self._sourceIdOf[self._sourceInfos[sourceId]]
+            self._sourceInfos[sourceId] = None
+            self._freeSourceIds.append(sourceId)
+
+    ## Views
+    def view(self, row: int):
+        """
+        Returns the `ClipInfo` view of the clip at `row`, creating it if needed.
+        """
+        view = self._views.get(row)
+
+        if view is None:
+            from .clipInfo import ClipInfo
+            view = ClipInfo(store=self, row=row)
+            self.attach(view, row)
+
+        return view
+
+    def attach(self, view, row: int):
+        """
+        Make `view` the `ClipInfo` view of the clip at `row`, it follows the row when clips are inserted or removed before it.
+        The store does not keep the view alive.
+        """
+        self._views[row] = view
+        view.bind(self, row)
+
+    def existingView(self, row: int):
+        """
+        Returns the `ClipInfo` view of the clip at `row` if one was created, otherwise None.
+        """
+        return self._views.get(row)
+
+    def rowOf(self, view):
+        """
+        Returns the row `view` is a view of in this store, or -1 if it is not a view of this store.
+        """
+        return view.row if view.store is self and self._views.get(view.row) is view else -1
+
+    def _shiftViews(self, row: int, count: int):
+        shifted = WeakValueDictionary()
+
+        for viewRow, view in list(self._views.items()):
+            if viewRow >= row:
+                viewRow += count
+                view.bind(self, viewRow)
+            shifted[viewRow] = view
+
+        self._views = shifted
+
+    def _notify(self, row: int, attributes: tuple[str], valid: bool):
+        view = self._views.get(row)
+
+        if view is not None:
+            view.notify(attributes, valid)
+
+    ## Getters
+    def sourceInfo(self, row: int) -> SourceInfo:
+        return self._sourceInfos[self._sourceIds[row]]
+
+    def source(self, row: int):
+        return self.sourceInfo(row).source
+
+    def name(self, row: int):
+        return self._names[row] if self._names[row] != '' else self.source(row)
+
+    def playRate(self, row: int):
+        return self._playRates[row]
+
+    def inPoint(self, row: int):
+        return self._inPoints[row]
+
+    def outPoint(self, row: int):
+        return self._outPoints[row]
+
+    def duration(self, row: int):
+        return self._durations[row]
+
+    def probing(self, row: int):
+        return bool(self._probing[row])
+
+    def length(self, row: int):
+        inPoint = self._inPoints[row] if 0 <= self._inPoints[row] else 0
+        outPoint = self._outPoints[row] if 0 < self._outPoints[row] else self._durations[row]
+
+        # A probing clip may have an in point after its yet unknown duration, it takes no space on the track until it is probed
+        return max(outPoint - inPoint, 0)
+
+    def valid(self, row: int):
+        duration = self._durations[row]
+        inPoint = self._inPoints[row] if 0 <= self._inPoints[row] else 0
+        outPoint = self._outPoints[row] if 0 < self._outPoints[row] else duration
+
+        return 0 < outPoint - inPoint <= duration and outPoint <= duration
+
+    def offset(self, row: int):
+        """
+        Returns the position the clip at `row` starts at on the track.
+        """
+        return self._offsets[row]
+
+    def totalLength(self):
+        """
+        Returns the length of all the clips together, which is the end of the last clip on the track.
+        """
+        return self._totalLength
+
+    def rebuildOffsets(self, start: int = 0):
+        """
+        Recompute the offsets from the lengths of the clips, dropping any accumulated rounding error.
+
+        :param int start: First row to recompute, the offsets before it are kept.
+        """
+        offset = self._offsets[start - 1] + self.length(start - 1) if 0 < start <= len(self) else 0.0
+
+        for row in range(start, len(self)):
+            self._offsets[row] = offset
+            offset += self.length(row)
+
+        self._totalLength = offset
+
+    def rowAt(self, position: float, hint: int = -1):
+        """
+        Returns the row of the clip playing at `position`, or -1 if no clip covers it.
+
+        The clip at `hint` and its neighbours are checked first, since playback moves through
+        the clips in order. Otherwise the row is found with a binary search over the offsets.
+
+        :param float position: Position on the track.
+        :param int hint: Row that is likely to cover the position, usually the current clip.
+        """
+        count = len(self)
+        if count == 0 or not(0 <= position < self._totalLength):
+            return -1
+
+        offsets = self._offsets
+        for row in (hint, hint + 1, hint - 1):
+            if 0 <= row < count and offsets[row] <= position < (offsets[row + 1] if row + 1 < count else self._totalLength):
+                return row
+
+        return self._rowAt(position, 0)
+
+    def rowsAt(self, positions: list[float]):
+        """
+        Returns the rows of the clips playing at each of `positions`, -1 where no clip covers the position.
+        Ascending runs of positions only search the part of the track after the previous result.
+
+        :param list positions: Positions on the track.
+        """
+        rows = []
+        previousPosition = None
+        lo = 0
+
+        for position in positions:
+            if previousPosition is None or position < previousPosition:
+                lo = 0
+            previousPosition = position
+
+            if not(0 <= position < self._totalLength):
+                rows.append(-1)
+                continue
+
+            row = self._rowAt(position, lo)
+            rows.append(row)
+            if row >= 0:
+                lo = row
+
+        return rows
+
+    def rowsIn(self, start: float, end: float):
+        """
+        Returns the rows of the clips overlapping the interval from `start` to `end`, the end not included.
+
+        :param float start: Start of the interval on the track.
+        :param float end: End of the interval on the track.
+        """
+        if end <= start or len(self) == 0:
+            return []
+
+        # The first clip is the one starting at or before `start`, the last one the last starting before `end`
+        first = max(bisect_right(self._offsets, start) - 1, 0)
+        last = bisect_left(self._offsets, end)
+
+        # Skip a first clip ending before the interval and clips of zero length
+        return [row for row in range(first, last) if self.length(row) > 0 and self._offsets[row] + self.length(row) > start]
+
+    def _rowAt(self, position: float, lo: int):
+        ### Last clip starting at or before `position`, clips of zero length are skipped by searching to the right
+        row = bisect_right(self._offsets, position, lo) - 1
+
+        if row < 0 or position >= self._offsets[row] + self.length(row):
+            return -1
+
+        return row
+
+    def _shiftOffsets(self, row: int, delta: float):
+        ### Move the clips starting from `row` by `delta`, after the length of the clip before them changed
+        if delta == 0:
+            return
+
+        offsets = self._offsets
+        for shifted in range(row, len(offsets)):
+            offsets[shifted] += delta
+
+        self._totalLength += delta
+
+    ## Columns
+    def sources(self):
+        return [sourceInfo.source for sourceInfo in self.sourceInfos()]
+
+    def sourceInfos(self):
+        return [self._sourceInfos[sourceId] for sourceId in self._sourceIds]
+
+    def names(self):
+        return [self.name(row) for row in range(len(self))]
+
+    def playRates(self):
+        return self._playRates.tolist()
+
+    def inPoints(self):
+        return self._inPoints.tolist()
+
+    def outPoints(self):
+        return self._outPoints.tolist()
+
+    def durations(self):
+        return self._durations.tolist()
+
+    def lengths(self):
+        return [self.length(row) for row in range(len(self))]
+
+    def offsets(self):
+        return self._offsets.tolist()
+
+    def valids(self):
+        return [self.valid(row) for row in range(len(self))]
+
+    def probings(self):
+        return [bool(probing) for probing in self._probing]
+
+    def rowsOfSource(self, source: str):
+        """
+        Returns the rows of the clips cut from `source`.
+        """
+        sourceIds = {sourceId for sourceId, sourceInfo in enumerate(self._sourceInfos) if sourceInfo is not None and sourceInfo.source == source}
+
+        return [row for row, sourceId in enumerate(self._sourceIds) if sourceId in sourceIds]
+
+    ## Validation
+    @staticmethod
+    def validInPoint(value: float, outPoint: float, duration: float, probing: bool = False):
+        """
+        Returns whether `value` can be the in point of a clip with the given out point and duration.
+        The duration of a probing clip is not known yet, any position is accepted.
+        """
+        if value == -1:
+            return True
+        elif probing:
+            return 0 <= value
+        elif outPoint >= 0:
+            return 0 <= value < outPoint
+        else:
+            return 0 <= value < duration
+
+    @staticmethod
+    def validOutPoint(value: float, inPoint: float, duration: float, probing: bool = False):
+        """
+        Returns whether `value` can be the out point of a clip with the given in point and duration.
+        The duration of a probing clip is not known yet, any position after the in point is accepted.
+        """
+        inPoint = inPoint if 0 <= inPoint else 0
+
+        return value == -1 or (inPoint < value < duration) or (probing and inPoint < value)
+
+    ## Setters
+    # Every setter returns whether the value was accepted
+    def setSourceInfo(self, row: int, sourceInfo: SourceInfo, probing: bool = False):
+        """
+        Set the record of the video file of the clip at `row`.
+        """
+        old = self.sourceInfo(row)
+        valid = self.valid(row)
+        length = self.length(row)
+
+        sourceId = self._sourceIds[row]
+        self._sourceIds[row] = self._acquireSource(sourceInfo)
+        self._releaseSource(sourceId)
+        self._durations[row] = sourceInfo.duration
+
+        changed = [attribute for attribute in ('source', 'frameRate', 'duration') if getattr(old, attribute) != getattr(sourceInfo, attribute)]
+
+        # Once the metadata of the file is known, the points accepted without it are validated against its duration
+        if not probing and old.source == sourceInfo.source:
+            if not self.validInPoint(self._inPoints[row], -1, sourceInfo.duration):
+                self._inPoints[row] = -1
+                changed.append('inPoint')
+            if not self.validOutPoint(self._outPoints[row], self._inPoints[row], sourceInfo.duration):
+                self._outPoints[row] = -1
+                changed.append('outPoint')
+
+        self._shiftOffsets(row + 1, self.length(row) - length)
+        if bool(self._probing[row]) != probing:
+            self._probing[row] = probing
+            changed.append('probing')
+
+        self._notify(row, tuple(changed), valid)
+
+        return True
+
+    def setSource(self, row: int, source: str):
+        """
+        Set the video file of the clip at `row` by its path, the file is never read on the calling thread.
+        The owner of the store resolves the metadata of the file. A store without an owner takes it from the probe cache,
+        otherwise the clip waits for it in a probing state, until `setSourceInfo()` is called with it.
+        """
+        if self._sourceSetter is not None:
+            self._sourceSetter(self, row, source)
+            return True
+
+        sourceInfo = SourceInfo.cached(source)
+
+        return self.setSourceInfo(row, sourceInfo if sourceInfo is not None else SourceInfo(source), sourceInfo is None)
+
+    def setName(self, row: int, value: str):
+        if self._names[row] != value:
+            self._names[row] = value
+            self._notify(row, ('name',), self.valid(row))
+
+        return True
+
+    def setPlayRate(self, row: int, value: float):
+        if self._playRates[row] != value:
+            self._playRates[row] = value
+            self._notify(row, ('playRate',), self.valid(row))
+
+        return True
+
+    def setInPoint(self, row: int, value: float):
+        valueValid = self.validInPoint(value, self._outPoints[row], self._durations[row], bool(self._probing[row]))
+
+        if valueValid:
+            valid = self.valid(row)
+            length = self.length(row)
+
+            self._inPoints[row] = round(value)
+            self._shiftOffsets(row + 1, self.length(row) - length)
+
+            self._notify(row, ('inPoint',), valid)
+
+        return valueValid
+
+    def setOutPoint(self, row: int, value: float):
+        valueValid = self.validOutPoint(value, self._inPoints[row], self._durations[row], bool(self._probing[row]))
+
+        if valueValid:
+            valid = self.valid(row)
+            length = self.length(row)
+
+            self._outPoints[row] = round(value)
+            self._shiftOffsets(row + 1, self.length(row) - length)
+
+            self._notify(row, ('outPoint',), valid)
+
+        return valueValid
@@ -3,6 +3,8 @@ from PySide6.QtWidgets import QTreeWidgetItem
 class VideoFileWidgetItem(QTreeWidgetItem):
     def __init__(self, source: str, *args, **kwargs):
         self._source = source
+        self._probing = False
+        self._progress: float | None = None
         super().__init__(*args, **kwargs)
 
     @property
@@ -11,4 +13,29 @@ class VideoFileWidgetItem(QTreeWidgetItem):
 
     @property
     def name(self):
-        return self.source.split('/')[-1]
\ No newline at end of file
+        return self.source.split('/')[-1]
+
+    @property
+    def probing(self):
+        return self._probing
+
+    @probing.setter
+    def probing(self, value: bool):
+        """
+        An item of a source waiting for its metadata is disabled.
+        """
+        self._probing = value
+        self.setDisabled(value or self._progress is not None)
+
+    @property
+    def progress(self):
+        return self._progress
+
+    @progress.setter
+    def progress(self, value: float | None):
+        """
+        An item of a source being converted is disabled and shows the progress of the conversion, None once it is converted.
+        """
+        self._progress = value
+        self.setText(1, self.name if value is None else f'{self.name} ({value:.0%})')
+        self.setDisabled(value is not None or self._probing)
\ No newline at end of file
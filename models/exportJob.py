@@ -0,0 +1,100 @@
+from time import monotonic
+from PySide6.QtCore import (
+    QObject,
+    QThread,
+    Signal
+)
+
+class ExportJob(QThread):
+    """
+    Runs an exporter on a thread of its own, so the GUI thread is never blocked while a video is written.
+
+    The job owns the ffmpeg processes started by its exporter: cancelling it terminates only those processes,
+    other exports and imports keep running. The outcome is reported with exactly one of the signals
+    `succeeded`, `cancelled` or `failed`, emitted before `finished`. The telemetry report of the export
+    is emitted by `reported` before the outcome, it is written next to the output too.
+    """
+    ### Constructor
+    def __init__(self, exporter: 'Exporter', parent: QObject = None):
+        super().__init__(parent)
+
+        self._exporter = exporter
+        self._startTime = 0.0
+        self._frames = 0
+        self._fps = 0.0
+        self._eta = -1.0
+
+    ### Signals
+    progressed = Signal(int, float, float, float, name='progressed', arguments=['frames', 'fps', 'progress', 'eta'])
+    succeeded = Signal(str, name='succeeded', arguments=['output'])
+    cancelled = Signal(str, name='cancelled', arguments=['output'])
+    failed = Signal(str, str, name='failed', arguments=['output', 'message'])
+    reported = Signal(dict, name='reported', arguments=['telemetry'])
+
+    ### Properties
+    @property
+    def exporter(self):
+        return self._exporter
+
+    @property
+    def output(self):
+        return self._exporter.output
+
+    @property
+    def frames(self):
+        """
+        Number of frames written so far.
+        """
+        return self._frames
+
+    @property
+    def fps(self):
+        """
+        Frames written per second, averaged since the start of the job.
+        """
+        return self._fps
+
+    @property
+    def eta(self):
+        """
+        Estimated time left in seconds, -1 until it can be estimated.
+        """
+        return self._eta
+
+    ### Functions
+    def cancel(self):
+        """
+        Stop the export, terminating the ffmpeg processes of the job. Can be called from any thread.
+        """
+        self._exporter.cancel()
+
+    def run(self):
+        # The export package imports the models, it is imported when the first job runs
+        from export import ExportCancelled
+
+        self._startTime = monotonic()
+
+        try:
+            self._exporter.export(self._progress)
+        except ExportCancelled:
+            self.reported.emit(self._exporter.telemetry.report())
+            self.cancelled.emit(self.output)
+        except Exception as e:
+            self.reported.emit(self._exporter.telemetry.report())
+            self.failed.emit(self.output, str(e))
+        else:
+            self.reported.emit(self._exporter.telemetry.report())
+            self.succeeded.emit(self.output)
+
+    def _progress(self, report: dict):
+        ### Turn a progress report of the exporter into the values of the `progressed` signal
+        elapsed = monotonic() - self._startTime
+        duration = report.get('duration', 0)
+        progress = 1.0 if report.get('end') else min(report['outTime'] / duration, 1.0) if duration > 0 else 0.0
+
+        self._frames = report['frame']
+        self._fps = self._frames / elapsed if elapsed > 0 else 0.0
+        # The time left is extrapolated from the time taken so far, after the first percent is written
+        self._eta = 0.0 if report.get('end') else elapsed * (1 - progress) / progress if progress >= 0.01 else -1.0
+
+        self.progressed.emit(self._frames, self._fps, progress, self._eta)
@@ -0,0 +1,85 @@
+from os import path, link, makedirs, remove, replace, fsync, name as osName
+from json import dump
+from shutil import copy2
+from uuid import uuid4
+
+# `FICLONE` ioctl of Linux, clones the extents of a file on filesystems supporting it (Btrfs, XFS)
+FICLONE = 0x40049409
+
+def reflink(source: str, target: str):
+    """
+    Create `target` as a copy-on-write clone of `source`, sharing its data on disk.
+
+    :param str source: Path to an existing file.
+    :param str target: Path of the clone, it must not exist.
+
+    :raises OSError: If the platform or the filesystem does not support cloning.
+    """
+    if osName != 'posix':
+        raise OSError('Cloning files is not supported on this platform')
+
+    from fcntl import ioctl
+
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        try:
+            ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            remove(target)
+            raise
+
+def linkOrCopy(source: str, target: str):
+    """
+    Make the file `source` available at `target` as cheaply as the filesystem allows: a hardlink if both are
+    on the same filesystem, a copy-on-write clone if the filesystem supports it, otherwise a copy.
+    Nothing is done if `target` already is `source`, an other file at `target` is replaced.
+    Returns how the file was made available: `same`, `link`, `reflink` or `copy`.
+
+    :param str source: Path to an existing file.
+    :param str target: Path the file is made available at.
+
+    :raises OSError: If the file could not be copied.
+    """
+    if path.exists(target) and path.samefile(source, target):
+        return 'same'
+
+    makedirs(path.dirname(path.abspath(target)), exist_ok=True)
+
+    # The file is created next to the target, and moved to it once it is complete
+    tempFile = f'{target}.{uuid4().hex[:8]}.part'
+
+    for method, create in (('link', link), ('reflink', reflink), ('copy', copy2)):
+        try:
+            create(source, tempFile)
+        except OSError:
+            if method == 'copy':
+                if path.exists(tempFile):
+                    remove(tempFile)
+                raise
+            continue
+
+        replace(tempFile, target)
+        return method
+
+def writeJson(file: str, data):
+    """
+    Write `data` into a JSON file atomically: the file is written next to its target and moved over it once it is
+    complete, so an interrupted write leaves the previous file intact.
+
+    :param str file: Path of the JSON file.
+    :param data: Data that can be written as JSON.
+
+    :raises OSError: If the file could not be written.
+    """
+    tempFile = f'{file}.{uuid4().hex[:8]}.tmp'
+
+    try:
+        with open(tempFile, 'w', encoding='utf-8') as f:
+            dump(data, f)
+            f.flush()
+            fsync(f.fileno())
+        replace(tempFile, file)
+    except OSError:
+        if path.exists(tempFile):
+            remove(tempFile)
+        raise
@@ -0,0 +1,229 @@
+from os import path, name as osName
+from shutil import which
+from subprocess import run, PIPE, DEVNULL, CalledProcessError
+from json import loads
+from fractions import Fraction
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from moviepy.editor import VideoFileClip
+import settings
+
+class ProbeError(OSError):
+    """
+    Raised when a backend is unable to read the metadata of a video file.
+    """
+
+class ProbeBackend:
+    """
+    Base class of the backends reading the metadata of video files.
+
+    `probe()` returns a dictionary with the following keys:
+     * `frames`: number of frames in the video stream
+     * `frameRate`: frames per second
+     * `duration`: length of the video in millieseconds
+     * `width`, `height`: dimensions of the video stream, 0 if unknown
+     * `codec`: name of the video codec, None if unknown
+     * `audio`: whether the file has an audio stream
+     * `audioCodec`: name of the audio codec, None if unknown or there is no audio stream
+    """
+    name = ''
+
+    def available(self) -> bool:
+        """
+        Returns whether the backend can be used on this machine.
+        """
+        return True
+
+    def probe(self, source: str) -> dict:
+        raise NotImplementedError
+
+class FFprobeBackend(ProbeBackend):
+    """
+    Reads the container and stream headers with a single `ffprobe` call.
+
+    Fallback order of the fields:
+     * `frameRate`: average frame rate of the stream, then its real base frame rate
+     * `duration`: duration of the stream, then the `DURATION` tag of the stream (Matroska, WebM), then the duration of the container
+     * `frames`: frame count of the stream, then the `NUMBER_OF_FRAMES` tag of the stream, then duration times frame rate
+    """
+    name = 'ffprobe'
+
+    @staticmethod
+    def binary():
+        """
+        Returns the ffprobe executable to use: the one set in the settings,
+        the one next to the ffmpeg used by moviepy, or the one found on the PATH.
+        """
+        if getattr(settings, 'FFPROBE_BINARY', None):
+            return settings.FFPROBE_BINARY
+
+        ffmpeg = get_setting('FFMPEG_BINARY')
+        directory, executable = path.split(ffmpeg)
+        if directory and 'ffmpeg' in executable:
+            ffprobe = path.join(directory, executable.replace('ffmpeg', 'ffprobe'))
+            if path.isfile(ffprobe):
+                return ffprobe
+
+        return which('ffprobe')
+
+    def available(self):
+        return self.binary() is not None
+
+    def probe(self, source: str):
+        cmd = [self.binary(), '-v', 'error', '-print_format', 'json', '-show_streams', '-show_format', source]
+        popen_params = {
+            'stdout': PIPE,
+            'stderr': DEVNULL,
+            'stdin': DEVNULL,
+            'check': True
+        }
+        if osName == 'nt':
+            popen_params['creationflags'] = 0x08000000
+
+        try:
+            output = loads(run(cmd, **popen_params).stdout.decode('utf8'))
+        except (OSError, ValueError, CalledProcessError) as e:
+            raise ProbeError(f'ffprobe failed to read \'{source}\': {e}')
+
+        streams: list[dict] = output.get('streams', [])
+        container: dict = output.get('format', {})
+
+        video = next((stream for stream in streams if stream.get('codec_type') == 'video' and not stream.get('disposition', {}).get('attached_pic')), None)
+        audio = next((stream for stream in streams if stream.get('codec_type') == 'audio'), None)
+
+        if video is None:
+            raise ProbeError(f'\'{source}\' has no video stream')
+
+        frameRate = self._rate(video.get('avg_frame_rate')) or self._rate(video.get('r_frame_rate'))
+        if not frameRate:
+            raise ProbeError(f'Could not determine the frame rate of \'{source}\'')
+
+        tags = {key.upper(): value for key, value in video.get('tags', {}).items()}
+
+        duration = self._number(video.get('duration')) or self._timestamp(tags.get('DURATION')) or self._number(container.get('duration'))
+        if not duration:
+            raise ProbeError(f'Could not determine the duration of \'{source}\'')
+
+        frames = int(self._number(video.get('nb_frames')) or self._number(tags.get('NUMBER_OF_FRAMES')) or round(duration * frameRate))
+
+        return {
+            'frames': frames,
+            'frameRate': frameRate,
+            'duration': duration * 1000,
+            'width': int(video.get('width', 0)),
+            'height': int(video.get('height', 0)),
+            'codec': video.get('codec_name'),
+            'audio': audio is not None,
+            'audioCodec': audio.get('codec_name') if audio else None
+        }
+
+    @staticmethod
+    def _number(value) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
+
+    @staticmethod
+    def _rate(value) -> float:
+        try:
+            return float(Fraction(value))
+        except (TypeError, ValueError, ZeroDivisionError):
+            return 0.0
+
+    @staticmethod
+    def _timestamp(value) -> float:
+        try:
+            hours, minutes, seconds = value.split(':')
+            return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        except (AttributeError, ValueError):
+            return 0.0
+
+class FFmpegHeaderBackend(ProbeBackend):
+    """
+    Parses the stream information ffmpeg prints when it opens a file, without decoding any frames.
+    The frame count is estimated from the duration and the frame rate.
+    """
+    name = 'ffmpeg'
+
+    def available(self):
+        return bool(get_setting('FFMPEG_BINARY'))
+
+    def probe(self, source: str):
+        try:
+            infos = ffmpeg_parse_infos(source)
+        except (OSError, IndexError) as e:
+            raise ProbeError(f'ffmpeg failed to read \'{source}\': {e}')
+
+        if not infos.get('video_found') or not infos.get('video_fps') or not infos.get('duration'):
+            raise ProbeError(f'\'{source}\' has no usable video stream')
+
+        width, height = infos.get('video_size', (0, 0))
+
+        return {
+            'frames': infos['video_nframes'],
+            'frameRate': infos['video_fps'],
+            'duration': infos['duration'] * 1000,
+            'width': width,
+            'height': height,
+            'codec': None,
+            'audio': infos.get('audio_found', False),
+            'audioCodec': None
+        }
+
+class MoviepyBackend(ProbeBackend):
+    """
+    Opens the file as a `VideoFileClip`. Starts the decoding and audio readers of moviepy,
+    therefore it is the slowest backend, only used if the others fail.
+    """
+    name = 'moviepy'
+
+    def probe(self, source: str):
+        try:
+            file = VideoFileClip(source)
+        except (OSError, KeyError) as e:
+            raise ProbeError(f'moviepy failed to read \'{source}\': {e}')
+
+        info = {
+            'frames': file.reader.nframes,
+            'frameRate': file.fps,
+            'duration': file.duration * 1000,
+            'width': file.w,
+            'height': file.h,
+            'codec': None,
+            'audio': file.audio is not None,
+            'audioCodec': None
+        }
+
+        file.close()
+
+        return info
+
+BACKENDS: dict[str, ProbeBackend] = {
+    backend.name: backend for backend in (FFprobeBackend(), FFmpegHeaderBackend(), MoviepyBackend())
+}
+
+def probeFile(source: str, backends: list[str] = ...):
+    """
+    Read the metadata of `source` with the first backend that succeeds.
+
+    :param str source: Path to a video file.
+    :param list[str] backends: Names of the backends to try in order. Defaults to the `PROBE_BACKENDS` setting.
+    """
+    if backends == ...:
+        backends = settings.PROBE_BACKENDS
+
+    errors = []
+    for name in backends:
+        backend = BACKENDS[name]
+        if not backend.available():
+            continue
+
+        try:
+            return backend.probe(source)
+        except ProbeError as e:
+            errors.append(str(e))
+
+    raise ProbeError(
+        f'Could not read the metadata of \'{source}\'' + (':\n' + '\n'.join(errors) if errors else ', no probe backend is available')
+    )
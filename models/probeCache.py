@@ -0,0 +1,185 @@
+from os import path, makedirs, stat, replace
+from json import load, dump
+from collections import OrderedDict
+from threading import Lock, RLock
+from .probeBackends import probeFile
+import settings
+
+class ProbeCache:
+    """
+    Persistent cache of the metadata probed from video files.
+
+    An entry is keyed by the absolute path of a file and is only valid while the size and the
+    modification time of the file are the same as they were at the time of probing.
+    The cache file records the `VERSION` of the metadata it holds, a file written with other fields is discarded on read.
+    The cache can be used from multiple threads, the files themselves are probed outside of its lock.
+    """
+    # Version of the metadata stored in the cache file, increase it whenever the probed fields change
+    VERSION = 2
+
+    _instance: 'ProbeCache' = None
+    # The shared cache is first asked for by the threads probing the files, it must be created only once
+    _instanceLock = Lock()
+
+    ### Constructor
+    def __init__(self, cacheFile: str = ..., maxEntries: int = ...):
+        self._cacheFile = cacheFile if cacheFile != ... else settings.PROBE_CACHE_FILE
+        self._maxEntries = maxEntries if maxEntries != ... else settings.PROBE_CACHE_SIZE
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._modified = False
+        self._lock = RLock()
+
+        self.read()
+
+    ### Functions
+    @classmethod
+    def instance(cls):
+        """
+        Returns the cache shared by the application, creating it on first use.
+        """
+        with cls._instanceLock:
+            if cls._instance is None:
+                cls._instance = cls()
+
+        return cls._instance
+
+    @staticmethod
+    def key(source: str):
+        """
+        Returns the key an entry of `source` is stored under.
+
+        :param str source: Path to a video file.
+        """
+        return path.normcase(path.abspath(source))
+
+    def get(self, source: str):
+        """
+        Returns the cached metadata of `source`, or None if there is no valid entry for it.
+        Entries of files that changed since they were probed are dropped.
+
+        :param str source: Path to a video file.
+        """
+        key = self.key(source)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            try:
+                fileStat = stat(source)
+            except OSError:
+                self.invalidate(source)
+                return None
+
+            if entry['size'] != fileStat.st_size or entry['mtime'] != fileStat.st_mtime_ns:
+                self.invalidate(source)
+                return None
+
+            # Mark the entry as the most recently used one
+            self._entries.move_to_end(key)
+
+            return entry['info']
+
+    def put(self, source: str, info: dict):
+        """
+        Store the metadata of `source`, evicting the least recently used entries if the cache is full.
+
+        :param str source: Path to a video file.
+        :param dict info: Metadata of the video file.
+        """
+        fileStat = stat(source)
+        key = self.key(source)
+
+        with self._lock:
+            self._entries[key] = {
+                'size': fileStat.st_size,
+                'mtime': fileStat.st_mtime_ns,
+                'info': dict(info)
+            }
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._maxEntries:
+                self._entries.popitem(last=False)
+
+            self._modified = True
+
+    def probe(self, source: str):
+        """
+        Returns the metadata of `source`, probing the file only if it has no valid entry in the cache.
+
+        :param str source: Path to a video file.
+        """
+        info = self.get(source)
+
+        if info is None:
+            info = self.probeFile(source)
+            self.put(source, info)
+
+        return info
+
+    def invalidate(self, source: str):
+        """
+        Remove the entry of `source` from the cache.
+
+        :param str source: Path to a video file.
+        """
+        with self._lock:
+            if self._entries.pop(self.key(source), None) is not None:
+                self._modified = True
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._modified = True
+
+    def read(self):
+        """
+        Read in the entries stored in the cache file. A missing, unreadable or outdated cache file results in an empty cache.
+        """
+        try:
+            with open(self._cacheFile, 'r', encoding='utf-8') as f:
+                content = load(f)
+        except (OSError, ValueError):
+            content = {}
+
+        # Entries written by an other version lack fields or hold them in an other form, they are probed again
+        if isinstance(content, dict) and content.get('version') == self.VERSION and isinstance(content.get('entries'), dict):
+            entries = content['entries']
+        else:
+            entries = {}
+
+        self._entries = OrderedDict(entries)
+        self._modified = False
+
+    def write(self):
+        """
+        Write the entries of the cache into the cache file, if they changed since the last read or write.
+        """
+        with self._lock:
+            if not self._modified:
+                return
+
+            tempFile = self._cacheFile + '.tmp'
+            try:
+                makedirs(path.dirname(path.abspath(self._cacheFile)), exist_ok=True)
+                with open(tempFile, 'w', encoding='utf-8') as f:
+                    dump({'version': self.VERSION, 'entries': self._entries}, f)
+                replace(tempFile, self._cacheFile)
+            except OSError:
+                return
+
+            self._modified = False
+
+    @staticmethod
+    def probeFile(source: str):
+        """
+        Read the metadata of `source` with the configured probe backends.
+
+        :param str source: Path to a video file.
+        """
+        return probeFile(source)
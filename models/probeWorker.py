@@ -0,0 +1,95 @@
+from PySide6.QtCore import (
+    QObject,
+    QRunnable,
+    QThread,
+    QThreadPool,
+    Signal,
+    Slot
+)
+from .sourceInfo import SourceInfo
+
+class ProbeTask(QRunnable):
+    """
+    Probes a single video file on a thread of a `QThreadPool` and reports the result through its `ProbeWorker`.
+    """
+    def __init__(self, source: str, worker: 'ProbeWorker'):
+        super().__init__()
+        self._source = source
+        self._worker = worker
+
+    def run(self):
+        # Any error of a probe backend fails the file, otherwise it would be waited for forever
+        try:
+            sourceInfo = SourceInfo.probe(self._source)
+        except Exception as e:
+            self._worker._taskFailed.emit(self._source, str(e))
+        else:
+            self._worker._taskFinished.emit(self._source, sourceInfo)
+
+class ProbeWorker(QObject):
+    """
+    Probes video files on a pool of threads, so the GUI thread is never blocked by reading metadata.
+    The results are reported with signals on the thread of the worker, in the order the files finish.
+    """
+    ### Constructor
+    def __init__(self, parent: QObject = None, maxThreads: int = ...):
+        super().__init__(parent)
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(maxThreads if maxThreads != ... else QThread.idealThreadCount())
+        self._pending: set[str] = set()
+
+        # Signals emitted by the tasks, delivered to the thread of the worker through queued connections
+        self._taskFinished.connect(self._finished)
+        self._taskFailed.connect(self._failed)
+
+    ### Signals
+    probed = Signal(str, object, name='probed', arguments=['source', 'sourceInfo'])
+    failed = Signal(str, str, name='failed', arguments=['source', 'message'])
+    _taskFinished = Signal(str, object)
+    _taskFailed = Signal(str, str)
+
+    ### Functions
+    def probe(self, source: str):
+        """
+        Queue `source` for probing. Files that are already queued are not probed twice.
+
+        :param str source: Path to a video file.
+        """
+        if source in self._pending:
+            return
+
+        self._pending.add(source)
+        self._pool.start(ProbeTask(source, self))
+
+    def isPending(self, source: str):
+        """
+        Returns whether `source` is queued or being probed.
+
+        :param str source: Path to a video file.
+        """
+        return source in self._pending
+
+    def cancel(self):
+        """
+        Drop the files still waiting to be probed, e.g. when the application is closed. Files being probed are finished.
+        """
+        self._pool.clear()
+
+    def waitForDone(self, msecs: int = -1):
+        """
+        Block until every queued file is probed.
+
+        :param int msecs: Maximum time to wait in millieseconds, -1 waits without a limit.
+        """
+        return self._pool.waitForDone(msecs)
+
+    @Slot(str, object)
+    def _finished(self, source: str, sourceInfo: SourceInfo):
+        self._pending.discard(source)
+        self.probed.emit(source, sourceInfo)
+
+    @Slot(str, str)
+    def _failed(self, source: str, message: str):
+        self._pending.discard(source)
+        self.failed.emit(source, message)
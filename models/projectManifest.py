@@ -0,0 +1,188 @@
+from os import path, stat
+from json import load
+from hashlib import sha1
+from .mediaFiles import linkOrCopy, writeJson
+from .sourceInfo import SourceInfo
+import settings
+
+# Size of the blocks read from the start, the middle and the end of a file for its fingerprint
+SAMPLE_SIZE = 2**20
+
+def fingerprint(file: str):
+    """
+    Returns a fingerprint of the content of `file`: a hash of its size and of a block read from its start, middle and end.
+    Reading a few blocks is enough to tell apart recordings of the same size, without reading gigabytes of footage.
+
+    :param str file: Path to an existing file.
+
+    :raises OSError: If the file can not be read.
+    """
+    size = path.getsize(file)
+    digest = sha1(str(size).encode('ascii'))
+
+    with open(file, 'rb') as f:
+        for offset in dict.fromkeys((0, max((size - SAMPLE_SIZE) // 2, 0), max(size - SAMPLE_SIZE, 0))):
+            f.seek(offset)
+            digest.update(f.read(SAMPLE_SIZE))
+
+    return digest.hexdigest()
+
+class ProjectManifest:
+    """
+    Media files of a saved project, stored next to its clips (`MANIFEST_FILE`).
+
+    An entry is keyed by the name of the media file in the project. It records the fingerprint of the content of the file
+    (see `fingerprint()`), the size and the modification time of the file in the project and of the file it was saved from.
+    A media file is only linked or copied into the project when it is new or changed since the last save, files whose size
+    and modification time are the same as recorded are not read at all, so saving a project with unchanged media does not
+    touch the footage.
+    """
+    ### Constructor
+    def __init__(self, directory: str):
+        self._directory = directory
+        self._entries: dict[str, dict] = {}
+
+        self.read()
+
+    ### Properties
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def file(self):
+        """
+        Path of the manifest file.
+        """
+        return path.join(self._directory, settings.MANIFEST_FILE)
+
+    @property
+    def entries(self):
+        """
+        Entries of the media files, by their names in the project.
+        """
+        return dict(self._entries)
+
+    ### Functions
+    def entry(self, name: str):
+        """
+        Returns the entry of a media file, None if the file is not in the manifest.
+
+        :param str name: Name of the media file in the project.
+        """
+        return self._entries.get(name)
+
+    def info(self, name: str):
+        """
+        Returns the metadata recorded for a media file, None if there is none, it lacks fields of `SourceInfo`
+        or the file changed since it was saved. Only the size and the modification time of the file are checked, its content is not read.
+
+        :param str name: Name of the media file in the project.
+        """
+        entry = self._entries.get(name)
+        if entry is None or not isinstance(entry.get('info'), dict) or not SourceInfo.isComplete(entry['info']):
+            return None
+
+        try:
+            fileStat = stat(path.join(self._directory, name))
+        except OSError:
+            return None
+
+        if entry.get('size') != fileStat.st_size or entry.get('mtime') != fileStat.st_mtime_ns:
+            return None
+
+        return entry['info']
+
+    def update(self, name: str, source: str, info: dict = None):
+        """
+        Save `source` into the project as `name`, if it is new or changed since it was last saved.
+        Returns how the file was saved: `unchanged` if it was not touched, otherwise as returned by `linkOrCopy()`.
+
+        :param str name: Name of the media file in the project.
+        :param str source: Path to the media file to save.
+        :param dict info: Optionally the metadata of the file, restored when the project is opened (see `info()`).
+
+        :raises OSError: If the file could not be saved.
+        """
+        target = path.join(self._directory, name)
+        entry = self._entries.get(name)
+        sourceStat = stat(source)
+
+        if entry is not None and self._matches(entry, source, sourceStat, target):
+            if info is not None:
+                entry['info'] = dict(info)
+            return 'unchanged'
+
+        # The fingerprint is only computed again if the file changed since it was recorded
+        if entry is not None and entry.get('source') == path.abspath(source) and entry.get('sourceSize') == sourceStat.st_size and entry.get('sourceMtime') == sourceStat.st_mtime_ns:
+            contentFingerprint = entry['fingerprint']
+        else:
+            contentFingerprint = fingerprint(source)
+
+        # A file with the same content may already be in the project, e.g. a manifest lost or written by an older version
+        try:
+            sameContent = path.getsize(target) == sourceStat.st_size and fingerprint(target) == contentFingerprint
+        except OSError:
+            sameContent = False
+
+        method = 'unchanged' if sameContent else linkOrCopy(source, target)
+        targetStat = stat(target)
+
+        # Anything else recorded about the file is kept while its content is the same
+        self._entries[name] = {
+            **(entry if entry is not None and entry.get('fingerprint') == contentFingerprint else {}),
+            'fingerprint': contentFingerprint,
+            'size': targetStat.st_size,
+            'mtime': targetStat.st_mtime_ns,
+            'source': path.abspath(source),
+            'sourceSize': sourceStat.st_size,
+            'sourceMtime': sourceStat.st_mtime_ns
+        }
+        if info is not None:
+            self._entries[name]['info'] = dict(info)
+
+        return method
+
+    def retain(self, names: list[str]):
+        """
+        Drop the entries of the media files not in `names`, e.g. the sources removed from the project.
+        The files themselves are kept in the project directory.
+
+        :param list names: Names of the media files of the project.
+        """
+        self._entries = {name: entry for name, entry in self._entries.items() if name in names}
+
+    def read(self):
+        """
+        Read in the entries stored in the manifest file. A missing or unreadable manifest results in an empty manifest.
+        """
+        try:
+            with open(self.file, 'r', encoding='utf-8') as f:
+                entries = load(f)
+        except (OSError, ValueError):
+            entries = {}
+
+        self._entries = entries if isinstance(entries, dict) else {}
+
+    def write(self):
+        """
+        Write the entries into the manifest file (see `writeJson()`).
+
+        :raises OSError: If the file could not be written.
+        """
+        writeJson(self.file, self._entries)
+
+    def _matches(self, entry: dict, source: str, sourceStat, target: str):
+        ### Whether the saved file is still the one recorded, and it was saved from the same, unchanged source
+        try:
+            targetStat = stat(target)
+        except OSError:
+            return False
+
+        return (
+            entry.get('source') == path.abspath(source) and
+            entry.get('sourceSize') == sourceStat.st_size and
+            entry.get('sourceMtime') == sourceStat.st_mtime_ns and
+            entry.get('size') == targetStat.st_size and
+            entry.get('mtime') == targetStat.st_mtime_ns
+        )
@@ -0,0 +1,185 @@
+from os import path, remove
+from subprocess import Popen
+from threading import Lock
+from PySide6.QtCore import (
+    QObject,
+    QRunnable,
+    QThread,
+    QThreadPool,
+    Signal,
+    Slot
+)
+import settings
+
+class RemuxTask(QRunnable):
+    """
+    Copies the streams of a single video file into an MP4 file (`ffmpeg -c copy`) on a thread of a `QThreadPool`,
+    and reports its progress and result through its `RemuxQueue`.
+    """
+    def __init__(self, source: str, output: str, queue: 'RemuxQueue', priority: int = 0):
+        super().__init__()
+        self._source = source
+        self._output = output
+        self._queue = queue
+        self.priority = priority
+
+        # The task is owned by its queue, it can be taken back from the pool to change its priority
+        self.setAutoDelete(False)
+
+    @property
+    def output(self):
+        return self._output
+
+    def run(self):
+        # The export package imports the models, it is imported when the first file is remuxed
+        from export import FFmpegError, runFFmpeg
+
+        if self._queue._cancelled:
+            return
+
+        try:
+            size = path.getsize(self._source)
+        except OSError as e:
+            self._queue._taskFailed.emit(self._source, str(e))
+            return
+
+        # The streams are copied, the output grows about as large as the source
+        def progress(report: dict):
+            self._queue._taskProgressed.emit(self._source, min(report['size'] / size, 0.99) if size > 0 else 0.0)
+
+        try:
+            runFFmpeg(['-i', self._source, '-c', 'copy', '-f', 'mp4', self._output], progress, self._queue._started)
+        except FFmpegError as e:
+            if path.exists(self._output):
+                remove(self._output)
+            self._queue._taskFailed.emit(self._source, str(e))
+        else:
+            self._queue._taskFinished.emit(self._source, self._output)
+        finally:
+            self._queue._stopped()
+
+class RemuxQueue(QObject):
+    """
+    Remuxes video files (e.g. the `.dav` recordings of the NVR) into MP4 files on a pool of threads,
+    so the GUI thread is never blocked by the conversion. Remuxing only copies the streams, it is limited by the disk
+    rather than the CPU, therefore at most `REMUX_MAX_JOBS` files are remuxed at once.
+    Files needed sooner are remuxed first, a queued file is moved ahead when it is requested with a higher priority.
+    The results are reported with signals on the thread of the queue, in the order the files finish.
+    """
+    # Priorities of the files, by how soon they are needed
+    ADJACENT = 1
+    TIMELINE = 2
+
+    ### Constructor
+    def __init__(self, parent: QObject = None, maxThreads: int = ...):
+        super().__init__(parent)
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(maxThreads if maxThreads != ... else max(min(QThread.idealThreadCount(), getattr(settings, 'REMUX_MAX_JOBS', 4)), 1))
+        self._tasks: dict[str, RemuxTask] = {}
+
+        # Running ffmpeg processes, they are terminated when the queue is cancelled
+        self._processes: set[Popen] = set()
+        self._lock = Lock()
+        self._cancelled = False
+
+        # Signals emitted by the tasks, delivered to the thread of the queue through queued connections
+        self._taskProgressed.connect(self._progressed)
+        self._taskFinished.connect(self._finished)
+        self._taskFailed.connect(self._failed)
+
+    ### Signals
+    progressed = Signal(str, str, float, name='progressed', arguments=['source', 'output', 'progress'])
+    remuxed = Signal(str, str, name='remuxed', arguments=['source', 'output'])
+    failed = Signal(str, str, str, name='failed', arguments=['source', 'output', 'message'])
+    _taskProgressed = Signal(str, float)
+    _taskFinished = Signal(str, str)
+    _taskFailed = Signal(str, str)
+
+    ### Functions
+    def remux(self, source: str, output: str, priority: int = 0):
+        """
+        Queue `source` for remuxing into `output`. Files that are already queued are not remuxed twice,
+        but a file still waiting in the queue is moved ahead if `priority` is higher than before.
+
+        :param str source: Path to a video file.
+        :param str output: Path of the MP4 file to write.
+        :param int priority: How soon the file is needed, e.g. `TIMELINE` or `ADJACENT`. Higher priorities are remuxed first.
+        """
+        task = self._tasks.get(source)
+
+        if task is not None:
+            # A running task can not be taken back, it is finishing anyway
+            if priority > task.priority and self._pool.tryTake(task):
+                task.priority = priority
+                self._pool.start(task, priority)
+            return
+
+        task = RemuxTask(source, output, self, priority)
+        self._tasks[source] = task
+        self._pool.start(task, priority)
+
+    def isPending(self, source: str):
+        """
+        Returns whether `source` is queued or being remuxed.
+
+        :param str source: Path to a video file.
+        """
+        return source in self._tasks
+
+    def pendingCount(self):
+        """
+        Returns the number of files queued or being remuxed.
+        """
+        return len(self._tasks)
+
+    def cancel(self):
+        """
+        Drop the queued files and terminate the running ffmpeg processes, e.g. when the window is closed.
+        """
+        self._cancelled = True
+        self._pool.clear()
+
+        with self._lock:
+            processes = list(self._processes)
+
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+
+    def waitForDone(self, msecs: int = -1):
+        """
+        Block until every queued file is remuxed.
+
+        :param int msecs: Maximum time to wait in millieseconds, -1 waits without a limit.
+        """
+        return self._pool.waitForDone(msecs)
+
+    def _started(self, process: Popen):
+        ### Called by the tasks with their ffmpeg process
+        with self._lock:
+            self._processes.add(process)
+
+        # Cancelled while the process was starting
+        if self._cancelled:
+            process.kill()
+
+    def _stopped(self):
+        ### Called by the tasks when their ffmpeg process exited
+        with self._lock:
+            self._processes = {process for process in self._processes if process.poll() is None}
+
+    @Slot(str, float)
+    def _progressed(self, source: str, progress: float):
+        if source in self._tasks:
+            self.progressed.emit(source, self._tasks[source].output, progress)
+
+    @Slot(str, str)
+    def _finished(self, source: str, output: str):
+        self._tasks.pop(source, None)
+        self.remuxed.emit(source, output)
+
+    @Slot(str, str)
+    def _failed(self, source: str, message: str):
+        task = self._tasks.pop(source, None)
+        self.failed.emit(source, task.output if task is not None else '', message)
@@ -0,0 +1,66 @@
+from dataclasses import dataclass, asdict
+from .probeCache import ProbeCache
+
+@dataclass(frozen=True)
+class SourceInfo:
+    """
+    Immutable metadata of a video file. A single record is shared by every clip cut from the same file,
+    so splitting, duplicating or re-sourcing a clip never reads the file again.
+    """
+    source: str
+    frames: int = 0
+    frameRate: float = 0
+    duration: float = 0.0
+    width: int = 0
+    height: int = 0
+    codec: str | None = None
+    audio: bool = False
+    audioCodec: str | None = None
+
+    @classmethod
+    def fromDict(cls, source: str, info: dict):
+        """
+        Create a record from a dictionary of metadata, as returned by the probe backends.
+
+        :param str source: Path to the video file.
+        :param dict info: Metadata of the video file. Unknown keys are ignored, missing ones get their default value.
+        """
+        return cls(source, **{key: value for key, value in info.items() if key in cls.__dataclass_fields__ and key != 'source'})
+
+    @classmethod
+    def isComplete(cls, info: dict):
+        """
+        Returns whether a dictionary of metadata holds every field of a record, e.g. metadata saved by an older version lacks some.
+
+        :param dict info: Metadata of a video file.
+        """
+        return all(key in info for key in cls.__dataclass_fields__ if key != 'source')
+
+    @classmethod
+    def cached(cls, source: str):
+        """
+        Returns the record of `source` if the probe cache has valid metadata of it, None otherwise. The file is not read.
+
+        :param str source: Path to the video file.
+        """
+        info = ProbeCache.instance().get(source)
+
+        return cls.fromDict(source, info) if info is not None else None
+
+    @classmethod
+    def probe(cls, source: str):
+        """
+        Create the record of `source` through the probe cache.
+
+        :param str source: Path to the video file.
+        """
+        return cls.fromDict(source, ProbeCache.instance().probe(source))
+
+    def toDict(self):
+        """
+        Returns the metadata as a dictionary without the path of the file.
+        """
+        info = asdict(self)
+        del info['source']
+
+        return info
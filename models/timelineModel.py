@@ -10,8 +10,12 @@ from PySide6.QtCore import (
     Slot
 )
 from typing import Any, overload
+from contextlib import contextmanager
 from enum import IntEnum, auto, unique
 from .clipInfo import ClipInfo
+from .sourceInfo import SourceInfo
+from .clipStore import ClipStore
+from .probeWorker import ProbeWorker
 
 TRACK_ID = 128
 
@@ -29,7 +33,23 @@ class TimelineModel(QAbstractItemModel):
         self._trackHeight = 100
         self._maxDuration = 86400000 # 60 seconds * 60 minutes (3600 seconds) * 24 hour (86400 seconds) * 1000 (86 400 000 millieseconds)
         self._storedSources : list[str] = []
-        self._clips: list[ClipInfo] = []
+        self._sourceInfos: dict[str, SourceInfo] = {}
+        # Sources whose file is created on demand (e.g. converted recordings), they are requested instead of probed
+        self._deferredSources: set[str] = set()
+        # Clips of every track, the position, current and selected clip refer to the current track
+        self._tracks: list[ClipStore] = [ClipStore(self._setClipSource)]
+        self._currentTrack = 0
+        # Views of the current and the selected clip handed to QML, the stores do not keep their views alive
+        self._currentView: ClipInfo | None = None
+        self._selectedView: ClipInfo | None = None
+
+        # Changed rows and roles of each track collected while edits are batched, emitted as a single dataChanged per track
+        self._batchDepth = 0
+        self._pendingChanges: dict[int, tuple[int, int, set]] = {}
+
+        self._prober = ProbeWorker(self)
+        self._prober.probed.connect(self.sourceProbeFinished)
+        self._prober.failed.connect(self.sourceProbeFailed)
     
     ### Destructor
     def __del__(self):
@@ -57,6 +77,7 @@ class TimelineModel(QAbstractItemModel):
         LengthRole = auto()
         OffsetRole = auto()
         ValidRole = auto()
+        ProbingRole = auto()
     
     ### Signals
     positionChanged = Signal(int, name='positionChanged', arguments=['position'])
@@ -68,9 +89,27 @@ class TimelineModel(QAbstractItemModel):
     trackHeightChanged = Signal(int, name='trackHeightChanged', arguments=['trackHeight'])
     maxDurationChanged = Signal(int, name='maxDurationChanged', arguments=['maxDuration'])
     storedSourcesChanged = Signal(name='storedClipsChanged')
+    currentTrackChanged = Signal(int, name='currentTrackChanged', arguments=['track'])
+    trackCountChanged = Signal(int, name='trackCountChanged', arguments=['trackCount'])
+    sourceProbed = Signal(str, name='sourceProbed', arguments=['source'])
+    sourceFailed = Signal(str, str, name='sourceFailed', arguments=['source', 'message'])
+    sourceRequested = Signal(str, name='sourceRequested', arguments=['source'])
 
     ### Properties
+    @property
+    def _clips(self) -> ClipStore:
+        ### Clips of the current track
+        return self._tracks[self._currentTrack]
+
     ## Getters
+    @Property(int, notify=currentTrackChanged)
+    def currentTrack(self):
+        return self._currentTrack
+
+    @Property(int, notify=trackCountChanged)
+    def trackCount(self):
+        return len(self._tracks)
+
     @Property(int, notify=positionChanged)
     def position(self):
         return self._position
@@ -83,12 +122,16 @@ class TimelineModel(QAbstractItemModel):
     def currentClip(self):
         if not(0 <= self._currentIndex < len(self._clips)):
             return None
-            
-        return self._clips[self._currentIndex]
+
+        self._currentView = self._clips.view(self._currentIndex)
+        return self._currentView
 
     @Property(int)
     def currentOffset(self):
-        return self.data(self.createIndex(self._currentIndex, 0, 0), self.Roles.OffsetRole)
+        if not(0 <= self._currentIndex < len(self._clips)):
+            return 0
+
+        return self._clips.offset(self._currentIndex)
 
     @Property(int, notify=selectedIndexChanged)
     def selectedIndex(self):
@@ -98,8 +141,9 @@ class TimelineModel(QAbstractItemModel):
     def selectedClip(self):
         if self._selectedIndex == -1:
             return None
-        
-        return self._clips[self._selectedIndex]
+
+        self._selectedView = self._clips.view(self._selectedIndex)
+        return self._selectedView
 
     @Property(float, notify=scaleFactorChanged)
     def scaleFactor(self):
@@ -118,14 +162,27 @@ class TimelineModel(QAbstractItemModel):
         return self._storedSources
 
     ## Setters
+    @currentTrack.setter
+    def currentTrack(self, value: int):
+        if not(0 <= value < len(self._tracks)):
+            raise IndexError(f'Value must be between 0 and {len(self._tracks)-1}')
+        elif self._currentTrack != value:
+            # The selection does not carry over to another track, the current clip is the one at the position
+            self.selectedIndex = -1
+
+            self._currentTrack = value
+            self._currentIndex = self._clips.rowAt(self._position)
+            self.currentTrackChanged.emit(self._currentTrack)
+            self.currentIndexChanged.emit(self._currentIndex)
+            self.currentClipChanged.emit(self.currentClip)
+
     @position.setter
     def position(self, value: int):
         if 0 <= value <= self._maxDuration and self._position != value:
             self._position = value
             self.positionChanged.emit(self._position)
 
-            clip = self.atPosition(self._position)
-            self.currentClip = clip
+            self.currentIndex = self._clips.rowAt(self._position, self._currentIndex)
 
     @currentIndex.setter
     def currentIndex(self, value: int):
@@ -134,10 +191,7 @@ class TimelineModel(QAbstractItemModel):
         if self._currentIndex != value:
             self._currentIndex = value
             self.currentIndexChanged.emit(self._currentIndex)
-            if self._currentIndex == -1:
-                self.currentClipChanged.emit(None)
-            else:
-                self.currentClipChanged.emit(self._clips[self._currentIndex])
+            self.currentClipChanged.emit(self.currentClip)
         
 
     @currentClip.setter
@@ -155,10 +209,7 @@ class TimelineModel(QAbstractItemModel):
         elif self._selectedIndex != value:
             self._selectedIndex = value
             self.selectedIndexChanged.emit(self._selectedIndex)
-            if self._selectedIndex == -1:
-                self.selectedClipChanged.emit(None)
-            else:
-                self.selectedClipChanged.emit(self._clips[self._selectedIndex])
+            self.selectedClipChanged.emit(self.selectedClip)
 
     @selectedClip.setter
     def selectedClip(self, value: ClipInfo):
@@ -200,14 +251,14 @@ class TimelineModel(QAbstractItemModel):
         # QModelIndex is valid, if it is the part of an object with non-negative row and column indecies
         if isinstance(parent, QModelIndex) and parent.isValid():
             # If row index is out of range of the underlying list, the index is invalid
-            if not(0 <= row < len(self._clips)):
+            if not(0 <= parent.row() < len(self._tracks)) or not(0 <= row < len(self._tracks[parent.row()])):
                 return result
 
             # A valid parent indicates that the item is a clip
-            # Index of clip: row(index in list), coulmn(0), and row of parent(currently there is only 1 track)
+            # Index of clip: row(index in list), coulmn(0), and row of parent(the track the clip is on)
             result = self.createIndex(row, column, parent.row())
-        elif row == 0:
-            # An invalid parent indicates that the item is the rrack
+        elif 0 <= row < len(self._tracks):
+            # An invalid parent indicates that the item is a track
             # A track has no valid parent and an internal id equal to TRACK_ID constant
             result = self.createIndex(row, column, TRACK_ID)
 
@@ -235,10 +286,10 @@ class TimelineModel(QAbstractItemModel):
                 return 0
             
             # Number of clips in a track
-            return len(self._clips)
+            return len(self._tracks[parent.row()]) if parent.row() < len(self._tracks) else 0
         
-        # Number of tracks (currently 1)
-        return 1
+        # Number of tracks
+        return len(self._tracks)
 
     def columnCount(self, parent: QModelIndex = ...) -> int:
         # Columns are unused
@@ -266,70 +317,81 @@ class TimelineModel(QAbstractItemModel):
             # An index with an internal id, that is less than the TRACK_ID constant is a clip
             if index.internalId() < TRACK_ID:
                 # If row index is out of range of the underlying list, the index is invalid
-                if not(0 <= index.row() < len(self._clips)):
+                if not(index.internalId() < len(self._tracks) and 0 <= index.row() < len(self._tracks[index.internalId()])):
                     return None
 
-                # Get the ClipInfo object under the row index
-                clip = self._clips[index.row()]
+                # Read the row straight from the clip store of the track, a ClipInfo view is only created if asked for
+                row = index.row()
+                clips = self._tracks[index.internalId()]
 
                 # Return data for the matching role value
                 match role:
                     case Qt.ItemDataRole.DisplayRole:
-                        return clip.name
+                        return clips.name(row)
                     case self.Roles.SourceRole:
-                        return clip.source
+                        return clips.source(row)
                     case self.Roles.NameRole:
-                        return clip.name
+                        return clips.name(row)
                     case self.Roles.FramesRole:
-                        return clip.totalFrames
+                        return clips.sourceInfo(row).frames
                     case self.Roles.FrameRateRole:
-                        return clip.frameRate
+                        return clips.sourceInfo(row).frameRate
                     case self.Roles.PlayRateRole:
-                        return clip.playRate
+                        return clips.playRate(row)
                     case self.Roles.InPointRole:
-                        return clip.inPoint
+                        return clips.inPoint(row)
                     case self.Roles.OutPointRole:
-                        return clip.outPoint
+                        return clips.outPoint(row)
                     case self.Roles.DurationRole:
-                        return clip.duration
+                        return clips.duration(row)
                     case self.Roles.LengthRole:
-                        return clip.length
+                        return clips.length(row)
                     case self.Roles.OffsetRole:
-                        return sum([self._clips[i].length for i in range(0, index.row())])
+                        return clips.offset(row)
                     case self.Roles.ValidRole:
-                        return clip.valid
+                        return clips.valid(row)
+                    case self.Roles.ProbingRole:
+                        return clips.probing(row)
                     case _:
-                        return clip;
+                        return clips.view(row);
             else:
                 # An index with an internal id equal to or greater than the TRACK_ID constant is a track
+                if not(0 <= index.row() < len(self._tracks)):
+                    return None
+
+                clips = self._tracks[index.row()]
+
                 # Return data for the matching role value
                 match role:
                     case Qt.ItemDataRole.DisplayRole:
                         return "VideoTrack"
                     case self.Roles.SourceRole:
-                        return [clip.source for clip in self._clips]
+                        return clips.sources()
                     case self.Roles.NameRole:
-                        return [clip.name for clip in self._clips]
+                        return clips.names()
                     case self.Roles.FramesRole:
-                        return [clip.totalFrames for clip in self._clips]
+                        return [sourceInfo.frames for sourceInfo in clips.sourceInfos()]
                     case self.Roles.FrameRateRole:
-                        return [clip.frameRate for clip in self._clips]
+                        return [sourceInfo.frameRate for sourceInfo in clips.sourceInfos()]
                     case self.Roles.PlayRateRole:
-                        return [clip.playRate for clip in self._clips]
+                        return clips.playRates()
                     case self.Roles.InPointRole:
-                        return [clip.inPoint for clip in self._clips]
+                        return clips.inPoints()
                     case self.Roles.OutPointRole:
-                        return [clip.outPoint for clip in self._clips]
+                        return clips.outPoints()
                     case self.Roles.DurationRole:
-                        return [clip.duration for clip in self._clips]
+                        return clips.durations()
                     case self.Roles.LengthRole:
-                        return [clip.length for clip in self._clips]
+                        return clips.lengths()
                     case self.Roles.OffsetRole:
-                        return [sum([self._clips[i].length for i in range(0, self._clips.index(clip))]) for clip in self._clips] 
+                        return clips.offsets()
                     case self.Roles.ValidRole:
-                        return [clip.valid for clip in self._clips]
+                        return clips.valids()
+                    case self.Roles.ProbingRole:
+                        return clips.probings()
                     case _:
-                        return self._clips;
+                        # Creates a view of every clip, prefer the roles above
+                        return [clips.view(row) for row in range(len(clips))];
         return None
 
     def setData(self, index: QModelIndex | QPersistentModelIndex, value: Any, role: int = ...) -> bool:
@@ -338,51 +400,59 @@ class TimelineModel(QAbstractItemModel):
             # An index with an internal id, that is less than the TRACK_ID constant is a clip
             if index.internalId() < TRACK_ID:
                 # If row index is out of range of the underlying list, the index is invalid
-                if not(0 <= index.row() < len(self._clips)):
-                    return None
+                if not(index.internalId() < len(self._tracks) and 0 <= index.row() < len(self._tracks[index.internalId()])):
+                    return False
 
                 clipIndex = index.row()
-
+                track = index.internalId()
+                clips = self._tracks[track]
 
                 match role:
                     case Qt.ItemDataRole.DisplayRole:
-                        self._clips[clipIndex].name = value
-                        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+                        clips.setName(clipIndex, value)
+                        self._emitChanged(clipIndex, clipIndex, [Qt.ItemDataRole.DisplayRole, self.Roles.NameRole], track)
                     case self.Roles.SourceRole:
-                        changedRoles = [self.Roles.SourceRole, self.Roles.FramesRole, self.Roles.FrameRateRole, self.Roles.DurationRole, self.Roles.LengthRole, self.Roles.ValidRole]
-
-                        self._clips[clipIndex].source = value
-
-                        self.dataChanged.emit(index, index, changedRoles)
+                        changedRoles = [self.Roles.SourceRole, self.Roles.FramesRole, self.Roles.FrameRateRole, self.Roles.DurationRole, self.Roles.LengthRole, self.Roles.ValidRole, self.Roles.ProbingRole]
+                        length = clips.length(clipIndex)
+                        sourceInfo = self._sourceInfos.get(value)
+
+                        # A source without metadata is probed (or requested, if deferred) in the background,
+                        # the clip waits for its metadata in a probing state
+                        if sourceInfo is None:
+                            clips.setSourceInfo(clipIndex, SourceInfo(value), probing=True)
+                            self._probeSource(value)
+                        else:
+                            clips.setSourceInfo(clipIndex, sourceInfo)
+
+                        self._clipChanged(clipIndex, changedRoles, length, track)
                     case self.Roles.NameRole:
-                        self._clips[clipIndex].name = value
-                        self.dataChanged.emit(index, index, [self.Roles.NameRole])
+                        clips.setName(clipIndex, value)
+                        self._emitChanged(clipIndex, clipIndex, [Qt.ItemDataRole.DisplayRole, self.Roles.NameRole], track)
                     case self.Roles.PlayRateRole:
-                        self._clips[clipIndex].playRate = value
-                        self.dataChanged.emit(index, index, [self.Roles.PlayRateRole])
+                        clips.setPlayRate(clipIndex, value)
+                        self._emitChanged(clipIndex, clipIndex, [self.Roles.PlayRateRole], track)
                     case self.Roles.InPointRole:
-                        self.layoutAboutToBeChanged.emit()
-
-                        self._clips[clipIndex].inPoint = value
-                        self.dataChanged.emit(index, index, [self.Roles.InPointRole, self.Roles.LengthRole])
+                        length = clips.length(clipIndex)
 
+                        if not clips.setInPoint(clipIndex, value):
+                            return False
 
-                        self.dataChanged.emit(self.createIndex(clipIndex + 1, 0, 0), self.createIndex(len(self._clips), 0, 0), [self.Roles.OffsetRole])
-                            
-                        self.layoutChanged.emit()
+                        self._clipChanged(clipIndex, [self.Roles.InPointRole, self.Roles.LengthRole, self.Roles.ValidRole], length, track)
                     case self.Roles.OutPointRole:
-                        self.layoutAboutToBeChanged.emit()
-
-                        self._clips[clipIndex].outPoint = value
-                        self.dataChanged.emit(index, index, [self.Roles.OutPointRole, self.Roles.LengthRole])
+                        length = clips.length(clipIndex)
 
-                        self.dataChanged.emit(self.createIndex(clipIndex + 1, 0, 0), self.createIndex(len(self._clips), 0, 0), [self.Roles.OffsetRole])
+                        if not clips.setOutPoint(clipIndex, value):
+                            return False
 
-                        self.layoutChanged.emit()
+                        self._clipChanged(clipIndex, [self.Roles.OutPointRole, self.Roles.LengthRole, self.Roles.ValidRole], length, track)
                     case _:
                         if isinstance(value, ClipInfo):
-                            self._clips[clipIndex] = value
-                            self.dataChanged.emit(index, index)
+                            # The clip is copied into the store, views of the replaced row are detached
+                            length = clips.length(clipIndex)
+
+                            clips.remove(clipIndex)
+                            clips.insert(clipIndex, *value.record())
+                            self._clipChanged(clipIndex, [], length, track)
                             return True
 
                         return False
@@ -396,15 +466,13 @@ class TimelineModel(QAbstractItemModel):
     def insertRows(self, row: int, count: int, parent: QModelIndex | QPersistentModelIndex = ...) -> bool:
         # QModelIndex is valid, if it is the part of an object with non-negative row and column indecies
         # Only a track has children, a track has an internal id equal to or greater than the TRACK_ID constant
-        if parent.isValid() and parent.internalId() >= TRACK_ID:
+        if parent.isValid() and parent.internalId() >= TRACK_ID and parent.row() < len(self._tracks):
             # Begin row insertion
             self.beginInsertRows(parent, row, row+count-1)
             
             # Change underlying list
             for i in range(row, row+count):
-                self._clips.insert(i, ClipInfo())
-
-            self.dataChanged.emit(self.createIndex(row+count, 0, 0), self.createIndex(len(self._clips), 0, 0), self.Roles.OffsetRole)
+                self._tracks[parent.row()].insert(i, SourceInfo(''))
 
             # End row insertion
             self.endInsertRows()
@@ -418,19 +486,20 @@ class TimelineModel(QAbstractItemModel):
     def removeRows(self, row: int, count: int, parent:QModelIndex | QPersistentModelIndex = ...) -> bool:
         # QModelIndex is valid, if it is the part of an object with non-negative row and column indecies
         # Only a track has children, a track has an internal id equal to or greater than the TRACK_ID constant
-        if parent.isValid() and parent.internalId() >= TRACK_ID:
+        if parent.isValid() and parent.internalId() >= TRACK_ID and parent.row() < len(self._tracks):
             # Begin row removal
             self.beginRemoveRows(parent, row, row+count-1)
             
             # Change underlying list
-            for i in reversed(range(row, row+count)):
-                del self._clips[i]
-
-            self.dataChanged.emit(self.createIndex(row+count, 0, 0), self.createIndex(len(self._clips), 0, 0), self.Roles.OffsetRole)
+            clips = self._tracks[parent.row()]
+            clips.remove(row, count)
 
             # End row removal
             self.endRemoveRows()
 
+            # The clips after the removed ones moved back
+            self._emitChanged(row, len(clips) - 1, [self.Roles.OffsetRole], parent.row())
+
             # removeRows was successful
             return True
 
@@ -454,6 +523,7 @@ class TimelineModel(QAbstractItemModel):
         roles[self.Roles.LengthRole] = QByteArray(b'length')
         roles[self.Roles.OffsetRole] = QByteArray(b'offset')
         roles[self.Roles.ValidRole] = QByteArray(b'valid')
+        roles[self.Roles.ProbingRole] = QByteArray(b'probing')
 
         return roles
 
@@ -471,12 +541,17 @@ class TimelineModel(QAbstractItemModel):
         """
         Returns index of a clip in the underlying list.
         """
-        return self._clips.index(clip)
+        row = self._clips.rowOf(clip)
+
+        if row == -1:
+            raise ValueError('The clip is not a clip of the model')
+
+        return row
     
     @Slot(int, name="atIndex", result=ClipInfo)
     def atIndex(self, clipIndex: int):
         if 0 <= clipIndex < len(self._clips):
-            return self._clips[clipIndex]
+            return self._clips.view(clipIndex)
         
         return None
 
@@ -485,15 +560,17 @@ class TimelineModel(QAbstractItemModel):
         """
         Returns the clip at the given postion if there is one.
         """
-        if 0 <= position <= self._maxDuration:
-            offset = 0
-            for clip in self._clips:
-                if offset <= position < offset + clip.length:
-                    return clip
-                else:
-                    offset += clip.length
-           
-        return None
+        row = self._clips.rowAt(position, self._currentIndex)
+
+        return self._clips.view(row) if row >= 0 else None
+
+    @Slot(list, name='atPositions', result=list)
+    def atPositions(self, positions: list):
+        """
+        Returns the indices of the clips at each of the given positions, -1 where there is no clip.
+        Resolves many positions at once, e.g. for markers, faster when the positions are sorted.
+        """
+        return self._clips.rowsAt(positions)
 
     @Slot(int, name='splitClip')
     def splitClip(self, position: int = ...):
@@ -507,37 +584,288 @@ class TimelineModel(QAbstractItemModel):
             position = self._position
         index = self._currentIndex
 
-        self.layoutAboutToBeChanged.emit()
+        # Save original in and out point
+        inPoint = self._clips.inPoint(index)
+        outPoint = self._clips.outPoint(index)
 
-        # Insert a new row (ClipInfo)
-        self.insertRows(index + 1, 1, self.createIndex(0, 0, TRACK_ID))
-        
-        # Save original source an out point
-        source = self._clips[index].source
-        inPoint = self._clips[index].inPoint
-        outPoint = self._clips[index].outPoint
+        position += inPoint - self._clips.offset(index)
+
+        # The edits of the two halves are reported as a single change
+        with self.batch():
+            # Insert a copy of the clip, sharing the SourceInfo record of the original
+            self.beginInsertRows(self.trackIndex(), index + 1, index + 1)
+            self._clips.insert(index + 1, *self._clips.record(index))
+            self.endInsertRows()
 
-        position += inPoint - self.data(self.createIndex(index, 0, 0), self.Roles.OffsetRole)
+            # Change original clip
+            self.setData(self.clipIndex(index), position, self.Roles.OutPointRole)
 
-        # Change original clip
-        self.setData(self.createIndex(index, 0, 0), position, self.Roles.OutPointRole)
+            # Change inserted clip
+            self.setData(self.clipIndex(index + 1), position + 1, self.Roles.InPointRole)
+            self.setData(self.clipIndex(index + 1), outPoint, self.Roles.OutPointRole)
+
+    @Slot(int, name='duplicateClip')
+    def duplicateClip(self, clipIndex: int):
+        """
+        Insert a copy of a clip right after it. The copy shares the SourceInfo record of the original.
+
+        :param int clipIndex: The index of the clip to duplicate.
+        """
+        if not(0 <= clipIndex < len(self._clips)):
+            return
 
-        # Change inserted clip
-        self.setData(self.createIndex(index + 1, 0, 0), source, self.Roles.SourceRole)
-        self.setData(self.createIndex(index + 1, 0, 0), position + 1, self.Roles.InPointRole)
-        self.setData(self.createIndex(index + 1, 0, 0), outPoint, self.Roles.OutPointRole)
+        self.beginInsertRows(self.trackIndex(), clipIndex + 1, clipIndex + 1)
+        self._clips.insert(clipIndex + 1, *self._clips.record(clipIndex))
+        self.endInsertRows()
 
-        self.layoutChanged.emit()
+        # The clips after the copy moved forward
+        self._emitChanged(clipIndex + 2, len(self._clips) - 1, [self.Roles.OffsetRole])
 
     @Slot(ClipInfo, name='removeClip')
     def removeClip(self, clip: ClipInfo):
-        self.removeClipOfIndex(self._clips.index(clip))
+        self.removeClipOfIndex(self.indexOf(clip))
 
     @Slot(int, name="removeClipOfIndex")
     def removeClipOfIndex(self, clipIndex: int):
-        self.layoutAboutToBeChanged.emit()
-        self.removeRows(clipIndex, 1, self.createIndex(0, 0, TRACK_ID))
-        self.layoutChanged.emit()
+        self.removeRows(clipIndex, 1, self.trackIndex())
+
+    def beginBatch(self):
+        """
+        Start collecting the changes of the following edits, instead of reporting each of them.
+        Batches can be nested, the changes are reported when the outermost batch ends.
+        """
+        self._batchDepth += 1
+
+    def endBatch(self):
+        """
+        End a batch started with `beginBatch`. Ending the outermost batch reports every collected change
+        as a single dataChanged per track, covering the changed rows and roles.
+        """
+        if self._batchDepth == 0:
+            raise RuntimeError('endBatch called without a matching beginBatch')
+
+        self._batchDepth -= 1
+        if self._batchDepth == 0:
+            pendingChanges = self._pendingChanges
+            self._pendingChanges = {}
+
+            for track, (first, last, roles) in pendingChanges.items():
+                self._emitChanged(first, last, list(roles), track)
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager reporting the edits made inside of it as a single change.
+
+        Rows inserted or removed inside a batch are reported right away, the collected changes
+        refer to the rows as they are at the end of the batch.
+        """
+        self.beginBatch()
+        try:
+            yield self
+        finally:
+            self.endBatch()
+
+    def _emitChanged(self, first: int, last: int, roles: list, track: int = ...):
+        ### Report a change of `roles` on the clips of `track` between `first` and `last` (both included), or collect it while batching
+        track = track if track != ... else self._currentTrack
+        last = min(last, len(self._tracks[track]) - 1)
+        if first > last:
+            return
+
+        if self._batchDepth > 0:
+            pendingChange = self._pendingChanges.get(track)
+            if pendingChange is None:
+                self._pendingChanges[track] = (first, last, set(roles))
+            else:
+                # An empty list of roles means every role changed
+                pendingFirst, pendingLast, pendingRoles = pendingChange
+                mergedRoles = pendingRoles | set(roles) if pendingRoles and roles else set()
+                self._pendingChanges[track] = (min(first, pendingFirst), max(last, pendingLast), mergedRoles)
+            return
+
+        self.dataChanged.emit(self.clipIndex(first, track), self.clipIndex(last, track), roles)
+
+    def _clipChanged(self, row: int, roles: list, length: float, track: int = ...):
+        ### Report a change of `roles` on a clip, and of the offsets of the following clips if its length differs from `length`
+        track = track if track != ... else self._currentTrack
+        clips = self._tracks[track]
+
+        self._emitChanged(row, row, roles, track)
+
+        if clips.length(row) != length:
+            self._emitChanged(row + 1, len(clips) - 1, [self.Roles.OffsetRole], track)
+
+    ## Tracks
+    def clipIndex(self, row: int, track: int = ...):
+        """
+        Returns the model index of a clip.
+
+        :param int row: Index of the clip on its track.
+        :param int track: Index of the track, the current track if not given.
+        """
+        return self.createIndex(row, 0, track if track != ... else self._currentTrack)
+
+    def trackIndex(self, track: int = ...):
+        """
+        Returns the model index of a track, the parent of its clips.
+
+        :param int track: Index of the track, the current track if not given.
+        """
+        return self.createIndex(track if track != ... else self._currentTrack, 0, TRACK_ID)
+
+    def records(self, track: int = ...):
+        """
+        Returns the attributes of the clips of a track in the form `ClipStore.insert()` takes them, e.g. for exporting.
+
+        :param int track: Index of the track, the current track if not given.
+        """
+        clips = self._tracks[track if track != ... else self._currentTrack]
+
+        return [clips.record(row) for row in range(len(clips))]
+
+    @Slot(name='addTrack', result=int)
+    def addTrack(self):
+        """
+        Add an empty track after the last one, e.g. for another camera.
+
+        :returns: The index of the new track.
+        """
+        # Clips store the row of their track as internal id, which has to stay below TRACK_ID
+        if len(self._tracks) >= TRACK_ID:
+            raise OverflowError(f'A timeline can have at most {TRACK_ID} tracks')
+
+        track = len(self._tracks)
+
+        self.beginInsertRows(QModelIndex(), track, track)
+        self._tracks.append(ClipStore(self._setClipSource))
+        self.endInsertRows()
+
+        self.trackCountChanged.emit(len(self._tracks))
+
+        return track
+
+    @Slot(int, name='removeTrack')
+    def removeTrack(self, track: int):
+        """
+        Remove a track with all of its clips. The last remaining track can not be removed.
+
+        :param int track: Index of the track to remove.
+        """
+        if not(0 <= track < len(self._tracks)) or len(self._tracks) == 1:
+            return
+
+        if track == self._currentTrack:
+            self.currentTrack = track - 1 if track > 0 else 1
+
+        # Views of removed clips keep their values
+        self._tracks[track].remove(0, len(self._tracks[track]))
+
+        # The internal id of a clip is the row of its track, which changes for the tracks after the removed one
+        self.beginResetModel()
+        del self._tracks[track]
+        self.endResetModel()
+
+        if track < self._currentTrack:
+            self._currentTrack -= 1
+            self.currentTrackChanged.emit(self._currentTrack)
+
+        self.trackCountChanged.emit(len(self._tracks))
+
+    def clipsAt(self, position: float):
+        """
+        Returns the clips playing at `position` on every track, as `(track, row)` pairs.
+        Each track is searched in logarithmic time.
+
+        :param float position: Position on the timeline.
+        """
+        clips = []
+
+        for track, store in enumerate(self._tracks):
+            row = store.rowAt(position, self._currentIndex if track == self._currentTrack else -1)
+            if row >= 0:
+                clips.append((track, row))
+
+        return clips
+
+    def clipsIn(self, start: float, end: float):
+        """
+        Returns the clips overlapping the interval from `start` to `end` on every track, as `(track, row)` pairs.
+        Each track is searched in logarithmic time, plus the number of clips returned.
+
+        :param float start: Start of the interval on the timeline.
+        :param float end: End of the interval on the timeline, not included.
+        """
+        return [(track, row) for track, store in enumerate(self._tracks) for row in store.rowsIn(start, end)]
+
+    @Slot(int, name='clipsAtPosition', result=list)
+    def clipsAtPosition(self, position: int):
+        """
+        Returns the clips playing at `position` on every track as `[track, row]` lists, for QML.
+        """
+        return [list(clip) for clip in self.clipsAt(position)]
+
+    @Slot(int, int, name='clipsInInterval', result=list)
+    def clipsInInterval(self, start: int, end: int):
+        """
+        Returns the clips overlapping the interval from `start` to `end` on every track as `[track, row]` lists, for QML.
+        """
+        return [list(clip) for clip in self.clipsIn(start, end)]
+
+    def loadClips(self, records: list[dict], insertIndex: int = ..., track: int = ...):
+        """
+        Insert a list of clips at once, e.g. the clips of a saved project, reporting them as a single insertion.
+
+        Every record holds the `source` of the clip and optionally its `name`, `playRate`, `inPoint` and `outPoint`.
+        The metadata of the source can be passed in `sourceInfo`, otherwise the already probed record is used.
+        Clips of sources without metadata wait for it in a probing state. Invalid in and out points are left unset.
+
+        :param list records: Attributes of the clips, in the format of the clips file of a project.
+        :param int insertIndex: Optionally index where the clips are to be inserted. Otherwise the clips are appended at the end.
+        :param int track: Optionally the track to insert the clips into. Otherwise the clips are inserted into the current track.
+
+        :returns: The number of inserted clips.
+        """
+        track = track if track != ... else self._currentTrack
+        clips = self._tracks[track]
+        insertIndex = insertIndex if insertIndex != ... else len(clips)
+
+        storeRecords = []
+        for record in records:
+            source = record['source']
+            sourceInfo = record.get('sourceInfo') or self._sourceInfos.get(source)
+            probing = sourceInfo is None
+
+            if probing:
+                sourceInfo = SourceInfo(source)
+                self._probeSource(source)
+            else:
+                self._sourceInfos[source] = sourceInfo
+
+            storeRecords.append((sourceInfo, record.get('name', ''), record.get('playRate', 1.0), record.get('inPoint', -1), record.get('outPoint', -1), probing))
+
+        if not storeRecords:
+            return 0
+
+        self.beginInsertRows(self.trackIndex(track), insertIndex, insertIndex + len(storeRecords) - 1)
+        count = clips.insertMany(insertIndex, storeRecords)
+        self.endInsertRows()
+
+        # The clips after the new ones moved forward
+        self._emitChanged(insertIndex + count, len(clips) - 1, [self.Roles.OffsetRole], track)
+
+        return count
+
+    def clearClips(self, track: int = ...):
+        """
+        Remove every clip from a track as a single removal.
+
+        :param int track: Optionally the track to clear. Otherwise the current track is cleared.
+        """
+        track = track if track != ... else self._currentTrack
+
+        if len(self._tracks[track]):
+            self.removeRows(0, len(self._tracks[track]), self.trackIndex(track))
 
     def indexOfSource(self, source: str):
         """
@@ -550,20 +878,125 @@ class TimelineModel(QAbstractItemModel):
         except ValueError as e:
             return -1
 
-    def addSource(self, source: str):
+    def addSource(self, source: str, deferred: bool = False, sourceInfo: SourceInfo = None):
         """
         Store a source for a video file, to later insert into the datastucture of the model as a clip.
 
         :param str source: Path to a video file.
+        :param bool deferred: Whether the file is created on demand. A deferred source is not probed,
+            `sourceRequested` is emitted when it is first used by a clip, and `sourceAvailable()` is called once it exists.
+        :param SourceInfo sourceInfo: Optionally the known metadata of the file, e.g. restored from a saved project.
+            Clips use it right away, the file is validated against it in the background.
         """
+        if sourceInfo is not None and source not in self._sourceInfos:
+            self._sourceInfos[source] = sourceInfo
+            self._prober.probe(source)
+
+        if deferred and source not in self._sourceInfos:
+            self._deferredSources.add(source)
+
         if (source not in self._storedSources):
             self._storedSources.append(source)
             self.storedSourcesChanged.emit()
 
+            if source not in self._sourceInfos and not deferred:
+                self._prober.probe(source)
+
+    def isDeferred(self, source: str):
+        """
+        Returns whether the file of `source` is created on demand and does not exist yet.
+
+        :param str source: Path to a video file.
+        """
+        return source in self._deferredSources
+
+    def sourceAvailable(self, source: str):
+        """
+        The file of a deferred source was created, it is probed and passed to the clips waiting for it.
+
+        :param str source: Path to a video file.
+        """
+        self._deferredSources.discard(source)
+        self._prober.probe(source)
+
     def removeSource(self, sourceIndex: int):
+        self._deferredSources.discard(self._storedSources[sourceIndex])
         del self._storedSources[sourceIndex]
         self.storedSourcesChanged.emit()
 
+    def sourceInfo(self, source: str):
+        """
+        Returns the SourceInfo record of `source`, or None if it is not probed yet.
+
+        :param str source: Path to a video file.
+        """
+        return self._sourceInfos.get(source)
+
+    def stopProbing(self):
+        """
+        Drop the sources waiting to be probed and wait for the ones being probed, before the model is destroyed.
+        """
+        self._prober.cancel()
+        self._prober.waitForDone()
+
+    def isProbing(self, source: str):
+        """
+        Returns whether `source` is waiting for its metadata. A source validated against known metadata is not waiting for it.
+
+        :param str source: Path to a video file.
+        """
+        return source not in self._sourceInfos and self._prober.isPending(source)
+
+    @Slot(str, object, name='sourceProbeFinished')
+    def sourceProbeFinished(self, source: str, sourceInfo: SourceInfo):
+        """
+        Store the record of a source probed in the background, and pass it to the clips waiting for it.
+        If the source was validated and its file differs from the known metadata, every clip of the source is updated.
+        """
+        previous = self._sourceInfos.get(source)
+
+        self._sourceInfos[source] = sourceInfo
+        self._updateSourceClips(sourceInfo, probingOnly=previous is None or previous == sourceInfo)
+        self.sourceProbed.emit(source)
+
+    @Slot(str, str, name='sourceProbeFailed')
+    def sourceProbeFailed(self, source: str, message: str):
+        """
+        Clips of a source that could not be probed are left without metadata, and therefore invalid.
+        """
+        previous = self._sourceInfos.pop(source, None)
+
+        self._updateSourceClips(SourceInfo(source), probingOnly=previous is None)
+        self.sourceFailed.emit(source, message)
+
+    def _setClipSource(self, clips: ClipStore, row: int, source: str):
+        ### Source of a clip set through its view (`ClipInfo.source`), handled the same way as through the model
+        self.setData(self.clipIndex(row, self._tracks.index(clips)), source, self.Roles.SourceRole)
+
+    def _probeSource(self, source: str):
+        ### Probe a source in the background, a deferred source is requested instead
+        if source in self._deferredSources:
+            self.sourceRequested.emit(source)
+        else:
+            self._prober.probe(source)
+
+    def _updateSourceClips(self, sourceInfo: SourceInfo, probingOnly: bool = True):
+        # The in and out points are validated against the probed duration, they may change with it
+        changedRoles = [self.Roles.FramesRole, self.Roles.FrameRateRole, self.Roles.DurationRole, self.Roles.InPointRole, self.Roles.OutPointRole, self.Roles.LengthRole, self.Roles.ValidRole, self.Roles.ProbingRole]
+
+        with self.batch():
+            for track, clips in enumerate(self._tracks):
+                rows = [row for row in clips.rowsOfSource(sourceInfo.source) if not probingOnly or clips.probing(row)]
+
+                for row in rows:
+                    length = clips.length(row)
+
+                    clips.setSourceInfo(row, sourceInfo)
+                    self._clipChanged(row, changedRoles, length, track)
+
+                if rows:
+                    clips.rebuildOffsets(rows[0])
+
     @overload
     def loadSource(self, source: str, insertIndex: int = ...):
         """
@@ -593,8 +1026,21 @@ class TimelineModel(QAbstractItemModel):
             )
 
         insertIndex = insertIndex if insertIndex != ... else len(self._clips)
-        parent = self.createIndex(0, 0, TRACK_ID)
+        parent = self.trackIndex()
+
+        # The clip is created from the metadata probed in the background,
+        # if it has not arrived yet, the clip waits for it in a probing state
+        source = self._storedSources[sourceIndex]
+        sourceInfo = self._sourceInfos.get(source)
+        probing = sourceInfo is None
+
+        if probing:
+            sourceInfo = SourceInfo(source)
+            self._probeSource(source)
 
         self.beginInsertRows(parent, insertIndex, insertIndex)
-        self._clips.insert(insertIndex, ClipInfo(self._storedSources[sourceIndex]))
-        self.endInsertRows()
\ No newline at end of file
+        self._clips.insert(insertIndex, sourceInfo, probing=probing)
+        self.endInsertRows()
+
+        # The clips after the new one moved forward
+        self._emitChanged(insertIndex + 1, len(self._clips) - 1, [self.Roles.OffsetRole])
\ No newline at end of file
@@ -20,6 +20,7 @@ Rectangle {
     property int offset: 0
     property bool selected: false
     property bool valid: false
+    property bool probing: false
     
     // Signals
     signal clicked(var clipclipIndex)
@@ -59,7 +60,8 @@ Rectangle {
     }
     
     radius: 10
-    visible: valid
+    visible: valid || probing
+    opacity: probing ? 0.5 : 1.0
     clip: true
 
     states: [
@@ -101,7 +103,7 @@ Rectangle {
 
     Text {
         id: label
-        text: clipRoot.name
+        text: clipRoot.probing ? clipRoot.name + '...' : clipRoot.name
         font.pointSize: 8
         anchors {
             top: parent.top
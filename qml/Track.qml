@@ -7,6 +7,7 @@ Rectangle {
     property alias model: trackModel.model
     property alias rootIndex: trackModel.rootIndex
     property int selection: 0
+    property int trackIndex: 0
     property double timeScale: 1.0
 
     signal clipClicked(var clipIndex)
@@ -32,8 +33,9 @@ Rectangle {
             length: model.length
             duration: model.duration
             offset: model.offset
-            selected: TimelineModel.selectedIndex == index
+            selected: TimelineModel.currentTrack == trackRoot.trackIndex && TimelineModel.selectedIndex == index
             valid: model.valid
+            probing: model.probing
             width: model.length * (trackRoot.width / TimelineModel.maxDuration) * TimelineModel.scaleFactor
             height: trackRoot.height
             onClicked: function (clipIndex) {
@@ -404,6 +404,7 @@ Rectangle {
             margins: 2
         }
         contentWidth: timeline.width
+        contentHeight: ruler.height + tracksBackground.height
         ScrollBar.horizontal.policy: ScrollBar.AlwaysOn
         
         MouseArea {
@@ -460,7 +461,7 @@ Rectangle {
             Column {
                 id: tracksBackground
                 y: ruler.height
-                height: TimelineModel.trackHeight
+                height: TimelineModel.trackHeight * TimelineModel.trackCount
                 Repeater {
                     model: tracksModel
                 }
@@ -502,11 +503,14 @@ Rectangle {
         Track {
             model: TimelineModel
             rootIndex: tracksModel.modelIndex(index)
-            color: base
+            trackIndex: index
+            color: TimelineModel.currentTrack == index ? base : Qt.darker(base, 1.1)
             height: TimelineModel.trackHeight - viewPort.ScrollBar.horizontal.height
             width: timeline.width
             timeScale: TimelineModel.scaleFactor
             onClipClicked: function (clipIndex) {
+                // Clips are edited on the current track
+                TimelineModel.currentTrack = trackIndex
                 CentralWidget.clipClicked(clipIndex)
             }
             onChangeClipSource: function(clipIndex){
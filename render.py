@@ -0,0 +1,255 @@
+"""
+Render saved projects without the graphical interface.
+
+Every project directory (as written by the Save action: the clips file, the adjacency file and the media) is rendered
+into a video file, several of them at once. Each job writes a log and a telemetry report of its own next to its output.
+With `--calibrate` the encoder and preset of every job are chosen by short encodes of its footage (cached per machine),
+to reach `--target-speed` and to fit into `--target-size`.
+
+Usage (from the root of the repository):
+    python render.py projects/cow_1032 projects/cow_1033 --jobs 2 --threads 4 --mode smart --output-dir renders
+"""
+from sys import exit
+from os import path, makedirs
+from argparse import ArgumentParser
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor
+from json import load
+from re import sub
+from tempfile import TemporaryDirectory
+from logging import Logger, FileHandler, Formatter, getLogger, INFO
+from multiprocessing import cpu_count
+from threading import Lock
+from time import monotonic
+
+import settings
+from models.sourceInfo import SourceInfo
+from models.probeCache import ProbeCache
+from models.projectManifest import ProjectManifest
+from export import ExportClip, ExportSettings, ExportCancelled, Exporter, MODES, createExporter, calibrate, choosePreset, runFFmpeg, targetBitrate
+
+def projectSource(projectDir: str, name: str, workDir: str):
+    """
+    Returns the path of a source of a saved project. A recording saved before it was converted (.dav, see the Save action)
+    is remuxed into `workDir` first.
+
+    :param str projectDir: Path to the saved project.
+    :param str name: Name of the source in the clips file.
+    :param str workDir: Directory the recordings are converted into.
+
+    :raises FFmpegError: If a recording can not be converted.
+    """
+    source = path.join(projectDir, name)
+    recording = sub(r'\.mp4$', '.dav', source)
+
+    if path.exists(source) or not path.exists(recording):
+        return source
+
+    output = path.join(workDir, name)
+    makedirs(path.dirname(output), exist_ok=True)
+    runFFmpeg(['-i', recording, '-c', 'copy', '-f', 'mp4', output])
+
+    return output
+
+def projectClips(projectDir: str, workDir: str, track: int = 0):
+    """
+    Returns the export clips of a track of a saved project. The metadata of the sources is restored from the manifest
+    of the project, the sources changed since the project was saved are probed (through the probe cache).
+
+    :param str projectDir: Path to the saved project.
+    :param str workDir: Directory the recordings of the project are converted into (see `projectSource()`).
+    :param int track: Row of the track to export.
+
+    :raises OSError: If the clips file can not be read or a source can not be probed.
+    """
+    with open(path.join(projectDir, settings.CLIPS_FILE), 'r', encoding='utf-8') as f:
+        clips: list[dict] = load(f)
+
+    # Projects saved before tracks were introduced have every clip on the first track
+    clips = [clip for clip in clips if clip.get('track', 0) == track]
+
+    sources: dict[str, str] = {}
+    for clip in clips:
+        if clip['source'] not in sources:
+            sources[clip['source']] = projectSource(projectDir, clip['source'], workDir)
+
+    manifest = ProjectManifest(projectDir)
+    sourceInfos: dict[str, SourceInfo] = {}
+    for name, source in sources.items():
+        info = manifest.info(name) if source == path.join(projectDir, name) else None
+        sourceInfos[name] = SourceInfo.fromDict(source, info) if info is not None else SourceInfo.probe(source)
+
+    return [ExportClip.fromDict(clip, sourceInfos[clip['source']]) for clip in clips]
+
+def jobLogger(name: str, logFile: str):
+    """
+    Returns a logger writing into `logFile` only.
+
+    :param str name: Name of the logger, unique for every job.
+    :param str logFile: Path of the log file.
+    """
+    logger = getLogger(f'render.{name}')
+    logger.setLevel(INFO)
+    logger.propagate = False
+
+    handler = FileHandler(logFile, 'w', encoding='utf-8')
+    handler.setFormatter(Formatter('%(asctime)s %(levelname)s %(message)s'))
+    logger.addHandler(handler)
+
+    return logger
+
+class RenderJob:
+    """
+    A project rendered by the command line, from reading its clips to writing its video file.
+    """
+    ### Constructor
+    def __init__(self, projectDir: str, output: str, mode: str, exportSettings: ExportSettings, track: int = 0, calibration: dict | None = None):
+        self.projectDir = projectDir
+        self.output = output
+        self.mode = mode
+        self.settings = exportSettings
+        self.track = track
+        # Targets of the calibration (`targetSpeed` and `targetSize` in bytes), None if the settings are used as they are
+        self.calibration = calibration
+
+        self._exporter: Exporter | None = None
+        self._lock = Lock()
+        self._cancelled = False
+
+    ### Functions
+    def run(self):
+        """
+        Render the project, returns whether the video file was written.
+        """
+        logger = jobLogger(path.basename(self.output), path.splitext(self.output)[0] + '.log')
+        logger.info(f'Rendering \'{self.projectDir}\' into \'{self.output}\' ({self.mode}, {self.settings})')
+        start = monotonic()
+
+        # Recordings of the project not converted yet are converted next to the segments of the job
+        workDir = TemporaryDirectory(prefix='render_')
+
+        try:
+            clips = projectClips(self.projectDir, workDir.name, self.track)
+            if not clips:
+                logger.error('The project has no clips on the track')
+                return False
+
+            exportSettings = self.settings
+            if self.calibration is not None:
+                exportSettings = self.calibrate(clips, logger)
+
+            with self._lock:
+                if self._cancelled:
+                    raise ExportCancelled('The export was cancelled')
+                self._exporter = createExporter(self.mode, clips, self.output, exportSettings)
+
+            logger.info(f'{len(clips)} clips, {self._exporter.duration / 1000:.1f} s, exported by \'{self._exporter.name}\'')
+
+            # Progress is logged at every tenth of the video
+            logged = [-1]
+            def progress(report: dict):
+                tenth = 10 if report['end'] else int(report['outTime'] / report['duration'] * 10) if report['duration'] > 0 else 0
+                if tenth > logged[0]:
+                    logged[0] = tenth
+                    logger.info(f'{min(tenth * 10, 100)}%, {report["frame"]} frames, {monotonic() - start:.1f} s')
+
+            # The telemetry of the export is written next to the output, its summary into the log
+            self._exporter.export(progress, logger)
+            logger.info(f'Done in {monotonic() - start:.1f} s')
+        except ExportCancelled:
+            logger.warning('Cancelled')
+            return False
+        except Exception as e:
+            logger.error(f'Failed: {e}')
+            return False
+        finally:
+            workDir.cleanup()
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+
+        return True
+
+    def calibrate(self, clips: list[ExportClip], logger: Logger):
+        """
+        Returns the export settings with the encoder, preset and bitrate chosen by the calibration.
+
+        :param list clips: Clips to export.
+        :param Logger logger: Log of the job.
+        """
+        targetSpeed = self.calibration.get('targetSpeed', settings.EXPORT_TARGET_SPEED)
+        targetSize = self.calibration.get('targetSize', 0)
+        duration = sum(clip.length / clip.playRate for clip in clips)
+
+        exportSettings = self.settings
+        if targetSize > 0:
+            exportSettings = replace(exportSettings, bitrate=targetBitrate(targetSize, duration, exportSettings.audio))
+
+        result = choosePreset(calibrate(clips, exportSettings), targetSpeed, targetSize, duration)
+        logger.info(f'Calibrated: {result["codec"]} {result["preset"] or ""} at {exportSettings.bitrate}, {result["speed"]:.1f}x real time')
+
+        return replace(exportSettings, codec=result['codec'], preset=result['preset'])
+
+    def cancel(self):
+        """
+        Stop the job, terminating its ffmpeg processes. Can be called from any thread.
+        """
+        with self._lock:
+            self._cancelled = True
+            exporter = self._exporter
+
+        if exporter is not None:
+            exporter.cancel()
+
+def main():
+    parser = ArgumentParser(description='Render saved projects into video files without the graphical interface.')
+    parser.add_argument('projects', nargs='+', help='Directories of saved projects.')
+    parser.add_argument('--output-dir', help='Directory of the rendered files, the directory of each project by default.')
+    parser.add_argument('--mode', default='smart', choices=MODES, help='Export mode, the fast modes fall back to encoding incompatible sources.')
+    parser.add_argument('--codec', default='libx264', help='Video codec used when encoding.')
+    parser.add_argument('--preset', help='Preset of the video codec used when encoding.')
+    parser.add_argument('--bitrate', default='2000k', help='Video bitrate used when encoding.')
+    parser.add_argument('--resolution', help='Resolution used when encoding as WIDTHxHEIGHT, the size of the first clip by default.')
+    parser.add_argument('--no-audio', action='store_true', help='Export the video only.')
+    parser.add_argument('--track', type=int, default=0, help='Track of the projects to export.')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of projects rendered at once.')
+    parser.add_argument('--threads', type=int, default=max(cpu_count() // 2, 1), help='Number of threads of each job.')
+    parser.add_argument('--calibrate', action='store_true', help='Choose the codec and preset by encoding a sample of the footage of each job.')
+    parser.add_argument('--target-speed', type=float, default=settings.EXPORT_TARGET_SPEED, help='Speed the calibration aims for, compared to real time.')
+    parser.add_argument('--target-size', type=float, default=0, help='Largest size of a rendered file in megabytes the calibration aims for.')
+    args = parser.parse_args()
+
+    resolution = tuple(int(res) for res in args.resolution.lower().split('x')) if args.resolution else None
+    exportSettings = ExportSettings(args.codec, args.bitrate, resolution, not args.no_audio, args.threads, args.preset)
+    calibration = {'targetSpeed': args.target_speed, 'targetSize': int(args.target_size * 2**20)} if args.calibrate else None
+
+    jobs: list[RenderJob] = []
+    for projectDir in args.projects:
+        projectDir = path.abspath(projectDir)
+        name = path.basename(projectDir.rstrip('/\\'))
+        outputDir = path.abspath(args.output_dir) if args.output_dir else projectDir
+        makedirs(outputDir, exist_ok=True)
+
+        jobs.append(RenderJob(projectDir, path.join(outputDir, name + '.mp4'), args.mode, exportSettings, args.track, calibration))
+
+    with ThreadPoolExecutor(max_workers=max(args.jobs, 1), thread_name_prefix='render') as pool:
+        futures = {pool.submit(job.run): job for job in jobs}
+
+        try:
+            results = {job: future.result() for future, job in futures.items()}
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            for job in jobs:
+                job.cancel()
+            raise
+        finally:
+            ProbeCache.instance().write()
+
+    for job in jobs:
+        print(f'{"done" if results[job] else "FAILED":<7} {job.output}')
+
+    exit(0 if all(results.values()) else 1)
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,20 @@
+from os import path, environ
+
 LANG="hu"
+# Caches shared by every session of the application and of render.py, wherever they are started from
+DATA_DIR=path.join(environ.get('LOCALAPPDATA') or environ.get('XDG_CACHE_HOME') or path.join(path.expanduser('~'), '.cache'), 'cow_follower')
 ADJACENT_FILE='adjacency.json'
-CLIPS_FILE='clips.json'
\ No newline at end of file
+CLIPS_FILE='clips.json'
+PROBE_CACHE_FILE=path.join(DATA_DIR, 'probe_cache.json')
+PROBE_CACHE_SIZE=4096
+PROBE_BACKENDS=['ffprobe', 'ffmpeg', 'moviepy']
+FFPROBE_BINARY=None
+FFMPEG_BINARY=None
+EXPORT_CHUNK_LENGTH=30
+ENCODER_CACHE_FILE=path.join(DATA_DIR, 'encoder_cache.json')
+EXPORT_TARGET_SPEED=4.0
+SEGMENT_CACHE_DIR=path.join(DATA_DIR, 'segment_cache')
+SEGMENT_CACHE_SIZE=20 * 2**30
+REMUX_MAX_JOBS=4
+IMPORT_IN_PLACE=True
+MANIFEST_FILE='media.json'
\ No newline at end of file
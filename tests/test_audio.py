@@ -0,0 +1,15 @@
+from export import ExportClip, audioMode
+from models.sourceInfo import SourceInfo
+
+def clip(audioCodec: str | None, playRate: float = 1.0):
+    return ExportClip(SourceInfo('video.mp4', duration=10000.0, codec='h264', audio=audioCodec is not None, audioCodec=audioCodec), playRate=playRate)
+
+def test_audioMode():
+    assert audioMode([clip('aac'), clip('aac')]) == 'copy'
+    assert audioMode([clip('aac'), clip('aac')], audio=False) == 'none'
+    assert audioMode([clip(None), clip(None)]) == 'none'
+    # G.711 of the NVR recordings can not be stored in MP4
+    assert audioMode([clip('pcm_alaw')]) == 'encode'
+    assert audioMode([clip('aac'), clip('mp3')]) == 'encode'
+    assert audioMode([clip('aac'), clip(None)]) == 'encode'
+    assert audioMode([clip('aac', 2.0)]) == 'encode'
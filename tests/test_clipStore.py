@@ -0,0 +1,163 @@
+from gc import collect
+from random import Random
+
+from models.clipStore import ClipStore
+from models.sourceInfo import SourceInfo
+
+# Durations are whole or half millieseconds, the sums of the lengths are exact
+SOURCES = [SourceInfo(f'video{index}.mp4', duration=float(duration)) for index, duration in enumerate([4000, 2500.5, 10000, 700, 60000])]
+
+def linearOffsets(store: ClipStore):
+    ### Start of every clip, summed from the lengths of the clips before it
+    offsets, offset = [], 0.0
+    for length in store.lengths():
+        offsets.append(offset)
+        offset += length
+    return offsets, offset
+
+def linearRowAt(store: ClipStore, position: float):
+    offsets, _ = linearOffsets(store)
+    for row, (offset, length) in enumerate(zip(offsets, store.lengths())):
+        if offset <= position < offset + length:
+            return row
+    return -1
+
+def linearRowsIn(store: ClipStore, start: float, end: float):
+    offsets, _ = linearOffsets(store)
+    return [row for row, (offset, length) in enumerate(zip(offsets, store.lengths())) if length > 0 and offset < end and start < offset + length]
+
+def edit(store: ClipStore, random: Random):
+    ### A random edit of the track, as the timeline does them
+    count = len(store)
+    # The track is kept short, so every position of it can be checked after every edit
+    actions = ['insert', 'remove', 'split', 'playRate', 'inPoint', 'outPoint', 'sourceInfo', 'probe'] if count else ['insert']
+    action = 'remove' if count > 40 else random.choice(actions)
+    row = random.randrange(count) if count else 0
+
+    match action:
+        case 'insert':
+            sourceInfo = random.choice(SOURCES)
+            store.insert(random.randint(0, count), sourceInfo, inPoint=random.choice([-1, 0, int(sourceInfo.duration) // 3]))
+        case 'remove':
+            store.remove(row, random.randint(1, min(3, count - row)))
+        case 'split':
+            # A copy of the clip is inserted after it, the clip keeps the part before the cut and the copy the rest, as `TimelineModel.splitClip()` does
+            position = max(store.inPoint(row), 0) + random.randint(0, int(store.length(row)))
+            outPoint = store.outPoint(row)
+            store.insert(row + 1, *store.record(row))
+            store.setOutPoint(row, position)
+            store.setInPoint(row + 1, position + 1)
+            store.setOutPoint(row + 1, outPoint)
+        case 'playRate':
+            store.setPlayRate(row, random.choice([0.5, 1.0, 2.0]))
+        case 'inPoint':
+            store.setInPoint(row, random.randint(-1, int(store.duration(row))))
+        case 'outPoint':
+            store.setOutPoint(row, random.randint(-1, int(store.duration(row))))
+        case 'sourceInfo':
+            store.setSourceInfo(row, random.choice(SOURCES))
+        case 'probe':
+            # The clip waits for the metadata of its file, then gets it
+            sourceInfo = store.sourceInfo(row)
+            store.setSourceInfo(row, SourceInfo(sourceInfo.source), probing=True)
+            store.setInPoint(row, random.randint(0, 5000))
+            store.setSourceInfo(row, sourceInfo)
+
+def positions(store: ClipStore, random: Random):
+    ### Positions worth checking: clip boundaries and right before them, random ones and ones off the track
+    offsets, total = linearOffsets(store)
+    values = [-1.0, 0.0, total, total + 1.0]
+    for offset in offsets:
+        values += [offset, offset - 0.5, offset + 0.5]
+    values += [random.uniform(0, total) for _ in range(20)]
+    return values
+
+def test_emptyStore():
+    store = ClipStore()
+
+    assert store.rowAt(0.0) == -1
+    assert store.rowAt(0.0, 0) == -1
+    assert store.rowsAt([0.0, 1.0]) == [-1, -1]
+    assert store.rowsIn(0.0, 100.0) == []
+    assert store.totalLength() == 0.0
+
+def test_lookupsMatchLinearScan():
+    random = Random(7)
+    store = ClipStore()
+
+    for _ in range(400):
+        edit(store, random)
+
+        offsets, total = linearOffsets(store)
+        assert store.offsets() == offsets
+        assert store.totalLength() == total
+
+        values = positions(store, random)
+        expected = [linearRowAt(store, position) for position in values]
+
+        for position, row in zip(values, expected):
+            assert store.rowAt(position) == row
+            # The hint row, its neighbours and rows far from it
+            for hint in {row - 1, row, row + 1, random.randint(-1, len(store)), 0, len(store) - 1}:
+                assert store.rowAt(position, hint) == row
+
+        assert store.rowsAt(values) == expected
+        assert store.rowsAt(sorted(values)) == [linearRowAt(store, position) for position in sorted(values)]
+
+        for start, end in zip(values, values[1:]):
+            start, end = min(start, end), max(start, end)
+            assert store.rowsIn(start, end) == linearRowsIn(store, start, end)
+            assert store.rowsIn(end, start) == []
+
+def test_splitClipsShareTheirRecord():
+    store = ClipStore()
+    store.insert(0, SOURCES[2], inPoint=1000, outPoint=9000)
+    store.insert(1, *store.record(0))
+    store.setOutPoint(0, 5000)
+    store.setInPoint(1, 5001)
+
+    assert store.sourceInfo(0) is store.sourceInfo(1) is SOURCES[2]
+    assert store.view(1).sourceInfo is SOURCES[2]
+
+def test_recordsAndViewsAreReleased():
+    store = ClipStore()
+    store.insertMany(0, [(SOURCES[0],), (SOURCES[1],), (SOURCES[0],)])
+
+    view = store.view(2)
+    assert store.existingView(2) is view
+    store.remove(0)
+    assert view.row == 1 and view.store is store
+
+    # A view is only kept while it is referenced elsewhere
+    del view
+    collect()
+    assert store.existingView(1) is None
+
+    # A record is dropped with the last clip referencing it, its id is reused
+    store.remove(0)
+    assert [sourceInfo for sourceInfo in store._sourceInfos if sourceInfo is not None] == [SOURCES[0]]
+    store.insert(0, SOURCES[3])
+    assert len(store._sourceInfos) == 2 and store.sourceInfos() == [SOURCES[3], SOURCES[0]]
+
+def test_removedViewKeepsItsValues():
+    store = ClipStore()
+    store.insert(0, SOURCES[2], name='clip', inPoint=1000, outPoint=3000)
+    view = store.view(0)
+
+    store.remove(0)
+
+    assert view.store is not store and (view.name, view.inPoint, view.outPoint, view.length) == ('clip', 1000, 3000, 2000)
+
+def test_insertManyValidatesPoints():
+    store = ClipStore()
+    count = store.insertMany(0, [
+        (SOURCES[0], 'valid', 1.0, 1000, 3000),
+        (SOURCES[0], 'in point after the end', 1.0, 5000, -1),
+        (SOURCES[0], 'out point before the in point', 1.0, 2000, 1000),
+        (SourceInfo('probing.mp4'), 'probing', 1.0, 5000, 9000, True)
+    ])
+
+    assert count == 4
+    assert list(zip(store.inPoints(), store.outPoints())) == [(1000, 3000), (-1, -1), (2000, -1), (5000, 9000)]
+    assert store.offsets() == [0.0, 2000.0, 6000.0, 8000.0] and store.totalLength() == 12000.0
+    assert store.insertMany(1, []) == 0
@@ -0,0 +1,19 @@
+from export import choosePreset, targetBitrate
+
+RESULTS = [
+    {'encoder': 'libx264', 'preset': 'slow', 'speed': 1.5, 'bytesPerSecond': 200000},
+    {'encoder': 'libx264', 'preset': 'medium', 'speed': 5.0, 'bytesPerSecond': 250000},
+    {'encoder': 'libx264', 'preset': 'veryfast', 'speed': 12.0, 'bytesPerSecond': 400000}
+]
+
+def test_targetBitrate():
+    # 5 MiB in 50 seconds, less the overhead and the audio
+    assert targetBitrate(5 * 2**20, 50.0, audio=False) == '813k'
+    assert targetBitrate(5 * 2**20, 50.0) == '621k'
+    assert targetBitrate(1000, 3600.0) == '5k'
+
+def test_choosePreset():
+    assert choosePreset(RESULTS, 4.0)['preset'] == 'medium'
+    assert choosePreset(RESULTS, 4.0, 300000 * 60, 60.0)['preset'] == 'medium'
+    assert choosePreset(RESULTS, 4.0, 200000 * 60, 60.0)['preset'] == 'veryfast'
+    assert choosePreset(RESULTS, 20.0)['preset'] == 'veryfast'
@@ -0,0 +1,25 @@
+from export import ExportClip, ExportSettings, FilterGraphExporter, ParallelExporter, SegmentCache, createExporter, splitClips
+from models.sourceInfo import SourceInfo
+import settings
+
+def test_encodeUsesSegmentsOnlyWhenStored(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'SEGMENT_CACHE_DIR', str(tmp_path / 'segments'))
+    monkeypatch.setattr(SegmentCache, '_instance', None)
+
+    source = tmp_path / 'video.mp4'
+    source.write_bytes(b'\0' * 1024)
+    clips = [ExportClip(SourceInfo(str(source), frames=250, frameRate=25.0, duration=10000.0), 1000, 5000)]
+    exportSettings = ExportSettings(audio=False, threads=1)
+
+    assert isinstance(createExporter('encode', clips, str(tmp_path / 'output.mp4'), exportSettings), FilterGraphExporter)
+
+    # A segment of the timeline is stored by an earlier export
+    exporter = ParallelExporter(clips, str(tmp_path / 'output.mp4'), exportSettings)
+    key = exporter.segmentKey(splitClips(clips, exporter.frameRate)[0])
+    partFile = SegmentCache.instance().partFile(key)
+    with open(partFile, 'wb') as f:
+        f.write(b'\0')
+    SegmentCache.instance().put(key, partFile)
+
+    assert isinstance(createExporter('encode', clips, str(tmp_path / 'output.mp4'), exportSettings), ParallelExporter)
+    assert isinstance(createExporter('graph', clips, str(tmp_path / 'output.mp4'), exportSettings), FilterGraphExporter)
@@ -0,0 +1,52 @@
+from export.exportClip import ExportClip, frameAt
+from export.parallel import splitClips
+from export.smartRender import planClip
+from models.sourceInfo import SourceInfo
+
+FRAME_RATE = 25.0
+SOURCE = SourceInfo('video.mp4', frames=500, frameRate=FRAME_RATE, duration=20000.0, width=320, height=240, codec='h264')
+# A keyframe every 2 seconds
+KEYFRAMES = [float(second) for second in range(0, 20, 2)]
+CLIPS = [ExportClip(SOURCE, 1230, 5470), ExportClip(SOURCE, 9010, 13330), ExportClip(SOURCE, 300, 900), ExportClip(SOURCE, 2000, 6000), ExportClip(SOURCE, 1990, 2030)]
+
+def smartFrames(clip: ExportClip):
+    ### Frames of the source written by the smart render, the copied pieces start on keyframes
+    frames = []
+    for piece in planClip(clip, KEYFRAMES):
+        first = round(piece.start * FRAME_RATE)
+        frames += range(first, first + piece.frames)
+    return frames
+
+def parallelFrames(clip: ExportClip):
+    ### Frames of the source written by the parallel export, every segment starts at the first frame after its position
+    frames = []
+    for segment in splitClips([clip], FRAME_RATE, 1.0):
+        first = frameAt(segment.start, FRAME_RATE)
+        frames += range(first, first + segment.frames)
+    return frames
+
+def graphFrames(clip: ExportClip):
+    ### Frames of the source written by the filter graph export, the clip is read from its start
+    return list(range(frameAt(clip.start, FRAME_RATE), frameAt(clip.start, FRAME_RATE) + clip.frames(FRAME_RATE)))
+
+def test_reportedTimeline():
+    assert [(frames[0], frames[-1]) for frames in map(smartFrames, CLIPS[:3])] == [(31, 136), (226, 333), (8, 22)]
+    assert sum(len(smartFrames(clip)) for clip in CLIPS[:3]) == 229
+
+def test_sameFramesInEveryMode():
+    for clip in CLIPS:
+        assert smartFrames(clip) == parallelFrames(clip) == graphFrames(clip)
+
+def test_copiedPiecesStartOnKeyframes():
+    for clip in CLIPS:
+        for piece in planClip(clip, KEYFRAMES):
+            if piece.copy:
+                assert piece.start in KEYFRAMES
+
+def test_segmentsAddUpToTheClips():
+    clips = CLIPS + [ExportClip(SOURCE, 0, -1, 2.0), ExportClip(SOURCE, 1000, 1010)]
+    segments = splitClips(clips, FRAME_RATE, 3.0)
+
+    assert all(0 < segment.frames <= 75 for segment in segments)
+    for clip in clips:
+        assert sum(segment.frames for segment in segments if segment.clip is clip) == clip.frames(FRAME_RATE)
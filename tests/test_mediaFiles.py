@@ -0,0 +1,23 @@
+from json import load
+from os import listdir
+
+from models.mediaFiles import linkOrCopy, writeJson
+
+def test_linkOrCopy(tmp_path):
+    source = tmp_path / 'video.mp4'
+    source.write_bytes(b'footage')
+    target = str(tmp_path / 'project' / 'video.mp4')
+
+    assert linkOrCopy(str(source), target) in ('link', 'reflink', 'copy')
+    with open(target, 'rb') as f:
+        assert f.read() == b'footage'
+    assert linkOrCopy(str(source), str(source)) == 'same'
+
+def test_writeJsonReplacesTheFile(tmp_path):
+    file = str(tmp_path / 'clips.json')
+    writeJson(file, {'clips': [1]})
+    writeJson(file, {'clips': [1, 2]})
+
+    with open(file, 'r', encoding='utf-8') as f:
+        assert load(f) == {'clips': [1, 2]}
+    assert listdir(tmp_path) == ['clips.json']
@@ -0,0 +1,81 @@
+from json import dump, load
+from os import path, stat
+
+from models.probeCache import ProbeCache
+from models.projectManifest import ProjectManifest
+from models.sourceInfo import SourceInfo
+import settings
+
+# Metadata probed by the current version
+INFO = {'frames': 250, 'frameRate': 25.0, 'duration': 10000.0, 'width': 1280, 'height': 720, 'codec': 'h264', 'audio': True, 'audioCodec': 'aac'}
+# Metadata written by the first version of the cache, before the stream fields were probed
+OLD_INFO = {'frames': 250, 'frameRate': 25.0, 'duration': 10000.0}
+
+def makeVideo(directory):
+    source = path.join(directory, 'video.mp4')
+    with open(source, 'wb') as f:
+        f.write(b'\0' * 1024)
+    return source
+
+def probeCounter(monkeypatch):
+    probed = []
+    def probeFile(source):
+        probed.append(source)
+        return dict(INFO)
+    monkeypatch.setattr(ProbeCache, 'probeFile', staticmethod(probeFile))
+    return probed
+
+def test_oldCacheIsProbedAgain(tmp_path, monkeypatch):
+    source = makeVideo(tmp_path)
+    fileStat = stat(source)
+    cacheFile = path.join(tmp_path, 'probe_cache.json')
+    with open(cacheFile, 'w', encoding='utf-8') as f:
+        dump({ProbeCache.key(source): {'size': fileStat.st_size, 'mtime': fileStat.st_mtime_ns, 'info': OLD_INFO}}, f)
+    probed = probeCounter(monkeypatch)
+
+    cache = ProbeCache(cacheFile)
+    sourceInfo = SourceInfo.fromDict(source, cache.probe(source))
+
+    assert probed == [source]
+    assert sourceInfo.audio and sourceInfo.codec == 'h264' and (sourceInfo.width, sourceInfo.height) == (1280, 720)
+
+def test_cacheIsReadBack(tmp_path, monkeypatch):
+    source = makeVideo(tmp_path)
+    cacheFile = path.join(tmp_path, 'probe_cache.json')
+    probed = probeCounter(monkeypatch)
+
+    cache = ProbeCache(cacheFile)
+    cache.probe(source)
+    cache.write()
+    with open(cacheFile, 'r', encoding='utf-8') as f:
+        assert load(f)['version'] == ProbeCache.VERSION
+
+    assert ProbeCache(cacheFile).probe(source) == INFO
+    assert probed == [source]
+
+def test_oldManifestInfoIsIgnored(tmp_path):
+    source = makeVideo(tmp_path)
+    projectDir = tmp_path / 'project'
+    projectDir.mkdir()
+
+    manifest = ProjectManifest(str(projectDir))
+    manifest.update('video.mp4', source, OLD_INFO)
+    manifest.write()
+    assert ProjectManifest(str(projectDir)).info('video.mp4') is None
+
+    manifest.update('video.mp4', source, INFO)
+    manifest.write()
+    assert ProjectManifest(str(projectDir)).info('video.mp4') == INFO
+    assert path.isfile(path.join(projectDir, settings.MANIFEST_FILE))
+
+def test_cacheIsWrittenIntoMissingDirectory(tmp_path, monkeypatch):
+    source = makeVideo(tmp_path)
+    cacheFile = path.join(tmp_path, 'data', 'probe_cache.json')
+    probeCounter(monkeypatch)
+
+    cache = ProbeCache(cacheFile)
+    cache.probe(source)
+    cache.write()
+
+    assert ProbeCache(cacheFile).get(source) == INFO
+    assert path.isabs(settings.PROBE_CACHE_FILE)
@@ -0,0 +1,30 @@
+from models import projectManifest
+from models.projectManifest import ProjectManifest
+
+def test_unchangedMediaIsNotRead(tmp_path, monkeypatch):
+    source = tmp_path / 'video.mp4'
+    source.write_bytes(b'footage' * 1000)
+    project = tmp_path / 'project'
+    project.mkdir()
+
+    manifest = ProjectManifest(str(project))
+    assert manifest.update('video.mp4', str(source)) != 'unchanged'
+    manifest.write()
+
+    # A second save with the same media must not fingerprint the footage again
+    def fingerprint(file):
+        raise AssertionError(f'{file} was read')
+    monkeypatch.setattr(projectManifest, 'fingerprint', fingerprint)
+
+    manifest = ProjectManifest(str(project))
+    assert manifest.update('video.mp4', str(source)) == 'unchanged'
+
+def test_incompleteInfoIsIgnored(tmp_path):
+    source = tmp_path / 'video.mp4'
+    source.write_bytes(b'footage')
+
+    manifest = ProjectManifest(str(tmp_path / 'project'))
+    (tmp_path / 'project').mkdir()
+    manifest.update('video.mp4', str(source), {'duration': 1000})
+
+    assert manifest.info('video.mp4') is None
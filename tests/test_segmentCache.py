@@ -0,0 +1,45 @@
+from os import utime
+
+from export import ExportSettings, SegmentCache
+
+def store(cache: SegmentCache, key: str, size: int, used: float):
+    partFile = cache.partFile(key)
+    with open(partFile, 'wb') as f:
+        f.write(b'\0' * size)
+    file = cache.put(key, partFile)
+    utime(file, (used, used))
+
+def test_keyChangesWithTheSegment(tmp_path):
+    source = tmp_path / 'video.mp4'
+    source.write_bytes(b'\0' * 1024)
+    key = SegmentCache.key(str(source), 1.0, 25, 1.0, ExportSettings())
+
+    assert key == SegmentCache.key(str(source), 1.0, 25, 1.0, ExportSettings(threads=8))
+    assert key != SegmentCache.key(str(source), 1.04, 25, 1.0, ExportSettings())
+    assert key != SegmentCache.key(str(source), 1.0, 25, 1.0, ExportSettings(bitrate='900k'))
+
+    source.write_bytes(b'\0' * 2048)
+    assert key != SegmentCache.key(str(source), 1.0, 25, 1.0, ExportSettings())
+
+def test_evictKeepsPinnedSegments(tmp_path):
+    cache = SegmentCache(str(tmp_path / 'segments'), 250)
+    for index, key in enumerate(['old', 'pinned', 'new']):
+        store(cache, key, 100, 1000 + index)
+
+    with cache.pinned(['old', 'pinned']):
+        cache.evict()
+        assert [cache.contains(key) for key in ['old', 'pinned', 'new']] == [True, True, False]
+
+    store(cache, 'new', 100, 2000)
+    cache.evict()
+    assert [cache.contains(key) for key in ['old', 'pinned', 'new']] == [False, True, True]
+
+def test_getMarksSegmentUsed(tmp_path):
+    cache = SegmentCache(str(tmp_path / 'segments'), 150)
+    store(cache, 'first', 100, 1000)
+    store(cache, 'second', 100, 2000)
+
+    assert cache.get('first') == cache.file('first') and cache.get('missing') is None
+    cache.evict()
+
+    assert cache.contains('first') and not cache.contains('second')
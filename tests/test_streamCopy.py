@@ -0,0 +1,49 @@
+from subprocess import run, PIPE, DEVNULL
+
+from export import ExportClip, ExportSettings, StreamCopyExporter, ffmpegBinary
+from export.streamCopy import snapToKeyframe
+from models.sourceInfo import SourceInfo
+
+FRAME_RATE = 25.0
+# A keyframe every 2 seconds
+KEYFRAMES = [float(second) for second in range(0, 20, 2)]
+
+def sourceInfo(source: str = 'video.mp4'):
+    return SourceInfo(source, frames=500, frameRate=FRAME_RATE, duration=20000.0, width=320, height=240, codec='h264', audio=True, audioCodec='aac')
+
+def test_snapToWholeGOPs():
+    snapped = [snapToKeyframe(ExportClip(sourceInfo(), inPoint, outPoint), KEYFRAMES) for inPoint, outPoint in [(1230, 5470), (9010, 13330), (300, 900), (2000, 4000), (17000, -1)]]
+
+    assert [(clip.firstFrame(), clip.frames(FRAME_RATE)) for clip in snapped] == [(0, 150), (200, 150), (0, 50), (50, 50), (400, 100)]
+
+def packets(output: str, stream: str):
+    ### Decoding and presentation timestamps of the packets of a stream, in the order they are stored
+    cmd = [ffmpegBinary(), '-v', 'error', '-i', output, '-map', f'0:{stream}', '-c', 'copy', '-f', 'framecrc', '-']
+    lines = run(cmd, stdout=PIPE, stderr=DEVNULL, check=True).stdout.decode('utf8').splitlines()
+
+    return [tuple(int(field) for field in line.split(',')[1:3]) for line in lines if line and not line.startswith('#')]
+
+def test_joinedTimestampsIncrease(tmp_path):
+    source = str(tmp_path / 'source.mp4')
+    cmd = [
+        ffmpegBinary(), '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=size=320x240:rate=25:duration=20', '-f', 'lavfi', '-i', 'sine=duration=20',
+        '-c:v', 'libx264', '-bf', '2', '-g', '50', '-keyint_min', '50', '-sc_threshold', '0', '-pix_fmt', 'yuv420p', '-c:a', 'aac', source
+    ]
+    run(cmd, stdout=DEVNULL, stderr=DEVNULL, check=True)
+
+    output = str(tmp_path / 'output.mp4')
+    clips = [ExportClip(sourceInfo(source), inPoint, outPoint) for inPoint, outPoint in [(1230, 5470), (9010, 13330), (300, 900)]]
+    exporter = StreamCopyExporter(clips, output, ExportSettings())
+    exporter.export()
+
+    video = packets(output, 'v')
+    steps = {second[0] - first[0] for first, second in zip(video, video[1:])}
+    presentation = sorted(pts for _, pts in video)
+
+    assert len(video) == 350
+    assert exporter.telemetry.report()['frames'] == 350
+    assert len(steps) == 1 and steps.pop() > 0
+    assert len(set(presentation)) == len(presentation)
+
+    audio = packets(output, 'a')
+    assert all(second[0] > first[0] for first, second in zip(audio, audio[1:]))
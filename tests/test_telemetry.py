@@ -0,0 +1,25 @@
+from export import ExportClip, ExportSettings, ExportTelemetry
+from models.sourceInfo import SourceInfo
+
+def telemetry():
+    clips = [ExportClip(SourceInfo('video.mp4', frames=500, frameRate=25.0, duration=20000.0), 1230, 5470)]
+    telemetry = ExportTelemetry('copy', clips, 'output.mp4', ExportSettings(), 25.0)
+    telemetry.start()
+    return telemetry
+
+def test_framesOfTheOutput():
+    report = telemetry()
+    report.record('copy', {'wall': 1.0, 'frames': 40}, 0)
+    report.record('join', {'wall': 1.0, 'frames': 150}, output=True)
+    report.finish('succeeded')
+
+    values = report.report()
+    assert (values['frames'], values['nominalFrames']) == (150, 106)
+    assert values['fps'] == 150 / values['wall']
+
+def test_nominalFramesWithoutOutput():
+    report = telemetry()
+    report.record('keyframes', {'wall': 0.1, 'cpu': 0.1}, 0)
+
+    values = report.report()
+    assert values['frames'] == values['nominalFrames'] == 106
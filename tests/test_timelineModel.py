@@ -0,0 +1,65 @@
+from threading import current_thread, main_thread
+from time import monotonic
+
+from PySide6.QtCore import QCoreApplication
+
+from models.clipStore import ClipStore
+from models.probeCache import ProbeCache
+from models.sourceInfo import SourceInfo
+from models.timelineModel import TimelineModel
+
+INFO = {'frames': 250, 'frameRate': 25.0, 'duration': 10000.0, 'width': 320, 'height': 240, 'codec': 'h264', 'audio': False, 'audioCodec': None}
+
+def application():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+def probeCache(tmp_path, monkeypatch):
+    ### A cache of its own, recording the threads the files are probed on
+    threads = []
+    def probeFile(source):
+        threads.append(current_thread())
+        return dict(INFO)
+    monkeypatch.setattr(ProbeCache, 'probeFile', staticmethod(probeFile))
+    monkeypatch.setattr(ProbeCache, '_instance', ProbeCache(str(tmp_path / 'probe_cache.json')))
+    return threads
+
+def video(tmp_path, name: str):
+    file = tmp_path / name
+    file.write_bytes(b'\0' * 1024)
+    return str(file)
+
+def test_clipSourceIsProbedInBackground(tmp_path, monkeypatch):
+    app = application()
+    threads = probeCache(tmp_path, monkeypatch)
+    first, second = video(tmp_path, 'first.mp4'), video(tmp_path, 'second.mp4')
+
+    model = TimelineModel()
+    model.addSource(first, sourceInfo=SourceInfo.fromDict(first, INFO))
+    model.loadSource(first)
+    model.currentIndex = 0
+    clip = model.currentClip
+
+    clip.source = second
+    assert clip.source == second and clip.probing
+
+    deadline = monotonic() + 5
+    while clip.probing and monotonic() < deadline:
+        app.processEvents()
+
+    assert not clip.probing and clip.duration == INFO['duration']
+    assert threads and main_thread() not in threads
+    model.stopProbing()
+
+def test_storeWithoutOwnerDoesNotProbe(tmp_path, monkeypatch):
+    threads = probeCache(tmp_path, monkeypatch)
+    source = video(tmp_path, 'video.mp4')
+
+    store = ClipStore()
+    store.insert(0, SourceInfo(''))
+    store.setSource(0, source)
+    assert store.probing(0) and not threads
+
+    # Metadata already in the probe cache is used right away
+    ProbeCache.instance().put(source, INFO)
+    store.setSource(0, source)
+    assert not store.probing(0) and store.duration(0) == INFO['duration']